@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+"""
+Golden-output regression harness for ranking and performance changes.
+
+Runs the full pipeline on a fixed synthetic PDF corpus and persona set with a
+deterministic embedding model, snapshots extracted_sections and
+subsection_analysis, and compares two snapshots (rank correlation, top-k
+overlap, timing). Typical use around a refactor:
+
+    python benchmarks/golden_harness.py snapshot --output before.json
+    # apply the change (or check out the other version)
+    python benchmarks/golden_harness.py snapshot --output after.json
+    python benchmarks/golden_harness.py compare before.json after.json
+
+By default the model is a hashing encoder, so no model download is needed
+and both versions see identical vectors. With --vectors the vectors come from
+a cache file instead; --record fills it with the real model once.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import tempfile
+import subprocess
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 384
+
+# Fixed persona set: one per default persona keyword list plus one without
+PERSONA_CASES = [
+    {
+        'id': 'researcher',
+        'persona': 'PhD researcher in computational biology',
+        'job_to_be_done': 'Prepare a literature review on methodology and benchmark findings for drug discovery'
+    },
+    {
+        'id': 'student',
+        'persona': 'Undergraduate chemistry student',
+        'job_to_be_done': 'Understand reaction kinetics concepts and worked examples for exam preparation'
+    },
+    {
+        'id': 'analyst',
+        'persona': 'Investment analyst',
+        'job_to_be_done': 'Analyze revenue trends, market performance and growth metrics of technology companies'
+    },
+    {
+        'id': 'planner',
+        'persona': 'Travel planner',
+        'job_to_be_done': 'Plan a four day itinerary with museums, restaurants and budget accommodation'
+    }
+]
+
+# Topic vocabulary of the synthetic corpus; every document mixes a few topics
+TOPICS = {
+    'biology': ['protein', 'genome', 'assay', 'molecular', 'binding', 'sequencing', 'drug', 'target', 'cell'],
+    'chemistry': ['reaction', 'kinetics', 'catalyst', 'equilibrium', 'molecule', 'concentration', 'rate', 'energy'],
+    'finance': ['revenue', 'growth', 'margin', 'market', 'investment', 'quarter', 'earnings', 'performance'],
+    'travel': ['museum', 'restaurant', 'itinerary', 'hotel', 'budget', 'district', 'tour', 'accommodation'],
+    'methods': ['methodology', 'benchmark', 'dataset', 'evaluation', 'findings', 'analysis', 'study', 'metrics']
+}
+
+HEADINGS = ['Introduction', 'Background', 'Methodology', 'Results', 'Discussion', 'Conclusion']
+
+SENTENCE_TEMPLATES = [
+    'The {a} of the {b} was measured against a reference {c} in every trial.',
+    'Our {a} shows that {b} and {c} are closely related in practice.',
+    'A worked example explains how the {a} changes when the {b} increases.',
+    'Previous work on {a} reported strong {b} but weak {c} across the study.',
+    'This section summarizes the {a}, the {b} and the resulting {c}.',
+    'For each {a} we report the {b} together with its {c} over time.'
+]
+
+CORPUS_SPEC = [
+    ('drug_discovery_review', ['biology', 'methods'], 3),
+    ('reaction_kinetics_notes', ['chemistry', 'methods'], 2),
+    ('tech_earnings_report', ['finance', 'methods'], 3),
+    ('city_travel_guide', ['travel', 'finance'], 2),
+    ('lab_benchmark_study', ['biology', 'chemistry', 'methods'], 2)
+]
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder with a SentenceTransformer-compatible encode()."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, shared_weight: float = 0.7):
+        """
+        Initialize encoder.
+
+        Args:
+            dim: Embedding dimension
+            shared_weight: Weight of a direction shared by all texts. Sentence
+                encoders give unrelated texts a cosine well above zero; this puts
+                the stub's scores in the range the relevance thresholds expect.
+        """
+        self.dim = dim
+        self.shared_weight = shared_weight
+        self._buckets = {}
+
+        shared = np.random.RandomState(0).standard_normal(dim).astype(np.float32)
+        self._shared = shared / np.linalg.norm(shared)
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        """Hash a feature to a (dimension, sign) pair, stable across processes."""
+        if feature not in self._buckets:
+            digest = int(hashlib.md5(feature.encode('utf-8')).hexdigest(), 16)
+            self._buckets[feature] = (digest % self.dim, 1.0 if (digest >> 64) & 1 else -1.0)
+        return self._buckets[feature]
+
+    def encode_one(self, text: str) -> np.ndarray:
+        """
+        Encode one text from its words and word prefixes.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            Unit-length float32 vector
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r'\w+', text.lower()):
+            if len(word) <= 2:
+                continue
+            # The prefix feature lets inflections ("analyze"/"analysis") overlap
+            for feature, weight in ((word, 1.0), ('prefix:' + word[:5], 0.5)):
+                index, sign = self._bucket(feature)
+                vector[index] += sign * weight
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        vector += self.shared_weight * self._shared
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        Encode texts (SentenceTransformer keyword arguments are accepted and ignored).
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self.encode_one(text) for text in texts])
+
+
+class CachedVectorModel:
+    """Replays embeddings from a vector file keyed by text hash."""
+
+    def __init__(self, path: str, fallback=None):
+        """
+        Load the vector file.
+
+        Args:
+            path: .npz file with 'keys' (sha1 of each text) and 'vectors'
+            fallback: Model used for texts not in the file (hashing encoder if omitted)
+        """
+        self.path = path
+        self.fallback = fallback
+        self.vectors = {}
+        self.misses = 0
+        self.dirty = False
+
+        if os.path.exists(path):
+            data = np.load(path)
+            self.vectors = dict(zip(data['keys'].tolist(), data['vectors']))
+            logger.info(f"Loaded {len(self.vectors)} cached vectors from {path}")
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        Look up vectors, computing missing ones with the fallback model.
+
+        Args:
+            texts: Texts to encode
+            **kwargs: Passed to the fallback model
+
+        Returns:
+            Array of vectors aligned with texts
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        keys = [self._key(text) for text in texts]
+        missing = [i for i, key in enumerate(keys) if key not in self.vectors]
+
+        if missing:
+            self.misses += len(missing)
+            if self.fallback is None:
+                self.fallback = HashingEncoder(self._dimension())
+                logger.warning("Vector cache misses are encoded with the hashing encoder; re-record the cache")
+            computed = np.asarray(self.fallback.encode([texts[i] for i in missing], **kwargs), dtype=np.float32)
+            for i, vector in zip(missing, computed):
+                self.vectors[keys[i]] = vector
+            self.dirty = True
+
+        if not texts:
+            return np.zeros((0, self._dimension()), dtype=np.float32)
+        return np.stack([self.vectors[key] for key in keys])
+
+    def _dimension(self) -> int:
+        """Dimension of the cached vectors."""
+        for vector in self.vectors.values():
+            return len(vector)
+        return EMBEDDING_DIM
+
+    def save(self) -> None:
+        """Write the vectors back to the file if any were added."""
+        if not self.dirty:
+            return
+        keys = sorted(self.vectors)
+        np.savez_compressed(self.path, keys=np.array(keys), vectors=np.stack([self.vectors[k] for k in keys]))
+        self.dirty = False
+        logger.info(f"Saved {len(keys)} vectors to {self.path}")
+
+
+def build_corpus(directory: str, seed: int = 13) -> List[str]:
+    """
+    Write the synthetic PDF corpus.
+
+    The text depends only on the seed, so every code version parses the same PDFs.
+
+    Args:
+        directory: Directory for the PDFs
+        seed: Random seed of the generated text
+
+    Returns:
+        Written filenames
+    """
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    filenames = []
+
+    for name, topics, pages in CORPUS_SPEC:
+        doc = fitz.open()
+        headings = iter(HEADINGS * pages)
+
+        for page_index in range(pages):
+            page = doc.new_page()
+            y = 72
+            for number in range(1, 4):
+                topic = topics[(page_index + number) % len(topics)]
+                heading = f"{page_index * 3 + number}. {next(headings)} of {rng.choice(TOPICS[topic])} {rng.choice(TOPICS['methods'])}"
+                page.insert_text((72, y), heading, fontsize=16)
+                y += 24
+
+                for _ in range(2):
+                    words = [w for t in topics for w in TOPICS[t]]
+                    paragraph = ' '.join(
+                        rng.choice(SENTENCE_TEMPLATES).format(
+                            a=rng.choice(TOPICS[topic]), b=rng.choice(words), c=rng.choice(words)
+                        )
+                        for _ in range(3)
+                    )
+                    rect = fitz.Rect(72, y, 540, y + 70)
+                    page.insert_textbox(rect, paragraph, fontsize=10)
+                    y += 74
+
+        filename = f"{name}.pdf"
+        doc.save(os.path.join(directory, filename))
+        doc.close()
+        filenames.append(filename)
+
+    return filenames
+
+
+def _code_version() -> str:
+    """Describe the checked-out code (commit plus a dirty marker)."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def take_snapshot(model, storage_dtype: str = 'float32', repeats: int = 1) -> Dict[str, Any]:
+    """
+    Run every persona case and collect rankings and timings.
+
+    Args:
+        model: Embedding model with a SentenceTransformer-compatible encode()
+        storage_dtype: Embedding storage dtype of the engine
+        repeats: Runs per case; the fastest time is reported
+
+    Returns:
+        Snapshot dictionary
+    """
+    from main import PersonaDocumentIntelligence
+    from models.embeddings import EmbeddingEngine
+    from utils.resources import ResourceManager
+
+    # One in-process parse worker keeps timings comparable between machines
+    resources = ResourceManager(parse_workers=1)
+    engine = EmbeddingEngine(storage_dtype=storage_dtype, num_threads=resources.intra_op_threads, model=model)
+    system = PersonaDocumentIntelligence(resources=resources, embedding_engine=engine)
+
+    snapshot = {'code_version': _code_version(), 'storage_dtype': storage_dtype, 'cases': {}}
+
+    with tempfile.TemporaryDirectory() as input_dir, tempfile.TemporaryDirectory() as output_dir:
+        build_corpus(input_dir)
+
+        for case in PERSONA_CASES:
+            with open(os.path.join(input_dir, 'config.json'), 'w') as f:
+                json.dump({'persona': case['persona'], 'job_to_be_done': case['job_to_be_done']}, f)
+
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                system.process_documents(input_dir, output_dir)
+                timings.append(time.perf_counter() - start)
+
+            with open(os.path.join(output_dir, 'analysis_result.json'), 'r') as f:
+                result = json.load(f)
+
+            snapshot['cases'][case['id']] = {
+                'seconds': round(min(timings), 4),
+                'extracted_sections': result['extracted_sections'],
+                'subsection_analysis': result['subsection_analysis']
+            }
+
+    return snapshot
+
+
+def _item_keys(items: List[Dict[str, Any]], fields: Tuple[str, ...]) -> List[Tuple]:
+    """Identify ranked items by their fields, numbering repeats of the same key."""
+    seen = {}
+    keys = []
+    for item in items:
+        key = tuple(item.get(field) for field in fields)
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key + (seen[key],))
+    return keys
+
+
+def kendall_tau(reference: List, candidate: List) -> Optional[float]:
+    """
+    Kendall tau between two rankings over the items they share.
+
+    Args:
+        reference: Items in reference order
+        candidate: Items in candidate order
+
+    Returns:
+        Tau in [-1, 1], or None with fewer than two shared items
+    """
+    position = {item: i for i, item in enumerate(candidate)}
+    ranks = [position[item] for item in reference if item in position]
+    if len(ranks) < 2:
+        return None
+
+    concordant = discordant = 0
+    for i in range(len(ranks)):
+        for j in range(i + 1, len(ranks)):
+            if ranks[i] < ranks[j]:
+                concordant += 1
+            else:
+                discordant += 1
+    return (concordant - discordant) / (concordant + discordant)
+
+
+def top_k_overlap(reference: List, candidate: List, k: int) -> float:
+    """
+    Fraction of the reference top k that is also in the candidate top k.
+
+    Args:
+        reference: Items in reference order
+        candidate: Items in candidate order
+        k: Cutoff
+
+    Returns:
+        Overlap in [0, 1] (1.0 if the reference is empty)
+    """
+    top = reference[:k]
+    if not top:
+        return 1.0
+    return len(set(top) & set(candidate[:k])) / len(top)
+
+
+def compare_snapshots(baseline: Dict[str, Any], candidate: Dict[str, Any], k: int = 5) -> Dict[str, Any]:
+    """
+    Compare the rankings and timings of two snapshots.
+
+    Args:
+        baseline: Snapshot of the reference version
+        candidate: Snapshot of the changed version
+        k: Cutoff for top-k overlap
+
+    Returns:
+        Report with per-case metrics and the worst values over all cases
+    """
+    fields = {
+        'extracted_sections': ('document', 'section_title', 'page_number'),
+        # Not keyed on refined_text, so text refinement alone is not a rank change
+        'subsection_analysis': ('document', 'section_title', 'page_number')
+    }
+
+    report = {
+        'baseline_version': baseline.get('code_version'),
+        'candidate_version': candidate.get('code_version'),
+        'cases': {}
+    }
+
+    for case_id, base_case in baseline['cases'].items():
+        new_case = candidate['cases'].get(case_id)
+        if new_case is None:
+            report['cases'][case_id] = {'error': 'missing in candidate'}
+            continue
+
+        case_report = {}
+        for output_key, key_fields in fields.items():
+            reference = _item_keys(base_case[output_key], key_fields)
+            changed = _item_keys(new_case[output_key], key_fields)
+            case_report[output_key] = {
+                'kendall_tau': kendall_tau(reference, changed),
+                f'top_{k}_overlap': top_k_overlap(reference, changed, k),
+                'identical': reference == changed,
+                'count': [len(reference), len(changed)]
+            }
+
+        texts = {key: item['refined_text'] for key, item in zip(
+            _item_keys(base_case['subsection_analysis'], fields['subsection_analysis']),
+            base_case['subsection_analysis'])}
+        case_report['refined_text_changed'] = sum(
+            1 for key, item in zip(_item_keys(new_case['subsection_analysis'], fields['subsection_analysis']),
+                                   new_case['subsection_analysis'])
+            if key in texts and texts[key] != item['refined_text']
+        )
+
+        seconds = (base_case['seconds'], new_case['seconds'])
+        case_report['seconds'] = list(seconds)
+        case_report['speedup'] = round(seconds[0] / seconds[1], 3) if seconds[1] else None
+        report['cases'][case_id] = case_report
+
+    metrics = [m for case in report['cases'].values() for key, m in case.items() if key in fields]
+    taus = [m['kendall_tau'] for m in metrics if m['kendall_tau'] is not None]
+    report['min_kendall_tau'] = min(taus) if taus else None
+    report[f'min_top_{k}_overlap'] = min((m[f'top_{k}_overlap'] for m in metrics), default=None)
+    report['all_identical'] = bool(metrics) and all(m['identical'] for m in metrics) and \
+        all('error' not in case for case in report['cases'].values())
+
+    base_total = sum(case['seconds'] for case in baseline['cases'].values())
+    new_total = sum(case['seconds'] for case in candidate['cases'].values())
+    report['total_seconds'] = [round(base_total, 4), round(new_total, 4)]
+    return report
+
+
+def quantization_corpus_report(model, k: int = 10, dtypes: Tuple[str, ...] = ('float16', 'int8')) -> Dict[str, Any]:
+    """
+    Measure compact embedding storage on the synthetic corpus.
+
+    Section texts (as scored by the analyzer) and the persona case queries
+    are encoded once; every compact form is compared with float32 for size
+    and score agreement. The full pipeline is also run per storage type and
+    its rankings compared with the float32 run.
+
+    Args:
+        model: Embedding model with a SentenceTransformer-compatible encode()
+        k: Cut-off for top-k recall of section scores
+        dtypes: Compact storage types to evaluate
+
+    Returns:
+        Report with 'sections', 'float32_bytes', per-dtype 'storage' metrics
+        (quantization_report) and per-dtype 'pipeline' ranking agreement
+    """
+    from models.quantization import quantization_report
+    from utils.pdf_processor import PDFProcessor
+
+    processor = PDFProcessor()
+    texts = []
+    with tempfile.TemporaryDirectory() as input_dir:
+        for filename in build_corpus(input_dir):
+            for section in processor.extract_sections(os.path.join(input_dir, filename)):
+                texts.append(f"{section['section_title']} {section['content'][:500]}")
+
+    queries = [f"{case['persona']} {case['job_to_be_done']}" for case in PERSONA_CASES]
+    embeddings = np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    query_embeddings = np.asarray(model.encode(queries, normalize_embeddings=True), dtype=np.float32)
+
+    report = {
+        'sections': len(texts),
+        'float32_bytes': int(embeddings.nbytes),
+        'storage': quantization_report(embeddings, query_embeddings, k=k, dtypes=list(dtypes)),
+        'pipeline': {}
+    }
+
+    baseline = take_snapshot(model, storage_dtype='float32')
+    for dtype in dtypes:
+        comparison = compare_snapshots(baseline, take_snapshot(model, storage_dtype=dtype))
+        report['pipeline'][dtype] = {
+            'min_kendall_tau': comparison['min_kendall_tau'],
+            'min_top_5_overlap': comparison['min_top_5_overlap'],
+            'all_identical': comparison['all_identical']
+        }
+
+    return report
+
+
+def print_quantization_report(report: Dict[str, Any], k: int) -> None:
+    """Print a quantization report as a table."""
+    print(f"{report['sections']} sections, float32 embeddings: {report['float32_bytes']} bytes")
+    print(f"{'storage':<9} {'bytes':>9} {'ratio':>6} {f'recall@{k}':>10} {'spearman':>9} {'max err':>8} "
+          f"{'out tau':>8} {'out top5':>9} {'same':>5}")
+
+    for dtype, storage in report['storage'].items():
+        pipeline = report['pipeline'][dtype]
+        tau = pipeline['min_kendall_tau']
+        print(f"{dtype:<9} {storage['bytes']:>9} {storage['compression_ratio']:>6.2f} "
+              f"{storage['recall_at_k']:>10.3f} {storage['spearman']:>9.4f} {storage['max_abs_error']:>8.4f} "
+              f"{'n/a' if tau is None else f'{tau:.3f}':>8} {pipeline['min_top_5_overlap']:>9.2f} "
+              f"{'yes' if pipeline['all_identical'] else 'no':>5}")
+
+
+def _load_model(args: argparse.Namespace):
+    """Build the embedding model selected by --vectors/--record (hashing encoder by default)."""
+    if not args.vectors:
+        return HashingEncoder()
+
+    fallback = None
+    if args.record:
+        from sentence_transformers import SentenceTransformer
+        fallback = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+    return CachedVectorModel(args.vectors, fallback=fallback)
+
+
+def print_report(report: Dict[str, Any], k: int) -> None:
+    """Print a comparison report as a table."""
+    print(f"Baseline {report['baseline_version']} vs candidate {report['candidate_version']}")
+    print(f"{'case':<12} {'output':<20} {'tau':>7} {f'top{k}':>7} {'same':>5} {'base s':>8} {'new s':>8} {'speedup':>8}")
+
+    for case_id, case in report['cases'].items():
+        if 'error' in case:
+            print(f"{case_id:<12} {case['error']}")
+            continue
+        for output_key in ('extracted_sections', 'subsection_analysis'):
+            metrics = case[output_key]
+            tau = metrics['kendall_tau']
+            print(f"{case_id:<12} {output_key:<20} {'n/a' if tau is None else f'{tau:.3f}':>7} "
+                  f"{metrics[f'top_{k}_overlap']:>7.2f} {'yes' if metrics['identical'] else 'no':>5} "
+                  f"{case['seconds'][0]:>8.3f} {case['seconds'][1]:>8.3f} {case['speedup'] or 0:>8.2f}")
+
+    text_changes = sum(case.get('refined_text_changed', 0) for case in report['cases'].values())
+    print(f"Total seconds: {report['total_seconds'][0]:.3f} -> {report['total_seconds'][1]:.3f}; "
+          f"identical: {report['all_identical']}; refined_text changed: {text_changes}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Golden-output regression harness')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = commands.add_parser('snapshot', help='Run the persona set and write a snapshot')
+    snapshot_parser.add_argument('--output', required=True, help='Snapshot JSON path')
+    snapshot_parser.add_argument('--vectors', help='Vector cache file (.npz) instead of the hashing encoder')
+    snapshot_parser.add_argument('--record', action='store_true',
+                                 help='Fill vector cache misses with the real embedding model')
+    snapshot_parser.add_argument('--storage', default='float32', help='Embedding storage dtype')
+    snapshot_parser.add_argument('--repeats', type=int, default=3, help='Runs per case (fastest is kept)')
+
+    quantization_parser = commands.add_parser(
+        'quantization', help='Report compact storage size and accuracy against float32 on the corpus'
+    )
+    quantization_parser.add_argument('--vectors', help='Vector cache file (.npz) instead of the hashing encoder')
+    quantization_parser.add_argument('--record', action='store_true',
+                                     help='Fill vector cache misses with the real embedding model')
+    quantization_parser.add_argument('--top-k', type=int, default=10, help='Cutoff for recall of section scores')
+    quantization_parser.add_argument('--report', help='Write the full report as JSON')
+
+    compare_parser = commands.add_parser('compare', help='Compare two snapshots')
+    compare_parser.add_argument('baseline', help='Snapshot of the reference version')
+    compare_parser.add_argument('candidate', help='Snapshot of the changed version')
+    compare_parser.add_argument('--top-k', type=int, default=5, help='Cutoff for top-k overlap')
+    compare_parser.add_argument('--min-tau', type=float, default=None,
+                                help='Exit non-zero if any Kendall tau is below this')
+    compare_parser.add_argument('--min-overlap', type=float, default=None,
+                                help='Exit non-zero if any top-k overlap is below this')
+    compare_parser.add_argument('--report', help='Write the full report as JSON')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'snapshot':
+        model = _load_model(args)
+        snapshot = take_snapshot(model, storage_dtype=args.storage, repeats=args.repeats)
+        if isinstance(model, CachedVectorModel):
+            snapshot['vector_cache_misses'] = model.misses
+            if args.record:
+                model.save()
+
+        with open(args.output, 'w') as f:
+            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        print(f"Snapshot of {snapshot['code_version']} ({len(snapshot['cases'])} cases) saved to {args.output}")
+        return
+
+    if args.command == 'quantization':
+        model = _load_model(args)
+        report = quantization_corpus_report(model, k=args.top_k)
+        print_quantization_report(report, args.top_k)
+
+        if isinstance(model, CachedVectorModel) and args.record:
+            model.save()
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2)
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r') as f:
+        candidate = json.load(f)
+
+    report = compare_snapshots(baseline, candidate, k=args.top_k)
+    print_report(report, args.top_k)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = (args.min_tau is not None and report['min_kendall_tau'] is not None
+              and report['min_kendall_tau'] < args.min_tau)
+    failed = failed or (args.min_overlap is not None and report[f'min_top_{args.top_k}_overlap'] is not None
+                        and report[f'min_top_{args.top_k}_overlap'] < args.min_overlap)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,36 @@ Adobe Hackathon 2025 - Challenge 1B
 """
 
 import os
-import json
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional, TYPE_CHECKING
+import argparse
+import math
+import multiprocessing
 import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models.embeddings import EmbeddingEngine
-from utils.pdf_processor import PDFProcessor
-from utils.persona_analyzer import PersonaAnalyzer
-from utils.ranking_engine import RankingEngine
+# Spawned parse workers re-import this module, so only modules they can load
+# cheaply are imported here; the model stack (torch, sentence-transformers,
+# scikit-learn) is imported where the system is built.
+from utils.pdf_processor import PDFProcessor, extract_sections_worker
 from utils.json_formatter import JSONFormatter
+from utils.ingestion import DocumentIngestor
+from utils.watcher import DirectoryWatcher
+from utils.time_budget import TimeBudget
+from utils.resources import ResourceManager
+from utils.scoring_spec import ScoringSpec
+from utils.guardrails import ExtractionLimits, IsolatedExtractor
+from utils.profiling import maybe_profile, PROFILE_MODES
+
+if TYPE_CHECKING:
+    from models.embeddings import EmbeddingEngine
+    from utils.query_context import QueryContext
 
 # Configure logging
 logging.basicConfig(
@@ -31,16 +46,49 @@ logger = logging.getLogger(__name__)
 class PersonaDocumentIntelligence:
     """Main system class for persona-driven document intelligence."""
     
-    def __init__(self):
-        """Initialize the system components."""
+    def __init__(self, storage_dtype: str = 'float32', stream_events: bool = False,
+                 time_budget: Optional[float] = None, resources: Optional[ResourceManager] = None,
+                 embedding_engine: Optional['EmbeddingEngine'] = None, scoring_spec: Optional[ScoringSpec] = None,
+                 page_cache_dir: Optional[str] = None, extraction_limits: Optional[ExtractionLimits] = None):
+        """
+        Initialize the system components.
+        
+        Args:
+            storage_dtype: Embedding storage type ('float32', 'float16' or 'int8')
+            stream_events: Write NDJSON progress events next to analysis_result.json
+            time_budget: Target wall-clock seconds per run; work is degraded to meet it
+            resources: Core split between parse workers and encoder threads (detected if omitted)
+            embedding_engine: Preconfigured embedding engine (created if omitted)
+            scoring_spec: Feature weights of the relevance and ranking scores (defaults if omitted)
+            page_cache_dir: Directory caching parsed page lines by file hash (disabled if omitted)
+            extraction_limits: Per-document page/memory/time limits; when any is set,
+                extraction runs in supervised worker processes
+        """
         logger.info("Initializing Persona-Driven Document Intelligence System...")
         
+        from models.embeddings import EmbeddingEngine
+        from utils.persona_analyzer import PersonaAnalyzer
+        from utils.ranking_engine import RankingEngine
+        from utils.text_refiner import SentenceRefiner
+        
+        self.resources = resources or ResourceManager()
+        
         # Initialize components
-        self.pdf_processor = PDFProcessor()
-        self.embedding_engine = EmbeddingEngine()
-        self.persona_analyzer = PersonaAnalyzer(self.embedding_engine)
-        self.ranking_engine = RankingEngine(self.embedding_engine)
+        self.extraction_limits = extraction_limits or ExtractionLimits()
+        self.pdf_processor = PDFProcessor(cache_dir=page_cache_dir, max_pages=self.extraction_limits.max_pages)
+        self.embedding_engine = embedding_engine or EmbeddingEngine(
+            storage_dtype=storage_dtype,
+            num_threads=self.resources.intra_op_threads,
+            interop_threads=self.resources.inter_op_threads
+        )
+        self.persona_analyzer = PersonaAnalyzer(self.embedding_engine, scoring_spec=scoring_spec)
+        self.ranking_engine = RankingEngine(self.embedding_engine, scoring_spec=scoring_spec)
         self.json_formatter = JSONFormatter()
+        self.text_refiner = SentenceRefiner(self.embedding_engine, max_chars=JSONFormatter.MAX_REFINED_CHARS)
+        
+        self.stream_events = stream_events
+        self.events = None
+        self.time_budget = time_budget
         
         logger.info("System initialization complete!")
     
@@ -49,87 +97,51 @@ class PersonaDocumentIntelligence:
         Process documents with persona-driven intelligence.
         
         Args:
-            input_dir: Directory containing PDFs and config.json
+            input_dir: Directory or zip/tar archive containing PDFs and config.json, or '-' for stdin
             output_dir: Directory to save results
         """
         start_time = time.time()
+        budget = TimeBudget(self.time_budget) if self.time_budget else None
+        self._open_events(output_dir)
         
         try:
-            # Load configuration
-            config_path = os.path.join(input_dir, 'config.json')
-            if not os.path.exists(config_path):
-                raise FileNotFoundError("config.json not found in input directory")
-            
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            ingestor = DocumentIngestor(input_dir, prefetch=int(os.getenv('PREFETCH_DOCUMENTS', '4')))
             
-            persona = config.get('persona', '')
-            job_to_be_done = config.get('job_to_be_done', '')
-            
-            if not persona or not job_to_be_done:
-                raise ValueError("Both 'persona' and 'job_to_be_done' must be specified in config.json")
-            
-            logger.info(f"Processing for persona: {persona}")
-            logger.info(f"Job to be done: {job_to_be_done}")
+            # Load configuration
+            config = ingestor.load_config()
+            persona, job_to_be_done = self._read_task(config)
             
             # Find PDF files
-            pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
+            pdf_files = ingestor.list_documents()
             if not pdf_files:
                 raise FileNotFoundError("No PDF files found in input directory")
             
             logger.info(f"Found {len(pdf_files)} PDF files to process")
+            self._emit('run_started', persona=persona, job_to_be_done=job_to_be_done,
+                       documents=[f[0] for f in pdf_files])
             
-            # Process PDFs
-            documents = []
-            for pdf_file in pdf_files:
-                pdf_path = os.path.join(input_dir, pdf_file)
-                logger.info(f"Processing {pdf_file}...")
-                
-                sections = self.pdf_processor.extract_sections(pdf_path)
-                documents.append({
-                    'filename': pdf_file,
-                    'path': pdf_path,
-                    'sections': sections,
-                    'total_pages': len(set(s['page_number'] for s in sections))
-                })
+            # Process PDFs while the next ones are read in the background
+            documents = self._extract_documents(ingestor, pdf_files, budget)
+            
+            # Encode every query variant once for all scorers
+            query_context = self._query_context(persona, job_to_be_done, config)
             
             # Analyze with persona context
             logger.info("Analyzing documents with persona context...")
             analysis_results = self.persona_analyzer.analyze_documents(
-                documents, persona, job_to_be_done
+                documents, persona, job_to_be_done,
+                persona_keywords=config.get('persona_keywords'),
+                query_context=query_context,
+                budget=budget
             )
+            self._emit('sections_scored', sections=len(analysis_results['sections']),
+                       subsections=len(analysis_results['subsections']))
             
-            # Rank sections and subsections
-            logger.info("Ranking sections and subsections...")
-            ranked_sections = self.ranking_engine.rank_sections(
-                analysis_results['sections'], persona, job_to_be_done
+            ranked_sections, ranked_subsections, output_path, processing_time = self._rank_and_save(
+                documents, analysis_results['sections'], analysis_results['subsections'],
+                query_context, output_dir, start_time, budget=budget
             )
             
-            ranked_subsections = self.ranking_engine.rank_subsections(
-                analysis_results['subsections'], persona, job_to_be_done
-            )
-            
-            # Format output
-            processing_time = time.time() - start_time
-            output_data = self.json_formatter.format_output(
-                documents=documents,
-                persona=persona,
-                job_to_be_done=job_to_be_done,
-                sections=ranked_sections,
-                subsections=ranked_subsections,
-                processing_time=processing_time
-            )
-            
-            # Save results
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, 'analysis_result.json')
-            
-            with open(output_path, 'w') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"Analysis complete! Results saved to {output_path}")
-            logger.info(f"Processing time: {processing_time:.2f} seconds")
-            
             # Print summary
             print(f"\nProcessing Complete!")
             print(f"Documents processed: {len(documents)}")
@@ -140,21 +152,642 @@ class PersonaDocumentIntelligence:
             
         except Exception as e:
             logger.error(f"Error during processing: {str(e)}")
+            self._emit('run_failed', error=str(e))
             raise
+        finally:
+            self._close_events()
+    
+    def watch_documents(self, input_dir: str, output_dir: str, poll_interval: float = 1.0, debounce: float = 2.0):
+        """
+        Watch a directory and update the results incrementally as PDFs arrive.
+        
+        The model and every document's extracted sections and analysis stay in
+        memory; each debounced batch of changes only extracts and embeds the
+        new or modified PDFs, then re-ranks the corpus and rewrites the output.
+        A change to config.json re-analyzes the cached extractions.
+        
+        Args:
+            input_dir: Directory to watch
+            output_dir: Directory to save results
+            poll_interval: Seconds between directory polls
+            debounce: Quiet period in seconds before a batch is processed
+        """
+        watcher = DirectoryWatcher(input_dir, poll_interval=poll_interval, debounce=debounce)
+        ingestor = DocumentIngestor(input_dir, prefetch=int(os.getenv('PREFETCH_DOCUMENTS', '4')))
+        
+        corpus = {}
+        config = None
+        query_context = None
+        self._open_events(output_dir)
+        
+        logger.info(f"Watching {input_dir} for new documents (Ctrl+C to stop)...")
+        
+        try:
+            for batch in watcher.changes():
+                start_time = time.time()
+                
+                try:
+                    changed_pdfs = [f for f in batch['changed'] if f.lower().endswith('.pdf')]
+                    config_changed = 'config.json' in batch['changed']
+                    
+                    for filename in batch['removed']:
+                        if corpus.pop(filename, None) is not None:
+                            logger.info(f"Removed {filename} from corpus")
+                    
+                    if config_changed:
+                        config = ingestor.load_config()
+                        persona, job_to_be_done = self._read_task(config)
+                        query_context = self._query_context(persona, job_to_be_done, config)
+                        # Persona or job changed: drop analyses, keep extractions
+                        for entry in corpus.values():
+                            entry['analysis'] = None
+                    
+                    # Extract only the new or modified files
+                    wanted = set(changed_pdfs)
+                    entries = [e for e in ingestor.list_documents() if e[0] in wanted]
+                    for document in self._extract_documents(ingestor, entries):
+                        corpus[document['filename']] = {'document': document, 'analysis': None}
+                    
+                    if config is None:
+                        logger.info("Waiting for config.json...")
+                        continue
+                    if not corpus:
+                        # Every PDF was removed: drop the results that still list them
+                        output_path = os.path.join(output_dir, 'analysis_result.json')
+                        if os.path.exists(output_path):
+                            os.remove(output_path)
+                            logger.info(f"Corpus is empty, removed {output_path}")
+                        self._emit('corpus_empty', output_path=output_path)
+                        continue
+                    
+                    # Analyze only documents without a cached analysis
+                    pending = [name for name in sorted(corpus) if corpus[name]['analysis'] is None]
+                    for name in pending:
+                        corpus[name]['analysis'] = self.persona_analyzer.analyze_documents(
+                            [corpus[name]['document']], query_context.persona, query_context.job_to_be_done,
+                            persona_keywords=config.get('persona_keywords'),
+                            query_context=query_context
+                        )
+                        self._emit('sections_scored', document=name,
+                                   sections=len(corpus[name]['analysis']['sections']),
+                                   subsections=len(corpus[name]['analysis']['subsections']))
+                    
+                    names = sorted(corpus)
+                    documents = [corpus[name]['document'] for name in names]
+                    sections = [s for name in names for s in corpus[name]['analysis']['sections']]
+                    subsections = [s for name in names for s in corpus[name]['analysis']['subsections']]
+                    
+                    _, _, output_path, processing_time = self._rank_and_save(
+                        documents, sections, subsections, query_context,
+                        output_dir, start_time, reuse_scores=True
+                    )
+                    
+                    logger.info(
+                        f"Updated {output_path}: {len(pending)} document(s) analyzed, "
+                        f"{len(corpus)} in corpus, {processing_time:.2f}s"
+                    )
+                
+                except Exception as e:
+                    # Keep the daemon alive and report the batch's files again after
+                    # the next quiet period (e.g. once a partly written config.json is complete)
+                    logger.error(f"Error processing changes {batch}: {str(e)}")
+                    self._emit('batch_failed', changes=batch, error=str(e))
+                    watcher.retry(batch)
+        
+        except KeyboardInterrupt:
+            logger.info("Stopping watcher...")
+        finally:
+            watcher.stop()
+            self._close_events()
+    
+    def _open_events(self, output_dir: str) -> None:
+        """Open the NDJSON event stream for this run if enabled."""
+        if self.stream_events:
+            self.events = self.json_formatter.open_event_stream(
+                os.path.join(output_dir, 'analysis_events.ndjson')
+            )
+    
+    def _close_events(self) -> None:
+        """Close the NDJSON event stream, if open."""
+        if self.events is not None:
+            self.events.close()
+            self.events = None
+    
+    def _emit(self, event: str, **payload: Any) -> None:
+        """Emit a progress event when streaming is enabled."""
+        if self.events is not None:
+            self.events.emit(event, **payload)
+    
+    def process_shard(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract, embed and rank one shard for a coordinator.
+        
+        Returns the shard's section candidates after the local diversity
+        filter (which keeps every item that can survive the global filter:
+        each document's top sections and the overall top ones) and its top-k
+        subsections, already sentence-refined. Each candidate carries '_order' = [shard index, position
+        in analysis order] for single-node-identical tie-breaking. TF-IDF is
+        fit per (text, query) pair, so no corpus statistics need merging.
+        
+        The coordinator's scoring spec and time budget travel with the request,
+        so every worker scores and degrades like a single-node run would.
+        
+        Args:
+            shard: Request with 'shard_index', 'config', 'top_k_subsections',
+                'documents' (filename, path and raw 'data'), and optionally
+                'scoring_spec' (ScoringSpec.as_dict()) and 'time_budget'
+                ({'seconds', 'elapsed'} of the coordinator's budget)
+            
+        Returns:
+            Shard result with 'documents', 'sections', 'subsections', 'stats'
+            and 'degradations' (time budget degradations applied by the shard)
+        """
+        shard_start = time.time()
+        config = shard['config']
+        persona, job_to_be_done = self._read_task(config)
+        
+        persona_analyzer, ranking_engine = self.persona_analyzer, self.ranking_engine
+        if shard.get('scoring_spec') is not None:
+            from utils.persona_analyzer import PersonaAnalyzer
+            from utils.ranking_engine import RankingEngine
+            
+            scoring_spec = ScoringSpec(shard['scoring_spec'])
+            persona_analyzer = PersonaAnalyzer(self.embedding_engine, scoring_spec=scoring_spec)
+            ranking_engine = RankingEngine(self.embedding_engine, scoring_spec=scoring_spec)
+        
+        budget = None
+        if shard.get('time_budget'):
+            # Share the coordinator's start so stage deadlines line up across workers
+            budget = TimeBudget(shard['time_budget']['seconds'],
+                                start=time.monotonic() - shard['time_budget']['elapsed'])
+        
+        pdfs = shard['documents']
+        if self.extraction_limits.enabled:
+            documents = self._extract_isolated(pdfs, len(pdfs), budget)
+        else:
+            documents = [self._extract_document(pdf, budget, len(pdfs) - index) for index, pdf in enumerate(pdfs)]
+        
+        query_context = self._query_context(persona, job_to_be_done, config)
+        analysis_results = persona_analyzer.analyze_documents(
+            documents, persona, job_to_be_done,
+            persona_keywords=config.get('persona_keywords'),
+            query_context=query_context,
+            budget=budget
+        )
+        
+        for key in ('sections', 'subsections'):
+            for position, item in enumerate(analysis_results[key]):
+                item['_order'] = [shard['shard_index'], position]
+        
+        sections = ranking_engine.rank_sections(
+            analysis_results['sections'], persona, job_to_be_done, query_context=query_context, budget=budget
+        )
+        subsections = ranking_engine.rank_subsections(
+            analysis_results['subsections'], persona, job_to_be_done, query_context=query_context, budget=budget
+        )[:shard.get('top_k_subsections', JSONFormatter.MAX_SUBSECTIONS)]
+        self.text_refiner.refine(subsections, query_context, budget)
+        
+        return {
+            'shard_index': shard['shard_index'],
+            'documents': [
+                {key: d[key] for key in ('filename', 'total_pages', 'error') if key in d} for d in documents
+            ],
+            'sections': sections,
+            'subsections': subsections,
+            'stats': {
+                'documents': len(documents),
+                'sections_extracted': sum(len(d['sections']) for d in documents),
+                'sections_relevant': len(analysis_results['sections']),
+                'subsections_relevant': len(analysis_results['subsections']),
+                'seconds': round(time.time() - shard_start, 3)
+            },
+            'degradations': budget.degradations if budget is not None else []
+        }
+    
+    def calibrate(self, input_dir: str, output_dir: str, profile_path: str) -> Dict[str, Any]:
+        """
+        Benchmark core splits on the real pipeline and save the fastest.
+        
+        Each candidate (parse workers, encoder threads) split runs the full
+        pipeline on input_dir after one warm-up run; the profile is picked
+        up by later runs via ResourceManager.from_environment.
+        
+        Args:
+            input_dir: Representative input (directory or archive with config.json)
+            output_dir: Scratch directory for the benchmark outputs
+            profile_path: Where to write the calibration profile
+            
+        Returns:
+            Calibration profile
+        """
+        scratch_dir = os.path.join(output_dir, 'calibration')
+        candidates = self.resources.candidate_splits()
+        logger.info(f"Calibrating {len(candidates)} core splits on {self.resources.cpus} CPUs...")
+        
+        # Warm-up run so model and page caches do not favour later candidates
+        self.process_documents(input_dir, scratch_dir)
+        
+        results = []
+        for parse_workers, intra_op_threads in candidates:
+            self.resources.parse_workers = parse_workers
+            self.resources.intra_op_threads = intra_op_threads
+            self.embedding_engine.set_threads(intra_op_threads)
+            
+            run_start = time.time()
+            self.process_documents(input_dir, scratch_dir)
+            seconds = time.time() - run_start
+            
+            results.append({
+                'parse_workers': parse_workers,
+                'intra_op_threads': intra_op_threads,
+                'seconds': round(seconds, 3)
+            })
+            logger.info(f"Split workers={parse_workers} threads={intra_op_threads}: {seconds:.2f}s")
+        
+        best = min(results, key=lambda r: r['seconds'])
+        profile = {
+            'cpus': self.resources.cpus,
+            'results': results,
+            'best': {
+                'parse_workers': best['parse_workers'],
+                'intra_op_threads': best['intra_op_threads'],
+                'inter_op_threads': self.resources.inter_op_threads
+            }
+        }
+        
+        self.json_formatter.write_output(profile, profile_path)
+        logger.info(f"Best split {profile['best']} saved to {profile_path}")
+        
+        return profile
+    
+    def _read_task(self, config: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Read and validate persona and job from the configuration.
+        
+        Args:
+            config: Parsed config.json
+            
+        Returns:
+            Tuple of (persona, job_to_be_done)
+        """
+        persona = config.get('persona', '')
+        job_to_be_done = config.get('job_to_be_done', '')
+        
+        if not persona or not job_to_be_done:
+            raise ValueError("Both 'persona' and 'job_to_be_done' must be specified in config.json")
+        
+        logger.info(f"Processing for persona: {persona}")
+        logger.info(f"Job to be done: {job_to_be_done}")
+        
+        return persona, job_to_be_done
+    
+    def _query_context(self, persona: str, job_to_be_done: str, config: Dict[str, Any]) -> 'QueryContext':
+        """
+        Encode the query variants of a request once for all scorers.
+        
+        Args:
+            persona: Persona description
+            job_to_be_done: Job description
+            config: Parsed config.json (for 'query_fusion')
+            
+        Returns:
+            QueryContext instance
+        """
+        from utils.query_context import QueryContext
+        
+        return QueryContext(self.embedding_engine, persona, job_to_be_done, fusion=config.get('query_fusion'))
+    
+    def _extract_documents(self, ingestor: DocumentIngestor, pdf_files: List, budget: Optional[TimeBudget] = None) -> List[Dict[str, Any]]:
+        """
+        Extract sections from all PDFs, in parse worker processes when configured.
+        
+        Args:
+            ingestor: Document ingestor
+            pdf_files: Entries from ingestor.list_documents()
+            budget: Optional time budget
+            
+        Returns:
+            Document dictionaries in input order
+        """
+        if self.extraction_limits.enabled:
+            return self._extract_isolated(ingestor.iter_documents(pdf_files), len(pdf_files), budget)
+        
+        workers = self.resources.parse_workers
+        if workers <= 1 or len(pdf_files) <= 1:
+            return [
+                self._extract_document(pdf, budget, len(pdf_files) - index)
+                for index, pdf in enumerate(ingestor.iter_documents(pdf_files))
+            ]
+        
+        documents = [None] * len(pdf_files)
+        pending = {}
+        
+        def collect(done):
+            for future in done:
+                index, pdf = pending.pop(future)
+                sections, stats = future.result()
+                documents[index] = self._build_document(pdf, sections, stats, budget)
+        
+        # Spawned workers avoid forking a process that already runs torch threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            for index, pdf in enumerate(ingestor.iter_documents(pdf_files)):
+                logger.info(f"Processing {pdf['filename']}...")
+                
+                # Each worker slot gets an equal share of the remaining extraction time
+                rounds_left = math.ceil((len(pdf_files) - index) / workers)
+                future = pool.submit(
+                    extract_sections_worker, pdf['filename'], pdf['data'],
+                    self._extraction_deadline(budget, rounds_left), self.pdf_processor.cache_dir
+                )
+                pending[future] = (index, {'filename': pdf['filename'], 'path': pdf['path']})
+                
+                # Bound in-flight documents so prefetched bytes do not pile up
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            
+            collect(list(pending))
+        
+        return documents
+    
+    def _extract_isolated(self, pdfs, count: int, budget: Optional[TimeBudget] = None) -> List[Dict[str, Any]]:
+        """
+        Extract documents in supervised workers that enforce the extraction limits.
+        
+        A document that exceeds a limit or crashes its worker is recorded as
+        failed; its worker is replaced and the rest of the batch continues.
+        
+        Args:
+            pdfs: Iterable of ingested PDFs with 'filename', 'path' and 'data'
+            count: Number of PDFs
+            budget: Optional time budget
+            
+        Returns:
+            Document dictionaries in input order
+        """
+        workers = max(1, min(self.resources.parse_workers, count))
+        documents = [None] * count
+        
+        def jobs():
+            for index, pdf in enumerate(pdfs):
+                logger.info(f"Processing {pdf['filename']}...")
+                # Each worker slot gets an equal share of the remaining extraction time
+                rounds_left = math.ceil((count - index) / workers)
+                yield {
+                    'index': index,
+                    'filename': pdf['filename'],
+                    'path': pdf['path'],
+                    'data': pdf['data'],
+                    'deadline': self._extraction_deadline(budget, rounds_left)
+                }
+        
+        with IsolatedExtractor(workers, self.extraction_limits, self.pdf_processor.cache_dir) as extractor:
+            for job, sections, stats in extractor.map(jobs()):
+                documents[job['index']] = self._build_document(job, sections, stats, budget)
+        
+        return documents
+    
+    def _extraction_deadline(self, budget: Optional[TimeBudget], documents_left: int) -> Optional[float]:
+        """Deadline for one document: an equal share of the remaining extraction time."""
+        if budget is None:
+            return None
+        return time.monotonic() + max(0.0, budget.stage_remaining('extraction')) / max(1, documents_left)
+    
+    def _extract_document(self, pdf: Dict[str, Any], budget: Optional[TimeBudget] = None,
+                          documents_left: int = 1) -> Dict[str, Any]:
+        """
+        Extract sections from an ingested PDF.
+        
+        Under a budget, each document gets an equal share of the remaining
+        extraction time; its first page is always parsed so headers survive.
+        
+        Args:
+            pdf: Ingested PDF with 'filename', 'path' and 'data'
+            budget: Optional time budget
+            documents_left: Documents still to extract, including this one
+            
+        Returns:
+            Document dictionary
+        """
+        logger.info(f"Processing {pdf['filename']}...")
+        
+        stats = {}
+        sections = self.pdf_processor.extract_sections(
+            pdf['filename'], stream=pdf['data'],
+            deadline=self._extraction_deadline(budget, documents_left), stats=stats
+        )
+        
+        return self._build_document(pdf, sections, stats, budget)
+    
+    def _build_document(self, pdf: Dict[str, Any], sections: List[Dict], stats: Dict[str, int],
+                        budget: Optional[TimeBudget] = None) -> Dict[str, Any]:
+        """
+        Assemble the document dictionary for extracted sections.
+        
+        Args:
+            pdf: Ingested PDF with 'filename' and 'path'
+            sections: Extracted sections
+            stats: Page statistics from the extraction
+            budget: Optional time budget (records skipped pages)
+            
+        Returns:
+            Document dictionary
+        """
+        if budget is not None and stats.get('pages_parsed', 0) < stats.get('pages_total', 0):
+            budget.degrade('extraction', 'pages_skipped', document=pdf['filename'],
+                           pages_parsed=stats['pages_parsed'], pages_total=stats['pages_total'])
+        
+        document = {
+            'filename': pdf['filename'],
+            'path': pdf['path'],
+            'sections': sections,
+            'total_pages': len(set(s['page_number'] for s in sections))
+        }
+        
+        if stats.get('error'):
+            document['error'] = stats['error']
+            self._emit('document_failed', filename=document['filename'], **stats['error'])
+            return document
+        
+        self._emit('document_parsed', filename=document['filename'],
+                   sections=len(sections), pages=document['total_pages'])
+        return document
+    
+    def _rank_and_save(self, documents: List[Dict], sections: List[Dict], subsections: List[Dict],
+                       query_context: 'QueryContext', output_dir: str, start_time: float,
+                       reuse_scores: bool = False, budget: Optional[TimeBudget] = None):
+        """
+        Rank analyzed sections/subsections and write analysis_result.json.
+        
+        Args:
+            documents: Processed documents
+            sections: Analyzed sections
+            subsections: Analyzed subsections
+            query_context: Precomputed query embeddings of the request
+            output_dir: Directory to save results
+            start_time: Start of the run (for processing time)
+            reuse_scores: Keep scores computed by earlier rankings
+            budget: Optional time budget (its summary is recorded in the metadata)
+            
+        Returns:
+            Tuple of (ranked sections, ranked subsections, output path, processing time)
+        """
+        # Rank sections and subsections
+        logger.info("Ranking sections and subsections...")
+        persona = query_context.persona
+        job_to_be_done = query_context.job_to_be_done
+        
+        ranked_sections = self.ranking_engine.rank_sections(
+            sections, persona, job_to_be_done, reuse_scores=reuse_scores,
+            query_context=query_context, budget=budget
+        )
+        
+        ranked_subsections = self.ranking_engine.rank_subsections(
+            subsections, persona, job_to_be_done, reuse_scores=reuse_scores,
+            query_context=query_context, budget=budget
+        )
+        
+        # Refine the text of the subsections that will be emitted
+        self.text_refiner.refine(ranked_subsections[:JSONFormatter.MAX_SUBSECTIONS], query_context, budget)
+        
+        # Format output
+        processing_time = time.time() - start_time
+        output_data = self.json_formatter.format_output(
+            documents=documents,
+            persona=persona,
+            job_to_be_done=job_to_be_done,
+            sections=ranked_sections,
+            subsections=ranked_subsections,
+            processing_time=processing_time,
+            time_budget=budget.summary() if budget is not None else None
+        )
+        
+        self._emit('final_rankings', extracted_sections=output_data['extracted_sections'],
+                   subsection_analysis=output_data['subsection_analysis'])
+        
+        # Save results (temp file + rename, so a crash never leaves a truncated file)
+        output_path = os.path.join(output_dir, 'analysis_result.json')
+        self.json_formatter.write_output(output_data, output_path)
+        
+        self._emit('run_completed', output_path=output_path,
+                   processing_time_seconds=round(processing_time, 2))
+        logger.info(f"Analysis complete! Results saved to {output_path}")
+        logger.info(f"Processing time: {processing_time:.2f} seconds")
+        
+        return ranked_sections, ranked_subsections, output_path, processing_time
 
 def main():
     """Main entry point."""
+    from utils.distributed import ShardCoordinator, serve_worker, launch_local_workers, stop_local_workers
+    
+    parser = argparse.ArgumentParser(description="Persona-Driven Document Intelligence System")
+    parser.add_argument('--watch', action='store_true', default=os.getenv('WATCH_MODE', '') == '1',
+                        help="Keep running and process new PDFs in INPUT_DIR incrementally")
+    parser.add_argument('--events', action='store_true', default=os.getenv('STREAM_EVENTS', '') == '1',
+                        help="Stream NDJSON progress events to OUTPUT_DIR/analysis_events.ndjson")
+    parser.add_argument('--time-budget', type=float, default=float(os.getenv('TIME_BUDGET_SECONDS', '0')) or None,
+                        help="Target wall-clock seconds per run; degrades work to finish in time")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="Benchmark core splits on INPUT_DIR and save the fastest to the resource profile")
+    parser.add_argument('--serve-worker', action='store_true',
+                        help="Run as a shard worker serving a coordinator over HTTP")
+    parser.add_argument('--host', default=os.getenv('WORKER_HOST', '127.0.0.1'),
+                        help="Interface the shard worker binds to (requests are not authenticated; "
+                             "bind a public interface only on a trusted network)")
+    parser.add_argument('--port', type=int, default=int(os.getenv('WORKER_PORT', '8765')),
+                        help="Port the shard worker listens on")
+    parser.add_argument('--workers', default=os.getenv('WORKER_URLS', ''),
+                        help="Comma-separated worker URLs; runs this process as the coordinator")
+    parser.add_argument('--local-workers', type=int, default=int(os.getenv('LOCAL_WORKERS', '0')),
+                        help="Start this many workers on localhost and coordinate them")
+    parser.add_argument('--shard-size', type=int, default=int(os.getenv('SHARD_SIZE', '0')) or None,
+                        help="Documents per shard (default: even split across workers)")
+    parser.add_argument('--profile', choices=PROFILE_MODES, default=os.getenv('PROFILE') or None,
+                        help="Profile the run's CPU time (cprofile, or low-overhead sampling) or its "
+                             "allocations (memory); reports are written next to analysis_result.json")
+    parser.add_argument('--scoring-spec', default=os.getenv('SCORING_SPEC') or None,
+                        help="JSON (or YAML) file with the feature weights of the relevance and ranking scores")
+    parser.add_argument('--page-cache', default=os.getenv('PAGE_CACHE_DIR') or None,
+                        help="Directory caching parsed page lines, so re-runs only re-segment unchanged PDFs")
+    parser.add_argument('--max-pages', type=int, default=int(os.getenv('MAX_PAGES_PER_DOCUMENT', '0')) or None,
+                        help="Fail documents with more pages than this instead of parsing them")
+    parser.add_argument('--max-document-memory', type=float, default=float(os.getenv('MAX_DOCUMENT_RSS_MB', '0')) or None,
+                        help="Memory (MB) one document may use in its extraction worker before it is killed")
+    parser.add_argument('--page-timeout', type=float, default=float(os.getenv('PAGE_TIMEOUT_SECONDS', '0')) or None,
+                        help="Seconds a single page may take before its extraction worker is killed")
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('WATCH_POLL_INTERVAL', '1.0')),
+                        help="Seconds between directory polls in watch mode")
+    parser.add_argument('--debounce', type=float, default=float(os.getenv('WATCH_DEBOUNCE', '2.0')),
+                        help="Quiet period in seconds before a batch of new files is processed")
+    args = parser.parse_args()
+    
     input_dir = os.getenv('INPUT_DIR', './input')
     output_dir = os.getenv('OUTPUT_DIR', './output')
+    storage_dtype = os.getenv('EMBEDDING_STORAGE', 'float32')
+    profile_path = os.getenv('RESOURCE_PROFILE', os.path.join(output_dir, 'resource_profile.json'))
+    
+    worker_urls = [url for url in args.workers.split(',') if url]
+    if worker_urls or args.local_workers:
+        unsupported = [flag for flag, value in (('--events', args.events), ('--watch', args.watch),
+                                                ('--calibrate', args.calibrate)) if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be combined with --workers/--local-workers")
+        
+        # Coordinator: no model needed in this process
+        # The scoring spec and time budget are sent with each shard; local
+        # workers also get this process's extraction settings
+        worker_command = [sys.executable, os.path.abspath(__file__)]
+        for flag, value in (('--page-cache', args.page_cache), ('--max-pages', args.max_pages),
+                            ('--max-document-memory', args.max_document_memory),
+                            ('--page-timeout', args.page_timeout)):
+            if value is not None:
+                worker_command += [flag, str(value)]
+        
+        processes = []
+        try:
+            if args.local_workers:
+                processes, local_urls = launch_local_workers(args.local_workers, worker_command)
+                worker_urls += local_urls
+            coordinator = ShardCoordinator(
+                worker_urls, shard_size=args.shard_size, time_budget=args.time_budget,
+                scoring_spec=ScoringSpec.from_file(args.scoring_spec) if args.scoring_spec else None
+            )
+            with maybe_profile(args.profile, output_dir):
+                coordinator.process_documents(input_dir, output_dir)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        finally:
+            stop_local_workers(processes)
+        return
+    
+    if args.watch and not os.path.isdir(input_dir):
+        print(f"Error: Input directory '{input_dir}' not found!")
+        sys.exit(1)
     
-    if not os.path.exists(input_dir):
+    if not args.serve_worker and not DocumentIngestor.is_supported_source(input_dir):
         print(f"Error: Input directory '{input_dir}' not found!")
         sys.exit(1)
     
     try:
         # Initialize and run system
-        system = PersonaDocumentIntelligence()
-        system.process_documents(input_dir, output_dir)
+        system = PersonaDocumentIntelligence(
+            storage_dtype=storage_dtype, stream_events=args.events, time_budget=args.time_budget,
+            resources=ResourceManager.from_environment(None if args.calibrate else profile_path),
+            scoring_spec=ScoringSpec.from_file(args.scoring_spec) if args.scoring_spec else None,
+            page_cache_dir=args.page_cache,
+            extraction_limits=ExtractionLimits(args.max_pages, args.max_document_memory, args.page_timeout)
+        )
+        if args.serve_worker:
+            serve_worker(system, args.host, args.port)
+        elif args.calibrate:
+            system.calibrate(input_dir, output_dir, profile_path)
+        elif args.watch:
+            system.watch_documents(input_dir, output_dir, args.poll_interval, args.debounce)
+        else:
+            with maybe_profile(args.profile, output_dir):
+                system.process_documents(input_dir, output_dir)
         
     except Exception as e:
         print(f"Error: {str(e)}")
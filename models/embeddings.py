@@ -5,31 +5,65 @@ Embedding engine for semantic similarity computation.
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import logging
-from typing import List, Union
+from collections import OrderedDict
+from typing import List, Union, Optional
 import torch
+from models.quantization import QuantizedEmbeddings, SUPPORTED_DTYPES
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingEngine:
     """Handles text embeddings and similarity computations."""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', storage_dtype: str = 'float32',
+                 num_threads: int = 4, interop_threads: Optional[int] = None, model=None,
+                 cache_size: int = 8192):
         """
         Initialize embedding engine.
         
         Args:
             model_name: Name of the sentence transformer model
+            storage_dtype: Storage type of cached embeddings ('float32', 'float16' or 'int8')
+            num_threads: Torch intra-op threads
+            interop_threads: Torch inter-op threads (left to torch if omitted)
+            model: Preloaded model with a SentenceTransformer-compatible encode()
+                (e.g. a deterministic stub for regression runs); loaded if omitted
+            cache_size: Embeddings kept by encode_cached() (least recently used are evicted)
         """
+        if storage_dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding storage dtype: {storage_dtype}")
+        
         logger.info(f"Loading embedding model: {model_name}")
         
         # Ensure CPU-only execution
-        torch.set_num_threads(4)
+        self.set_threads(num_threads, interop_threads)
         device = 'cpu'
         
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model = model if model is not None else SentenceTransformer(model_name, device=device)
         self.model_name = model_name
+        self.storage_dtype = storage_dtype
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        
+        logger.info(f"Embedding model loaded successfully (storage: {storage_dtype})")
+    
+    def set_threads(self, num_threads: int, interop_threads: Optional[int] = None) -> None:
+        """
+        Set torch thread counts for CPU inference.
+        
+        Args:
+            num_threads: Intra-op threads
+            interop_threads: Inter-op threads (only settable before torch starts parallel work)
+        """
+        torch.set_num_threads(num_threads)
+        
+        if interop_threads is not None:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                logger.warning(f"Could not set inter-op threads: {e}")
         
-        logger.info("Embedding model loaded successfully")
+        self.num_threads = num_threads
     
     def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
         """
@@ -39,7 +73,7 @@ class EmbeddingEngine:
             texts: Single text or list of texts
             
         Returns:
-            Numpy array of embeddings
+            Float32 numpy array of embeddings
         """
         if isinstance(texts, str):
             texts = [texts]
@@ -53,7 +87,56 @@ class EmbeddingEngine:
             normalize_embeddings=True
         )
         
-        return embeddings
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def encode_cached(self, texts: List[str]) -> QuantizedEmbeddings:
+        """
+        Encode texts in the configured compact form, reusing embeddings of texts seen before.
+        
+        Only texts missing from the cache are encoded (in one batch), so short
+        texts that recur across runs (e.g. sentences in watch mode) are encoded once.
+        The cache holds the compact rows (int8 quantization is per vector, so
+        cached rows stack into the same result as quantizing the batch).
+        
+        Args:
+            texts: Non-empty list of texts
+            
+        Returns:
+            QuantizedEmbeddings in the engine's storage dtype
+        """
+        missing = list(dict.fromkeys(text for text in texts if text not in self._cache))
+        if missing:
+            stored = self.encode_compact(missing)
+            for index, text in enumerate(missing):
+                scale = stored.scales[index] if stored.scales is not None else None
+                self._cache[text] = (stored.data[index].copy(), scale)
+        
+        rows, scales = [], []
+        for text in texts:
+            self._cache.move_to_end(text)
+            row, scale = self._cache[text]
+            rows.append(row)
+            scales.append(scale)
+        
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        
+        return QuantizedEmbeddings(
+            np.stack(rows), self.storage_dtype,
+            np.array(scales, dtype=np.float32) if self.storage_dtype == 'int8' else None
+        )
+    
+    def encode_compact(self, texts: Union[str, List[str]]) -> QuantizedEmbeddings:
+        """
+        Encode texts and store them in the configured compact form.
+        
+        Args:
+            texts: Single text or list of texts
+            
+        Returns:
+            QuantizedEmbeddings in the engine's storage dtype
+        """
+        return QuantizedEmbeddings.from_float(self.encode(texts), self.storage_dtype)
     
     def compute_similarity(self, text1: str, text2: str) -> float:
         """
@@ -83,18 +166,39 @@ class EmbeddingEngine:
         Returns:
             List of similarity scores
         """
+        if not texts:
+            return []
+        
         all_texts = [query] + texts
         embeddings = self.encode(all_texts)
         
-        query_embedding = embeddings[0]
-        text_embeddings = embeddings[1:]
+        return (embeddings[1:] @ embeddings[0]).tolist()
+    
+    def score_texts(self, query_embedding: np.ndarray, texts: List[str], cached: bool = False) -> List[float]:
+        """
+        Compute similarities between a precomputed query embedding and texts.
+        
+        Texts are encoded in one batch. Freshly encoded embeddings are scored
+        in float32 and discarded, since quantizing them first would only lose
+        precision; the compact storage form is used when cached, where the
+        stored rows are what is reused.
+        
+        Args:
+            query_embedding: Normalized query embedding
+            texts: List of texts to compare against
+            cached: Reuse cached compact embeddings (see encode_cached)
+            
+        Returns:
+            List of similarity scores
+        """
+        if not texts:
+            return []
         
-        similarities = []
-        for text_embedding in text_embeddings:
-            similarity = np.dot(query_embedding, text_embedding)
-            similarities.append(float(similarity))
+        if cached:
+            return self.encode_cached(texts).scores(query_embedding).tolist()
         
-        return similarities
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        return (self.encode(texts) @ query).tolist()
     
     def create_context_embedding(self, persona: str, job_to_be_done: str) -> np.ndarray:
         """
@@ -0,0 +1,218 @@
+"""
+Compact embedding storage and quantized similarity scoring.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ('float32', 'float16', 'int8')
+
+# Compact rows are upcast to float32 this many at a time while scoring, so the
+# temporary copy stays small however large the corpus is
+SCORE_BLOCK_ROWS = 1024
+
+
+class QuantizedEmbeddings:
+    """Stores normalized embeddings as float32, float16 or per-vector scaled int8."""
+
+    def __init__(self, data: np.ndarray, dtype: str, scales: Optional[np.ndarray] = None):
+        """
+        Initialize quantized embedding storage.
+
+        Args:
+            data: Stored vectors (float32, float16 or int8 codes)
+            dtype: Storage type name ('float32', 'float16' or 'int8')
+            scales: Per-vector dequantization scales (int8 only)
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+        if dtype == 'int8' and scales is None:
+            raise ValueError("int8 embeddings require per-vector scales")
+
+        self.data = data
+        self.dtype = dtype
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, embeddings: np.ndarray, dtype: str = 'float16') -> 'QuantizedEmbeddings':
+        """
+        Quantize float embeddings into the requested storage type.
+
+        Args:
+            embeddings: 2D array of float embeddings (one row per text)
+            dtype: Target storage type
+
+        Returns:
+            QuantizedEmbeddings instance
+        """
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+
+        if dtype == 'float32':
+            return cls(embeddings, dtype)
+        if dtype == 'float16':
+            return cls(embeddings.astype(np.float16), dtype)
+        if dtype == 'int8':
+            codes, scales = quantize_int8(embeddings)
+            return cls(codes, dtype, scales)
+
+        raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Total storage size in bytes, including scales."""
+        size = self.data.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+    def dequantize(self) -> np.ndarray:
+        """
+        Reconstruct float32 embeddings.
+
+        Returns:
+            2D float32 array
+        """
+        if self.dtype == 'int8':
+            return self.data.astype(np.float32) * self.scales[:, None]
+        return self.data.astype(np.float32)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        Compute dot-product scores against a query on the stored form.
+
+        float16 rows are scored with float32 accumulation; int8 rows are
+        scored against an int8-quantized query and rescaled by both scales
+        afterwards. Compact rows are upcast in blocks of SCORE_BLOCK_ROWS.
+        int8 dot products are exact in float32 (at most dim * 127 * 127,
+        below 2**24), so blocks of int8 codes are scored as float32.
+
+        Args:
+            query: 1D query embedding
+
+        Returns:
+            1D float32 array of scores (one per stored vector)
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+
+        if self.dtype == 'float32':
+            return self.data @ query
+
+        if self.dtype == 'int8':
+            query_codes, query_scale = quantize_int8(query[None, :])
+            query = query_codes[0].astype(np.float32)
+
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block = self.data[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+
+        if self.dtype == 'int8':
+            scores *= self.scales * query_scale[0]
+        return scores
+
+
+def quantize_int8(embeddings: np.ndarray):
+    """
+    Symmetric scalar int8 quantization with one scale per vector.
+
+    Args:
+        embeddings: 2D float array
+
+    Returns:
+        Tuple of (int8 codes, float32 scales)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    max_abs = np.abs(embeddings).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def ranking_agreement(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """
+    Compare a candidate score vector with a float32 reference.
+
+    Args:
+        reference: Reference scores
+        candidate: Scores from the quantized representation
+        k: Cut-off for top-k recall
+
+    Returns:
+        Dictionary with recall@k, Spearman correlation and max absolute error
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    k = min(k, len(reference))
+
+    if k == 0:
+        return {'recall_at_k': 1.0, 'spearman': 1.0, 'max_abs_error': 0.0}
+
+    top_reference = set(np.argsort(-reference, kind='stable')[:k].tolist())
+    top_candidate = set(np.argsort(-candidate, kind='stable')[:k].tolist())
+    recall = len(top_reference & top_candidate) / k
+
+    if len(reference) > 1:
+        reference_ranks = np.argsort(np.argsort(-reference, kind='stable'))
+        candidate_ranks = np.argsort(np.argsort(-candidate, kind='stable'))
+        spearman = float(np.corrcoef(reference_ranks, candidate_ranks)[0, 1])
+    else:
+        spearman = 1.0
+
+    return {
+        'recall_at_k': float(recall),
+        'spearman': spearman,
+        'max_abs_error': float(np.max(np.abs(reference - candidate)))
+    }
+
+
+def quantization_report(embeddings: np.ndarray, queries: np.ndarray, k: int = 10,
+                        dtypes: List[str] = ('float16', 'int8')) -> Dict[str, Dict[str, float]]:
+    """
+    Measure storage savings and ranking agreement of compact storage types.
+
+    Each query is scored against the corpus in float32 and in every compact
+    form; per-query agreement metrics are averaged.
+
+    Args:
+        embeddings: 2D float32 corpus embeddings
+        queries: 2D float32 query embeddings
+        k: Cut-off for top-k recall
+        dtypes: Storage types to evaluate
+
+    Returns:
+        Report keyed by storage type
+    """
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    reference_bytes = embeddings.nbytes
+
+    report = {}
+    for dtype in dtypes:
+        stored = QuantizedEmbeddings.from_float(embeddings, dtype)
+        metrics = [
+            ranking_agreement(embeddings @ query, stored.scores(query), k)
+            for query in queries
+        ]
+
+        report[dtype] = {
+            'bytes': stored.nbytes,
+            'compression_ratio': round(reference_bytes / max(1, stored.nbytes), 2),
+            'recall_at_k': float(np.mean([m['recall_at_k'] for m in metrics])),
+            'spearman': float(np.mean([m['spearman'] for m in metrics])),
+            'max_abs_error': float(np.max([m['max_abs_error'] for m in metrics]))
+        }
+
+        logger.info(
+            f"{dtype}: {report[dtype]['compression_ratio']}x smaller, "
+            f"recall@{k}={report[dtype]['recall_at_k']:.3f}, "
+            f"spearman={report[dtype]['spearman']:.4f}"
+        )
+
+    return report
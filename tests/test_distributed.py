@@ -0,0 +1,181 @@
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+from utils.distributed import ShardCoordinator, serve_worker
+from utils.scoring_spec import ScoringSpec
+
+NON_DEFAULT_SPEC = {
+    'relevance': {'weights': {'similarity': 0.8, 'persona_boost': 0.5, 'job_boost': 0.0}},
+    'sections': {'weights': {'semantic': 0.3, 'tfidf': 0.6, 'position': 0.0, 'relevance': 0.3}},
+    'subsections': {'weights': {'semantic': 0.2, 'tfidf': 0.8}, 'max_score': None}
+}
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _write_input(directory, filenames=('a.pdf', 'b.pdf')):
+    (directory / 'config.json').write_text(json.dumps({'persona': 'Researcher', 'job_to_be_done': 'Review methods'}))
+    for filename in filenames:
+        (directory / filename).write_bytes(b'%PDF-1.4 ' + filename.encode())
+
+
+class RecordingSystem:
+    """Stands in for PersonaDocumentIntelligence in serve_worker and records shard requests."""
+
+    def __init__(self, degradations=(), failures=0, delay=0.0):
+        self.requests = []
+        self.degradations = list(degradations)
+        self.failures = failures
+        self.delay = delay
+
+    def process_shard(self, shard):
+        self.requests.append(shard)
+        time.sleep(self.delay)
+        if len(self.requests) <= self.failures:
+            raise RuntimeError("shard failed")
+        return {
+            'shard_index': shard['shard_index'],
+            'documents': [{'filename': d['filename'], 'total_pages': 1} for d in shard['documents']],
+            'sections': [], 'subsections': [], 'stats': {'documents': len(shard['documents'])},
+            'degradations': self.degradations
+        }
+
+
+def _start_worker(system):
+    port = _free_port()
+    threading.Thread(target=serve_worker, args=(system, '127.0.0.1', port), daemon=True).start()
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return url
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError("worker did not start")
+
+
+def test_shard_requests_carry_scoring_spec_and_time_budget(tmp_path):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    _write_input(input_dir)
+    degradation = {'stage': 'analysis', 'action': 'truncated', 'elapsed_seconds': 1.0}
+    system = RecordingSystem([degradation])
+    url = _start_worker(system)
+
+    coordinator = ShardCoordinator([url], shard_size=1, scoring_spec=ScoringSpec(NON_DEFAULT_SPEC), time_budget=30)
+    output_path = coordinator.process_documents(str(input_dir), str(output_dir))
+
+    assert len(system.requests) == 2
+    for request in system.requests:
+        assert request['scoring_spec'] == ScoringSpec(NON_DEFAULT_SPEC).as_dict()
+        assert request['time_budget']['seconds'] == 30
+        assert 0 <= request['time_budget']['elapsed'] < 30
+
+    with open(output_path) as f:
+        time_budget = json.load(f)['metadata']['time_budget']
+    assert time_budget['degraded']
+    assert sorted(d['shard'] for d in time_budget['degradations']) == [0, 1]
+
+
+def test_retried_shard_gets_the_time_budget_left_at_retry(tmp_path):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    _write_input(input_dir, filenames=('a.pdf',))
+    system = RecordingSystem(failures=1, delay=0.2)
+
+    ShardCoordinator([_start_worker(system)], time_budget=30).process_documents(str(input_dir), str(output_dir))
+
+    first, retry = (request['time_budget']['elapsed'] for request in system.requests)
+    assert retry - first >= 0.2
+
+
+def test_documents_arrive_as_raw_bytes(tmp_path):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    _write_input(input_dir, filenames=('a.pdf',))
+    large = b'%PDF-1.4 ' + bytes(range(256)) * 8192
+    (input_dir / 'b.pdf').write_bytes(large)
+    system = RecordingSystem()
+
+    ShardCoordinator([_start_worker(system)]).process_documents(str(input_dir), str(output_dir))
+
+    documents = system.requests[0]['documents']
+    assert [(d['filename'], d['data']) for d in documents] == [('a.pdf', b'%PDF-1.4 a.pdf'), ('b.pdf', large)]
+
+
+def test_unreachable_worker_is_removed_from_the_pool(tmp_path, caplog):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    _write_input(input_dir, filenames=('a.pdf', 'b.pdf', 'c.pdf', 'd.pdf'))
+    system = RecordingSystem()
+    dead_url = f"http://127.0.0.1:{_free_port()}"
+
+    coordinator = ShardCoordinator([dead_url, _start_worker(system)], shard_size=1)
+    coordinator.process_documents(str(input_dir), str(output_dir))
+
+    assert sorted(r['shard_index'] for r in system.requests) == [0, 1, 2, 3]
+    # Dropped after its first failure instead of being handed more shards
+    assert sum('removing the worker' in r.getMessage() for r in caplog.records) == 1
+
+
+def test_run_fails_when_no_worker_is_reachable(tmp_path):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    output_dir.mkdir()
+    _write_input(input_dir)
+
+    coordinator = ShardCoordinator([f"http://127.0.0.1:{_free_port()}"], shard_size=1)
+    with pytest.raises(RuntimeError):
+        coordinator.process_documents(str(input_dir), str(output_dir))
+
+
+def test_distributed_matches_single_node_with_non_default_spec(tmp_path):
+    pytest.importorskip('fitz')
+    pytest.importorskip('sentence_transformers')
+    from benchmarks.golden_harness import HashingEncoder, build_corpus
+    from main import PersonaDocumentIntelligence
+    from models.embeddings import EmbeddingEngine
+    from utils.resources import ResourceManager
+
+    input_dir, single_dir, distributed_dir = tmp_path / 'in', tmp_path / 'single', tmp_path / 'distributed'
+    for directory in (input_dir, single_dir, distributed_dir):
+        directory.mkdir()
+    build_corpus(str(input_dir))
+    (input_dir / 'config.json').write_text(json.dumps({
+        'persona': 'Pharmaceutical researcher',
+        'job_to_be_done': 'Compare binding affinity methods across studies'
+    }))
+
+    def make_system(scoring_spec=None):
+        resources = ResourceManager(parse_workers=1)
+        engine = EmbeddingEngine(model=HashingEncoder(), num_threads=resources.intra_op_threads)
+        return PersonaDocumentIntelligence(resources=resources, embedding_engine=engine, scoring_spec=scoring_spec)
+
+    make_system(ScoringSpec(NON_DEFAULT_SPEC)).process_documents(str(input_dir), str(single_dir))
+
+    # The worker runs with default weights; the coordinator's spec must win
+    url = _start_worker(make_system())
+    ShardCoordinator([url, url], shard_size=2, scoring_spec=ScoringSpec(NON_DEFAULT_SPEC)).process_documents(
+        str(input_dir), str(distributed_dir)
+    )
+
+    with open(single_dir / 'analysis_result.json') as f:
+        single = json.load(f)
+    with open(distributed_dir / 'analysis_result.json') as f:
+        distributed = json.load(f)
+
+    assert single['extracted_sections']
+    assert distributed['extracted_sections'] == single['extracted_sections']
+    assert distributed['subsection_analysis'] == single['subsection_analysis']
@@ -0,0 +1,55 @@
+import pytest
+
+fitz = pytest.importorskip('fitz')
+
+from utils.guardrails import ExtractionLimits, IsolatedExtractor
+
+
+def _pdf_bytes(pages=20):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f'Section {number + 1}', fontsize=18)
+        for line in range(30):
+            page.insert_text((72, 110 + line * 20), f'Body text line {line} of page {number + 1} ' * 2, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_identical_documents_on_one_worker_have_identical_outcomes():
+    data = _pdf_bytes()
+    jobs = [{'filename': f'd{i}.pdf', 'data': data, 'deadline': None} for i in range(1, 6)]
+    limits = ExtractionLimits(max_rss_mb=256)
+
+    with IsolatedExtractor(workers=1, limits=limits) as extractor:
+        started = []
+        start_worker = extractor._start_worker
+
+        def counting_start():
+            slot = start_worker()
+            started.append(slot['process'].pid)
+            return slot
+
+        extractor._start_worker = counting_start
+        results = list(extractor.map(jobs))
+
+    assert [job['filename'] for job, _, _ in results] == [job['filename'] for job in jobs]
+    assert all('error' not in stats for _, _, stats in results)
+    contents = [[{k: v for k, v in section.items() if k != 'document'} for section in sections]
+                for _, sections, _ in results]
+    assert contents[0]
+    assert all(content == contents[0] for content in contents)
+    # Every document starts on a fresh worker, so earlier documents cannot count against it
+    assert len(set(started)) == len(jobs) + 1
+
+
+def test_too_many_pages_fails_every_identical_document():
+    data = _pdf_bytes(pages=5)
+    jobs = [{'filename': f'd{i}.pdf', 'data': data, 'deadline': None} for i in range(3)]
+
+    with IsolatedExtractor(workers=2, limits=ExtractionLimits(max_pages=2)) as extractor:
+        results = list(extractor.map(jobs))
+
+    assert len(results) == len(jobs)
+    assert all(stats['error']['reason'] == 'too_many_pages' for _, _, stats in results)
@@ -0,0 +1,109 @@
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+import pytest
+
+from utils.ingestion import DocumentIngestor
+
+
+def _members(count):
+    # Distinct incompressible-ish payloads large enough to span many gzip blocks
+    return {f'doc{i:02d}.pdf': b'%PDF-1.4\n' + os.urandom(64 * 1024) + bytes([i]) * 4096
+            for i in range(count)}
+
+
+def _write_tar(path, members, mode):
+    with tarfile.open(path, mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+@pytest.mark.parametrize('suffix,mode', [('.tar.gz', 'w:gz'), ('.tar.bz2', 'w:bz2'), ('.tar', 'w')])
+def test_prefetch_compressed_tar_with_concurrent_reads(tmp_path, suffix, mode):
+    members = _members(12)
+    path = str(tmp_path / f'input{suffix}')
+    _write_tar(path, members, mode)
+
+    ingestor = DocumentIngestor(path, prefetch=4)
+    documents = list(ingestor.iter_documents())
+
+    assert [d['filename'] for d in documents] == sorted(members)
+    for document in documents:
+        assert document['data'] == members[document['filename']]
+
+
+def test_prefetch_zip_with_concurrent_reads(tmp_path):
+    members = _members(12)
+    path = str(tmp_path / 'input.zip')
+    _write_zip(path, members)
+
+    ingestor = DocumentIngestor(path, prefetch=4)
+    documents = list(ingestor.iter_documents())
+
+    assert [d['filename'] for d in documents] == sorted(members)
+    for document in documents:
+        assert document['data'] == members[document['filename']]
+
+
+def test_directory_source_reads_config_and_documents(tmp_path):
+    (tmp_path / 'config.json').write_text('{"persona": {"role": "Analyst"}}')
+    (tmp_path / 'b.pdf').write_bytes(b'%PDF-b')
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-a')
+    (tmp_path / 'notes.txt').write_text('ignored')
+
+    ingestor = DocumentIngestor(str(tmp_path), prefetch=2)
+
+    assert ingestor.load_config() == {'persona': {'role': 'Analyst'}}
+    assert [(d['filename'], d['data']) for d in ingestor.iter_documents()] == [
+        ('a.pdf', b'%PDF-a'), ('b.pdf', b'%PDF-b')
+    ]
+
+
+def test_prefetch_bounds_documents_read_ahead_of_the_consumer(tmp_path):
+    ingestor = DocumentIngestor(str(tmp_path), prefetch=3)
+    lock = threading.Lock()
+    started = []
+    consumed = []
+    ahead = []
+
+    def reader(index):
+        def read():
+            with lock:
+                started.append(index)
+                ahead.append(len(started) - len(consumed))
+            return b'%PDF-1.4 ' + bytes([index])
+        return read
+
+    documents = [(f'd{i:02d}.pdf', f'd{i:02d}.pdf', reader(i)) for i in range(20)]
+    for document in ingestor.iter_documents(documents):
+        time.sleep(0.01)
+        with lock:
+            consumed.append(document['filename'])
+
+    assert consumed == [filename for filename, _, _ in documents]
+    # Reads started but not yet taken by the consumer never exceed prefetch
+    # (the document being consumed has already been counted as taken)
+    assert max(ahead) <= 3 + 1
+
+
+def test_consumer_stopping_early_ends_the_producer(tmp_path):
+    ingestor = DocumentIngestor(str(tmp_path), prefetch=2)
+    documents = [(f'd{i}.pdf', f'd{i}.pdf', (lambda: b'%PDF')) for i in range(50)]
+
+    iterator = ingestor.iter_documents(documents)
+    next(iterator)
+    iterator.close()
+
+    assert not any(t.name == 'pdf-prefetch' for t in threading.enumerate())
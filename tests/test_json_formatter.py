@@ -0,0 +1,71 @@
+import json
+import os
+import stat
+
+from utils import json_formatter
+from utils.json_formatter import NDJSONEventWriter, write_atomic
+
+
+def test_write_atomic_syncs_directory_after_rename(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+
+    def recording_fsync(fd):
+        synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        real_fsync(fd)
+
+    monkeypatch.setattr(json_formatter.os, 'fsync', recording_fsync)
+    path = tmp_path / 'analysis_result.json'
+    path.write_text('{"old": true}')
+    path.chmod(0o640)
+
+    write_atomic({'new': True}, str(path))
+
+    assert json.loads(path.read_text()) == {'new': True}
+    # File contents first, then the directory holding the renamed entry
+    assert synced == [False, True]
+    assert [p.name for p in tmp_path.iterdir()] == ['analysis_result.json']
+    # The replacement keeps the target's mode rather than mkstemp's 0600
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_write_atomic_new_file_gets_umask_mode(tmp_path):
+    path = tmp_path / 'analysis_result.json'
+    umask = os.umask(0o022)
+    os.umask(umask)
+
+    write_atomic({'new': True}, str(path))
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+
+def test_each_event_is_one_complete_write(tmp_path, monkeypatch):
+    writes = []
+    real_write = os.write
+
+    def recording_write(fd, data):
+        writes.append(bytes(data))
+        return real_write(fd, data)
+
+    monkeypatch.setattr(json_formatter.os, 'write', recording_write)
+    path = tmp_path / 'events.ndjson'
+
+    with NDJSONEventWriter(str(path)) as events:
+        events.emit('run_started', documents=['a.pdf'])
+        events.emit('final_rankings', text='x' * (1024 * 1024))
+
+    assert len(writes) == 2
+    assert all(w.endswith(b'\n') and w.count(b'\n') == 1 for w in writes)
+    assert [json.loads(line)['event'] for line in path.read_text().splitlines()] == ['run_started', 'final_rankings']
+
+
+def test_reopening_terminates_a_truncated_record(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    path.write_bytes(b'{"event":"run_started"}\n{"event":"fin')
+
+    with NDJSONEventWriter(str(path)) as events:
+        events.emit('run_started')
+
+    lines = path.read_text().splitlines()
+    assert lines[1] == '{"event":"fin'
+    assert json.loads(lines[2])['event'] == 'run_started'
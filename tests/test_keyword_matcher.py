@@ -0,0 +1,46 @@
+import pytest
+
+from utils.keyword_matcher import KeywordMatcher
+
+
+def test_counts_each_keyword_once_per_text():
+    matcher = KeywordMatcher({'persona': {'study': 0.1}}, {'persona': 1.0})
+
+    boosts = matcher.compute_boosts(['study studies STUDY', 'nothing here'])
+
+    assert boosts[0]['persona'] == pytest.approx(0.1)
+    assert boosts[1]['persona'] == 0.0
+
+
+@pytest.mark.parametrize('text', [
+    'ſtudy of the market',    # long s matches 's' case-insensitively
+    'Key İNSIGHTS',            # dotted capital I lowercases to 'i̇'
+    '\u212aEYWORDS'           # Kelvin sign matches 'k'
+])
+def test_non_ascii_case_folding_matches_keyword(text):
+    matcher = KeywordMatcher(
+        {'persona': {'study': 0.1, 'insights': 0.1}, 'job': {'keywords': 0.05}},
+        {'persona': 0.3, 'job': 0.2}
+    )
+
+    boosts = matcher.compute_boosts([text])
+
+    assert boosts[0]['persona'] + boosts[0]['job'] > 0.0
+
+
+def test_keywords_sharing_a_word_are_all_credited():
+    matcher = KeywordMatcher.for_context('Financial analyst', 'Analyze revenue trends across the quarters')
+
+    boosts = matcher.compute_boosts(['Revenue trends in the DATABASE'])
+
+    # 'trends' (job) and 'trend' (persona) share a word, as do 'data' and 'database'
+    assert boosts[0]['persona'] == pytest.approx(0.2)
+    assert boosts[0]['job'] == pytest.approx(0.1)
+
+
+def test_overlapping_keywords_in_one_group_both_count():
+    matcher = KeywordMatcher({'job': {'data': 0.05, 'database': 0.1}}, {'job': 1.0})
+
+    boosts = matcher.compute_boosts(['DATABASE'])
+
+    assert boosts[0]['job'] == pytest.approx(0.15)
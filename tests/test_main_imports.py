@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('torch', 'sentence_transformers', 'sklearn', 'models.embeddings')
+
+
+def test_spawned_workers_reimport_main_without_model_stack():
+    pytest.importorskip('fitz')
+    # Spawned workers run main.py as __mp_main__ before unpickling their task
+    script = (
+        "import runpy, sys\n"
+        "before = set(sys.modules)\n"
+        f"runpy.run_path({os.path.join(ROOT, 'main.py')!r}, run_name='__mp_main__')\n"
+        f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in set(sys.modules) - before))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'loaded:'
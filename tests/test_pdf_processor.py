@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+fitz = pytest.importorskip('fitz')
+
+from utils.pdf_processor import PDFProcessor
+
+
+def _pdf_bytes():
+    doc = fitz.open()
+    for number, title in enumerate(['Introduction', 'Methodology', 'Results']):
+        page = doc.new_page()
+        page.insert_text((72, 72), title, fontsize=18)
+        for line in range(12):
+            page.insert_text((72, 110 + line * 20), f'Findings of the study, line {line} on page {number + 1}.',
+                             fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _cache_path(cache_dir, data):
+    return os.path.join(cache_dir, hashlib.sha256(data).hexdigest() + '.npz')
+
+
+def _assert_lines_equal(actual, expected):
+    assert actual['text'] == expected['text']
+    for column in ('page', 'font_size', 'bold', 'bbox'):
+        np.testing.assert_array_equal(actual[column], expected[column])
+    assert actual['pages_total'] == expected['pages_total']
+    assert actual['pages_parsed'] == expected['pages_parsed']
+
+
+def test_saved_lines_load_back_unchanged(tmp_path):
+    processor = PDFProcessor()
+    lines = processor.extract_lines('paper.pdf', stream=_pdf_bytes())
+    path = str(tmp_path / 'lines.npz')
+
+    processor.save_lines(lines, path, 'paper.pdf')
+    loaded = processor.load_lines(path)
+
+    _assert_lines_equal(loaded, lines)
+    assert loaded['source'] == 'paper.pdf'
+
+
+def test_cached_extraction_matches_a_fresh_parse(tmp_path):
+    data = _pdf_bytes()
+    cached = PDFProcessor(cache_dir=str(tmp_path))
+
+    first = cached.extract_lines('paper.pdf', stream=data)
+    assert os.path.exists(_cache_path(str(tmp_path), data))
+    second = cached.extract_lines('paper.pdf', stream=data)
+
+    _assert_lines_equal(second, first)
+    _assert_lines_equal(second, PDFProcessor().extract_lines('paper.pdf', stream=data))
+
+
+def test_resegment_cache_matches_segment_lines(tmp_path):
+    data = _pdf_bytes()
+    processor = PDFProcessor(cache_dir=str(tmp_path))
+    processor.extract_sections('paper.pdf', stream=data)
+
+    resegmented = processor.resegment_cache()
+    fresh = processor.segment_lines(PDFProcessor().extract_lines('paper.pdf', stream=data), 'paper')
+
+    assert list(resegmented.values()) == [fresh]
+    assert [section['section_title'] for section in fresh][:3] == ['Introduction', 'Methodology', 'Results']
+
+
+@pytest.mark.parametrize('damage', ['corrupt', 'stale'])
+def test_unusable_cache_file_falls_back_to_extraction(tmp_path, damage):
+    data = _pdf_bytes()
+    processor = PDFProcessor(cache_dir=str(tmp_path))
+    path = _cache_path(str(tmp_path), data)
+    expected = PDFProcessor().extract_lines('paper.pdf', stream=data)
+
+    if damage == 'corrupt':
+        with open(path, 'wb') as f:
+            f.write(b'PK\x03\x04 truncated')
+    else:
+        processor.CACHE_VERSION = PDFProcessor.CACHE_VERSION - 1
+        processor.save_lines(expected, path, 'paper.pdf')
+        processor.CACHE_VERSION = PDFProcessor.CACHE_VERSION
+
+    assert processor.load_lines(path) is None
+    _assert_lines_equal(processor.extract_lines('paper.pdf', stream=data), expected)
+    # The unusable file is replaced by a current one
+    _assert_lines_equal(processor.load_lines(path), expected)
@@ -0,0 +1,43 @@
+import time
+import tracemalloc
+
+import pytest
+
+from utils.profiling import RunProfiler, maybe_profile
+
+
+def _work(megabytes=20):
+    block = bytearray(megabytes * 1024 * 1024)
+    time.sleep(0.3)
+    del block
+    return sum(i * i for i in range(20000))
+
+
+@pytest.mark.parametrize('mode', ['cprofile', 'sample'])
+def test_cpu_modes_do_not_trace_memory(tmp_path, mode):
+    with RunProfiler(mode, str(tmp_path), interval=0.001):
+        assert not tracemalloc.is_tracing()
+        _work(1)
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == (['profile.pstats', 'profile.txt'] if mode == 'cprofile' else ['profile.collapsed'])
+
+
+def test_memory_mode_reports_allocations_at_the_peak(tmp_path):
+    with RunProfiler('memory', str(tmp_path), memory_interval=0.02, memory_frames=2):
+        assert tracemalloc.is_tracing()
+        _work(20)
+
+    assert not tracemalloc.is_tracing()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['memory.snapshot', 'memory_top.txt']
+    report = (tmp_path / 'memory_top.txt').read_text()
+    # The block is freed before exit, so only a snapshot near the peak lists it
+    top_site = report.split('\n\n', 1)[1].splitlines()[0]
+    assert 'test_profiling.py' in top_site
+    assert 'profiling.py:' not in top_site.replace('test_profiling.py', '')
+
+
+def test_maybe_profile_without_mode_is_a_no_op(tmp_path):
+    with maybe_profile(None, str(tmp_path)):
+        pass
+    assert list(tmp_path.iterdir()) == []
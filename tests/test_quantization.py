@@ -0,0 +1,89 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from models.quantization import SCORE_BLOCK_ROWS, QuantizedEmbeddings, quantize_int8, quantization_report
+
+
+def _normalized(rows, dim=384, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_int8_scores_match_int32_accumulation_across_blocks():
+    embeddings = _normalized(SCORE_BLOCK_ROWS * 2 + 17)
+    query = _normalized(1, seed=1)[0]
+    stored = QuantizedEmbeddings.from_float(embeddings, 'int8')
+
+    query_codes, query_scale = quantize_int8(query[None, :])
+    expected = (stored.data.astype(np.int32) @ query_codes[0].astype(np.int32)).astype(np.float32)
+    expected *= stored.scales * query_scale[0]
+
+    np.testing.assert_array_equal(stored.scores(query), expected)
+
+
+def test_float16_scores_match_full_upcast():
+    embeddings = _normalized(SCORE_BLOCK_ROWS + 3)
+    query = _normalized(1, seed=1)[0]
+    stored = QuantizedEmbeddings.from_float(embeddings, 'float16')
+
+    np.testing.assert_allclose(stored.scores(query), stored.data.astype(np.float32) @ query, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize('dtype', ['int8', 'float16'])
+def test_scoring_peak_memory_stays_below_float32_matrix(dtype):
+    embeddings = _normalized(20000)
+    query = _normalized(1, seed=1)[0]
+    stored = QuantizedEmbeddings.from_float(embeddings, dtype)
+    del embeddings
+
+    tracemalloc.start()
+    stored.scores(query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    float32_bytes = len(stored) * 384 * 4
+    assert peak < float32_bytes / 4
+
+
+def test_quantization_report_sizes_and_agreement():
+    report = quantization_report(_normalized(500), _normalized(5, seed=2), k=10)
+
+    assert report['float16']['compression_ratio'] == 2.0
+    assert report['int8']['compression_ratio'] > 3.9
+    assert report['int8']['recall_at_k'] >= 0.9
+    assert report['float16']['spearman'] > 0.999
+
+
+def test_encode_cached_stores_and_returns_compact_rows():
+    pytest.importorskip('torch')
+    from benchmarks.golden_harness import HashingEncoder
+    from models.embeddings import EmbeddingEngine
+
+    engine = EmbeddingEngine(storage_dtype='int8', model=HashingEncoder(), cache_size=3)
+    texts = ['binding affinity assay', 'reaction kinetics', 'market growth', 'museum tour']
+
+    cached = engine.encode_cached(texts)
+    direct = engine.encode_compact(texts)
+
+    assert cached.dtype == 'int8'
+    np.testing.assert_array_equal(cached.data, direct.data)
+    np.testing.assert_array_equal(cached.scales, direct.scales)
+    assert len(engine._cache) == 3
+    assert all(row.dtype == np.int8 for row, _ in engine._cache.values())
+
+
+def test_uncached_scores_are_float32_whatever_the_storage():
+    pytest.importorskip('torch')
+    from benchmarks.golden_harness import HashingEncoder
+    from models.embeddings import EmbeddingEngine
+
+    engine = EmbeddingEngine(storage_dtype='int8', model=HashingEncoder())
+    texts = ['binding affinity assay', 'reaction kinetics', 'market growth']
+    query = engine.encode('kinetics of binding')[0]
+
+    scores = engine.score_texts(query, texts)
+
+    np.testing.assert_allclose(scores, engine.encode(texts) @ query, rtol=1e-6)
+    assert len(engine._cache) == 0
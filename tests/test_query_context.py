@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from utils.query_context import QueryContext
+
+
+class OneHotEngine:
+    """Encodes the i-th text of a batch as the i-th unit vector and records the batches."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return np.eye(len(texts), 8, dtype=np.float32)
+
+
+def _variant(context, name):
+    return np.eye(8, dtype=np.float32)[list(context.texts).index(name)]
+
+
+def test_variant_texts_are_encoded_in_one_batch():
+    engine = OneHotEngine()
+
+    context = QueryContext(engine, 'Food critic', 'Compare tasting menus with wine pairings')
+
+    assert engine.batches == [list(context.texts.values())]
+    assert context.texts['analysis'] == 'Food critic needs to Compare tasting menus with wine pairings'
+    assert context.texts['ranking'] == 'Food critic Compare tasting menus with wine pairings'
+    assert context.texts['context'] == 'Persona: Food critic. Task: Compare tasting menus with wine pairings'
+    assert context.texts['keywords'] == 'compare tasting menus pairings'
+
+
+def test_default_roles_use_their_own_variant():
+    context = QueryContext(OneHotEngine(), 'Analyst', 'Summarize revenue trends')
+
+    np.testing.assert_array_equal(context.vector('analysis'), _variant(context, 'analysis'))
+    np.testing.assert_array_equal(context.vector('ranking'), _variant(context, 'ranking'))
+    np.testing.assert_array_equal(context.vector('job'), _variant(context, 'job'))
+
+
+def test_fused_vector_is_weighted_and_normalized():
+    context = QueryContext(OneHotEngine(), 'Analyst', 'Summarize revenue trends',
+                           fusion={'analysis': {'analysis': 0.8, 'keywords': 0.6}})
+
+    expected = 0.8 * _variant(context, 'analysis') + 0.6 * _variant(context, 'keywords')
+
+    np.testing.assert_allclose(context.vector('analysis'), expected)
+    assert np.linalg.norm(context.vector('analysis')) == pytest.approx(1.0)
+    # Roles without an override keep the default
+    np.testing.assert_array_equal(context.vector('ranking'), _variant(context, 'ranking'))
+
+
+@pytest.mark.parametrize('fusion', [
+    {'persona_rol': {'persona': 1.0}},
+    {'analysis': {'analysys': 1.0}}
+])
+def test_unknown_roles_and_variants_are_rejected_before_encoding(fusion):
+    engine = OneHotEngine()
+
+    with pytest.raises(ValueError):
+        QueryContext(engine, 'Analyst', 'Summarize revenue trends', fusion=fusion)
+    assert engine.batches == []
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from utils import resources
+from utils.resources import ResourceManager, available_cpus, cgroup_cpu_limit, cgroup_memory_limit
+
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """Point the cgroup file paths at files in a temporary directory."""
+    for name in ('CGROUP_V2_CPU_MAX', 'CGROUP_V1_QUOTA', 'CGROUP_V1_PERIOD',
+                 'CGROUP_V2_MEMORY_MAX', 'CGROUP_V1_MEMORY_LIMIT'):
+        monkeypatch.setattr(resources, name, str(tmp_path / name))
+
+    def write(name, content):
+        (tmp_path / name).write_text(content + '\n')
+
+    return write
+
+
+def test_cgroup_v2_cpu_quota(cgroup, monkeypatch):
+    cgroup('CGROUP_V2_CPU_MAX', '250000 100000')
+    monkeypatch.setattr(resources.os, 'sched_getaffinity', lambda pid: set(range(16)), raising=False)
+
+    assert cgroup_cpu_limit() == 2.5
+    assert available_cpus() == 3
+
+
+def test_cgroup_v2_unlimited_cpu_falls_back_to_affinity(cgroup, monkeypatch):
+    cgroup('CGROUP_V2_CPU_MAX', 'max 100000')
+    monkeypatch.setattr(resources.os, 'sched_getaffinity', lambda pid: {0, 1, 2, 3}, raising=False)
+
+    assert cgroup_cpu_limit() is None
+    assert available_cpus() == 4
+
+
+def test_cgroup_v1_cpu_quota(cgroup):
+    cgroup('CGROUP_V1_QUOTA', '50000')
+    cgroup('CGROUP_V1_PERIOD', '100000')
+
+    assert cgroup_cpu_limit() == 0.5
+
+
+def test_cgroup_v1_unlimited_cpu(cgroup):
+    cgroup('CGROUP_V1_QUOTA', '-1')
+    cgroup('CGROUP_V1_PERIOD', '100000')
+
+    assert cgroup_cpu_limit() is None
+
+
+def test_cgroup_memory_limits(cgroup):
+    assert cgroup_memory_limit() is None
+
+    cgroup('CGROUP_V1_MEMORY_LIMIT', str(9223372036854771712))
+    assert cgroup_memory_limit() is None
+    cgroup('CGROUP_V1_MEMORY_LIMIT', str(2 << 30))
+    assert cgroup_memory_limit() == 2 << 30
+
+    cgroup('CGROUP_V2_MEMORY_MAX', 'max')
+    assert cgroup_memory_limit() is None
+    cgroup('CGROUP_V2_MEMORY_MAX', str(1536 << 20))
+    assert cgroup_memory_limit() == 1536 << 20
+
+
+def test_default_split_uses_a_third_of_the_cores_for_parsing(cgroup):
+    manager = ResourceManager(cpus=12)
+
+    assert (manager.parse_workers, manager.intra_op_threads, manager.inter_op_threads) == (4, 8, 1)
+
+
+def test_memory_quota_caps_default_parse_workers(cgroup):
+    cgroup('CGROUP_V2_MEMORY_MAX', str(resources.MAIN_PROCESS_MEMORY + 2 * resources.PARSE_WORKER_MEMORY))
+
+    manager = ResourceManager(cpus=12)
+
+    assert manager.parse_workers == 2
+    assert manager.intra_op_threads == 10
+    # Explicit settings are not capped
+    assert ResourceManager(cpus=12, parse_workers=6).parse_workers == 6
+
+
+def test_environment_overrides_profile(tmp_path, monkeypatch, cgroup):
+    profile = tmp_path / 'resource_profile.json'
+    profile.write_text(json.dumps({'best': {'parse_workers': 3, 'intra_op_threads': 5, 'inter_op_threads': 2}}))
+    monkeypatch.setenv('PARSE_WORKERS', '1')
+
+    manager = ResourceManager.from_environment(str(profile))
+
+    assert (manager.parse_workers, manager.intra_op_threads, manager.inter_op_threads) == (1, 5, 2)
+
+
+@pytest.mark.parametrize('value', ['0', '-2', 'two', '1.5'])
+def test_invalid_parse_workers_is_rejected(monkeypatch, value):
+    monkeypatch.setenv('PARSE_WORKERS', value)
+
+    with pytest.raises(ValueError, match='PARSE_WORKERS'):
+        ResourceManager.from_environment()
+
+
+def test_calibration_saves_the_fastest_split(tmp_path, monkeypatch):
+    pytest.importorskip('torch')
+    from benchmarks.golden_harness import HashingEncoder
+    from main import PersonaDocumentIntelligence
+    from models.embeddings import EmbeddingEngine
+
+    manager = ResourceManager(cpus=4, memory_limit=1 << 40)
+    system = PersonaDocumentIntelligence(resources=manager, embedding_engine=EmbeddingEngine(model=HashingEncoder()))
+    runs = []
+
+    def fake_run(input_dir, output_dir):
+        runs.append((manager.parse_workers, manager.intra_op_threads))
+        # Pretend (2, 4) is fastest
+        clock['now'] += 1.0 if runs[-1] == (2, 4) else 5.0
+
+    clock = {'now': 0.0}
+    monkeypatch.setattr('main.time.time', lambda: clock['now'])
+    monkeypatch.setattr(system, 'process_documents', fake_run)
+    profile_path = tmp_path / 'resource_profile.json'
+
+    profile = system.calibrate('unused', str(tmp_path), str(profile_path))
+
+    # One warm-up run, then every candidate
+    assert runs[1:] == manager.candidate_splits()
+    assert profile['best']['parse_workers'] == 2 and profile['best']['intra_op_threads'] == 4
+    assert json.loads(profile_path.read_text())['best'] == profile['best']
+
+    loaded = ResourceManager.from_environment(str(profile_path))
+    assert (loaded.parse_workers, loaded.intra_op_threads) == (2, 4)
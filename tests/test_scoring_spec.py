@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.scoring_spec import DEFAULT_SCORING_SPEC, ScoringSpec
+
+
+def test_overrides_merge_with_defaults():
+    spec = ScoringSpec({'sections': {'weights': {'tfidf': 0.5}, 'max_score': None}})
+
+    assert spec.weight('sections', 'tfidf') == 0.5
+    assert spec.weight('sections', 'semantic') == DEFAULT_SCORING_SPEC['sections']['weights']['semantic']
+    assert spec.as_dict()['sections']['max_score'] is None
+    assert spec.as_dict()['relevance'] == DEFAULT_SCORING_SPEC['relevance']
+    assert ScoringSpec(spec.as_dict()).as_dict() == spec.as_dict()
+
+
+def test_spec_loads_from_json_file(tmp_path):
+    path = tmp_path / 'spec.json'
+    path.write_text(json.dumps({'relevance': {'weights': {'job_boost': 0}}}))
+
+    spec = ScoringSpec.from_file(str(path))
+
+    assert spec.active_features('relevance') == ['similarity', 'persona_boost']
+
+
+def test_zero_weight_features_are_not_computed():
+    spec = ScoringSpec({'sections': {'weights': {'tfidf': 0.0, 'position': 0.0}}})
+    calls = []
+
+    def provider(feature, values):
+        def compute():
+            calls.append(feature)
+            return values
+        return compute
+
+    scores = spec.evaluate('sections', {
+        'semantic': provider('semantic', [0.5, 1.0]),
+        'tfidf': provider('tfidf', [1.0, 1.0]),
+        'position': provider('position', [1.0, 1.0]),
+        'relevance': provider('relevance', [1.0, 0.0])
+    }, 2)
+
+    assert calls == ['semantic', 'relevance']
+    np.testing.assert_allclose(scores, [0.7 * 0.5 + 0.1, 0.7])
+
+
+def test_scores_are_clipped_at_max_score():
+    spec = ScoringSpec({'relevance': {'weights': {'similarity': 2.0}}})
+
+    scores = spec.evaluate('relevance', {
+        'similarity': lambda: [0.9, 0.2], 'persona_boost': lambda: [0.0, 0.0], 'job_boost': lambda: [0.0, 0.0]
+    }, 2)
+
+    np.testing.assert_allclose(scores, [1.0, 0.4])
+
+
+def test_no_items_or_no_active_features_give_zeros():
+    spec = ScoringSpec({'relevance': {'weights': {'similarity': 0, 'persona_boost': 0, 'job_boost': 0}}})
+
+    assert spec.evaluate('relevance', {}, 3).tolist() == [0.0, 0.0, 0.0]
+    assert ScoringSpec().evaluate('relevance', {}, 0).tolist() == []
+
+
+def test_missing_provider_for_active_feature_is_an_error():
+    with pytest.raises(ValueError, match='job_boost'):
+        ScoringSpec().evaluate('relevance', {'similarity': lambda: [1.0], 'persona_boost': lambda: [0.0]}, 1)
+
+
+@pytest.mark.parametrize('spec', [
+    {'ranking': {'weights': {'semantic': 1.0}}},
+    {'sections': {'weights': {'similarity': 1.0}}},
+    {'sections': {'weights': {'semantic': 'high'}}},
+    {'sections': {'weights': {'semantic': None}}},
+    {'sections': {'weights': {'semantic': float('nan')}}},
+    {'sections': {'weights': {'semantic': True}}},
+    {'sections': {'weights': [0.5, 0.5]}},
+    {'sections': 0.5},
+    {'sections': {'max_score': 'none'}}
+])
+def test_unknown_or_malformed_entries_are_rejected(spec):
+    with pytest.raises(ValueError):
+        ScoringSpec(spec)
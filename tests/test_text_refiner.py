@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from utils.text_refiner import SentenceRefiner, split_sentences
+
+
+class ScoredEngine:
+    """Scores each sentence by a fixed table and records the calls."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.calls = []
+
+    def score_texts(self, query_embedding, texts, cached=False):
+        self.calls.append((list(texts), cached))
+        return [self.scores.get(text, 0.0) for text in texts]
+
+
+class FixedQuery:
+    def vector(self, role):
+        return np.ones(4, dtype=np.float32)
+
+
+def _refine(engine, text, max_chars):
+    subsection = {'refined_text': text}
+    SentenceRefiner(engine, max_chars=max_chars).refine([subsection], FixedQuery())
+    return subsection.get('refined_extract')
+
+
+def test_best_sentences_kept_in_document_order_within_budget():
+    sentences = ['First filler sentence.', 'Key finding on binding.', 'Second filler sentence.',
+                 'Another key result here.']
+    engine = ScoredEngine({sentences[1]: 0.9, sentences[3]: 0.8, sentences[0]: 0.2, sentences[2]: 0.1})
+
+    refined = _refine(engine, ' '.join(sentences), max_chars=50)
+
+    assert refined == 'Key finding on binding. Another key result here.'
+    assert len(refined) <= 50
+    assert engine.calls == [(sentences, True)]
+
+
+def test_best_sentence_longer_than_budget_is_truncated_not_dropped():
+    long_best = 'The decisive result ' + 'with many qualifying clauses ' * 10 + 'holds.'
+    filler = 'Short filler.'
+    engine = ScoredEngine({long_best: 0.9, filler: 0.1})
+
+    refined = _refine(engine, f'{filler} {long_best}', max_chars=60)
+
+    assert refined == long_best[:60]
+
+
+def test_short_subsections_are_left_alone():
+    engine = ScoredEngine({})
+
+    assert _refine(engine, 'Already short. Nothing to do.', max_chars=100) is None
+    assert engine.calls == []
+
+
+def test_split_sentences_keeps_abbreviated_numbers_together():
+    assert split_sentences('Yield rose 3.5 percent. Costs fell! why not') == [
+        'Yield rose 3.5 percent.', 'Costs fell! why not'
+    ]
+
+
+def test_repeated_sentences_reuse_cached_embeddings():
+    pytest.importorskip('torch')
+    from benchmarks.golden_harness import HashingEncoder
+    from models.embeddings import EmbeddingEngine
+    from utils.query_context import QueryContext
+
+    class CountingEncoder(HashingEncoder):
+        encoded = []
+
+        def encode(self, texts, **kwargs):
+            self.encoded.extend(texts)
+            return super().encode(texts, **kwargs)
+
+    model = CountingEncoder()
+    engine = EmbeddingEngine(model=model)
+    query = QueryContext(engine, 'Chemist', 'review binding kinetics')
+    refiner = SentenceRefiner(engine, max_chars=40)
+    text = 'Binding kinetics were measured. The weather was mild. Rates doubled at higher heat.'
+
+    model.encoded.clear()
+    refiner.refine([{'refined_text': text}], query)
+    refiner.refine([{'refined_text': text}], query)
+
+    assert sorted(model.encoded) == sorted(split_sentences(text))
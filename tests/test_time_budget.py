@@ -0,0 +1,83 @@
+import pytest
+
+from utils.json_formatter import JSONFormatter
+from utils.time_budget import STAGE_SHARES, TimeBudget
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_stage_deadlines_follow_the_shares():
+    clock = FakeClock()
+    budget = TimeBudget(10, clock=clock)
+
+    for stage, share in STAGE_SHARES.items():
+        assert budget.stage_deadline(stage) == pytest.approx(100.0 + 10 * share)
+
+    clock.now = 104.0
+    assert budget.elapsed() == pytest.approx(4.0)
+    assert budget.remaining() == pytest.approx(6.0)
+    assert budget.stage_remaining('extraction') == pytest.approx(0.5)
+
+
+def test_stages_expire_in_order_as_time_passes():
+    clock = FakeClock()
+    budget = TimeBudget(10, clock=clock, stage_shares={'ranking': 0.95})
+
+    clock.now = 104.5
+    assert budget.stage_expired('extraction')
+    assert not budget.stage_expired('analysis')
+
+    clock.now = 109.0
+    assert budget.stage_expired('subsections')
+    assert not budget.stage_expired('ranking')
+
+    clock.now = 110.0
+    assert budget.remaining() == pytest.approx(0.0)
+    assert budget.stage_expired('ranking')
+
+
+def test_shared_start_counts_time_already_spent():
+    clock = FakeClock()
+
+    budget = TimeBudget(10, start=clock.now - 7.5, clock=clock)
+
+    assert budget.stage_expired('analysis')
+    assert budget.remaining() == pytest.approx(2.5)
+
+
+def test_non_positive_budget_is_rejected():
+    with pytest.raises(ValueError):
+        TimeBudget(0)
+
+
+def test_degradations_are_written_to_the_output_metadata():
+    clock = FakeClock()
+    budget = TimeBudget(2, clock=clock)
+    clock.now = 101.234
+    budget.degrade('analysis', 'lexical_persona_job_match', sections=12)
+
+    output = JSONFormatter().format_output([], 'Analyst', 'Summarize trends', [], [], 1.5,
+                                           time_budget=budget.summary())
+
+    assert output['metadata']['time_budget'] == {
+        'time_budget_seconds': 2,
+        'elapsed_seconds': 1.23,
+        'degraded': True,
+        'degradations': [
+            {'stage': 'analysis', 'action': 'lexical_persona_job_match', 'elapsed_seconds': 1.23, 'sections': 12}
+        ]
+    }
+
+
+def test_undegraded_run_reports_no_degradations():
+    clock = FakeClock()
+    budget = TimeBudget(2, clock=clock)
+
+    assert budget.summary()['degraded'] is False
+    assert budget.summary()['degradations'] == []
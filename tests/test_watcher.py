@@ -0,0 +1,68 @@
+import time
+
+from utils.watcher import DirectoryWatcher
+
+
+def _watcher(path):
+    watcher = DirectoryWatcher(str(path), poll_interval=0.01, debounce=0.05)
+    # Polling keeps the test independent of inotify availability
+    watcher._inotify = None
+    return watcher
+
+
+def test_reports_added_and_removed_files(tmp_path):
+    watcher = _watcher(tmp_path)
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-a')
+    (tmp_path / 'notes.txt').write_text('ignored')
+    changes = watcher.changes()
+
+    assert next(changes) == {'changed': ['a.pdf'], 'removed': []}
+
+    (tmp_path / 'a.pdf').unlink()
+    assert next(changes) == {'changed': [], 'removed': ['a.pdf']}
+
+
+def test_retry_reports_failed_batch_again_without_new_changes(tmp_path):
+    watcher = _watcher(tmp_path)
+    (tmp_path / 'config.json').write_text('{"persona"')
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-a')
+    changes = watcher.changes()
+
+    batch = next(changes)
+    assert batch == {'changed': ['a.pdf', 'config.json'], 'removed': []}
+
+    watcher.retry(batch)
+    assert next(changes) == batch
+
+
+def test_retry_reports_removed_files_again(tmp_path):
+    watcher = _watcher(tmp_path)
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-a')
+    changes = watcher.changes()
+    next(changes)
+
+    (tmp_path / 'a.pdf').unlink()
+    batch = next(changes)
+    assert batch == {'changed': [], 'removed': ['a.pdf']}
+
+    watcher.retry(batch)
+    assert next(changes) == batch
+
+
+def test_consecutive_retries_back_off(tmp_path):
+    watcher = _watcher(tmp_path)
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-a')
+    changes = watcher.changes()
+    batch = next(changes)
+
+    delays = []
+    for _ in range(3):
+        watcher.retry(batch)
+        start = time.monotonic()
+        assert next(changes) == batch
+        delays.append(time.monotonic() - start)
+
+    # Retry delays double (debounce, 2x, 4x) before the batch's own debounce
+    assert delays[1] >= 2 * watcher.debounce
+    assert delays[2] >= 4 * watcher.debounce
+    assert delays[2] > delays[0]
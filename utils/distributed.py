@@ -0,0 +1,455 @@
+"""
+Sharded corpus processing with a coordinator and HTTP workers.
+"""
+
+import os
+import json
+import math
+import time
+import socket
+import struct
+import logging
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Callable
+
+from utils.ingestion import DocumentIngestor
+from utils.json_formatter import JSONFormatter, dumps
+from utils.ranking_engine import RankingEngine
+from utils.scoring_spec import ScoringSpec
+from utils.time_budget import TimeBudget
+
+logger = logging.getLogger(__name__)
+
+# Shard request bodies are a sequence of frames, each an 8-byte big-endian
+# length followed by that many bytes: first the JSON header, then the raw
+# bytes of every document listed in it, in order.
+SHARD_CONTENT_TYPE = 'application/x-shard-frames'
+_FRAME_LENGTH = struct.Struct('>Q')
+
+
+def _shard_frames(header: Dict[str, Any], readers: List[Callable[[], bytes]]) -> Iterator[bytes]:
+    """
+    Encode a shard request body, reading one document at a time.
+
+    Args:
+        header: Shard request without document data
+        readers: Document readers in the order of header['documents']
+
+    Yields:
+        Body fragments (sent as HTTP chunks)
+    """
+    encoded = dumps(header, indent=False)
+    yield _FRAME_LENGTH.pack(len(encoded))
+    yield encoded
+
+    for read in readers:
+        data = read()
+        yield _FRAME_LENGTH.pack(len(data))
+        yield data
+
+
+class _ChunkedReader:
+    """Reads a chunked transfer-encoded request body."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = bytearray()
+        self.done = False
+
+    def read(self, size: int) -> bytes:
+        """Read up to size bytes (fewer only at the end of the body)."""
+        while len(self.buffer) < size and not self.done:
+            chunk_size = int(self.stream.readline().split(b';')[0].strip() or b'0', 16)
+            if chunk_size == 0:
+                # Skip trailers up to the blank line that ends the body
+                while self.stream.readline() not in (b'\r\n', b'\n', b''):
+                    pass
+                self.done = True
+                break
+            self.buffer += self.stream.read(chunk_size)
+            self.stream.readline()
+
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+class _LimitedReader:
+    """Reads a request body of known length."""
+
+    def __init__(self, stream, length: int):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size: int) -> bytes:
+        """Read up to size bytes without reading past the body."""
+        data = self.stream.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+def _read_frame(stream) -> bytes:
+    """Read one length-prefixed frame of a shard request body."""
+    prefix = stream.read(_FRAME_LENGTH.size)
+    if len(prefix) != _FRAME_LENGTH.size:
+        raise ValueError("Truncated shard request")
+    length, = _FRAME_LENGTH.unpack(prefix)
+    data = stream.read(length)
+    if len(data) != length:
+        raise ValueError("Truncated shard request")
+    return data
+
+
+def read_shard_request(stream) -> Dict[str, Any]:
+    """
+    Decode a shard request body.
+
+    Args:
+        stream: Body stream with a read(size) method
+
+    Returns:
+        Shard request whose documents carry their raw bytes as 'data'
+    """
+    shard = json.loads(_read_frame(stream))
+    for document in shard['documents']:
+        document['data'] = _read_frame(stream)
+    return shard
+
+
+def serve_worker(system, host: str = '127.0.0.1', port: int = 8765) -> None:
+    """
+    Serve shard requests for a coordinator over HTTP.
+
+    Endpoints:
+        GET /health: readiness probe
+        POST /shard: process one shard (framed body, see SHARD_CONTENT_TYPE)
+
+    Requests are not authenticated, so bind a public interface only on a
+    trusted network.
+
+    Args:
+        system: PersonaDocumentIntelligence instance (model stays loaded)
+        host: Interface to bind (localhost by default)
+        port: Port to bind
+    """
+    # One shard at a time: the encoder already uses all of its threads
+    lock = threading.Lock()
+
+    class ShardHandler(BaseHTTPRequestHandler):
+        def _respond(self, status: int, data: Dict[str, Any]) -> None:
+            body = dumps(data, indent=False)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._respond(200, {'status': 'ok'})
+            else:
+                self._respond(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/shard':
+                self._respond(404, {'error': f"Unknown path {self.path}"})
+                return
+
+            try:
+                if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                    body = _ChunkedReader(self.rfile)
+                else:
+                    body = _LimitedReader(self.rfile, int(self.headers.get('Content-Length', 0)))
+                shard = read_shard_request(body)
+                with lock:
+                    result = system.process_shard(shard)
+                self._respond(200, result)
+            except Exception as e:
+                logger.error(f"Shard failed: {str(e)}")
+                self._respond(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), ShardHandler)
+    logger.info(f"Worker listening on {host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping worker...")
+    finally:
+        server.server_close()
+
+
+class _WorkerPool:
+    """Idle worker URLs shared by the shard threads; unreachable workers are removed."""
+
+    def __init__(self, urls: List[str]):
+        self._idle = deque(urls)
+        self._live = len(urls)
+        self._condition = threading.Condition()
+
+    def acquire(self) -> str:
+        """Wait for an idle worker; raises RuntimeError once no healthy worker is left."""
+        with self._condition:
+            while not self._idle:
+                if self._live == 0:
+                    raise RuntimeError("No healthy workers left")
+                self._condition.wait()
+            return self._idle.popleft()
+
+    def release(self, url: str) -> None:
+        """Return a healthy worker to the pool."""
+        with self._condition:
+            self._idle.append(url)
+            self._condition.notify()
+
+    def remove(self, url: str) -> None:
+        """Drop an unreachable worker (it was acquired, so it is not idle)."""
+        with self._condition:
+            self._live -= 1
+            self._condition.notify_all()
+
+
+def _free_port() -> int:
+    """Ask the OS for an unused localhost port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def launch_local_workers(count: int, command: List[str], startup_timeout: float = 300.0) -> Tuple[List[subprocess.Popen], List[str]]:
+    """
+    Start worker processes on localhost and wait until they are ready.
+
+    Args:
+        count: Number of workers
+        command: Command that starts main.py (e.g. [sys.executable, 'main.py'])
+        startup_timeout: Seconds to wait for model loading
+
+    Returns:
+        Tuple of (processes, worker URLs)
+    """
+    processes = []
+    urls = []
+
+    for _ in range(count):
+        port = _free_port()
+        processes.append(subprocess.Popen(
+            command + ['--serve-worker', '--host', '127.0.0.1', '--port', str(port)]
+        ))
+        urls.append(f"http://127.0.0.1:{port}")
+
+    deadline = time.monotonic() + startup_timeout
+    for process, url in zip(processes, urls):
+        while True:
+            if process.poll() is not None:
+                stop_local_workers(processes)
+                raise RuntimeError(f"Worker {url} exited during startup")
+            try:
+                with urllib.request.urlopen(f"{url}/health", timeout=2) as response:
+                    if response.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            if time.monotonic() > deadline:
+                stop_local_workers(processes)
+                raise RuntimeError(f"Worker {url} did not start within {startup_timeout}s")
+            time.sleep(0.5)
+
+    logger.info(f"Started {count} local workers: {', '.join(urls)}")
+    return processes, urls
+
+
+def stop_local_workers(processes: List[subprocess.Popen]) -> None:
+    """Terminate local worker processes."""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class ShardCoordinator:
+    """Shards the input documents across workers and merges their candidates."""
+
+    def __init__(self, worker_urls: List[str], shard_size: Optional[int] = None,
+                 timeout: float = 3600.0, max_attempts: int = 3,
+                 scoring_spec: Optional[ScoringSpec] = None, time_budget: Optional[float] = None):
+        """
+        Initialize coordinator.
+
+        Args:
+            worker_urls: Base URLs of the workers (e.g. http://host:8765)
+            shard_size: Documents per shard (defaults to an even split over workers)
+            timeout: Seconds to wait for one shard
+            max_attempts: Attempts per shard before the run fails
+            scoring_spec: Score weights sent to the workers with every shard (defaults if omitted)
+            time_budget: Target wall-clock seconds per run, shared by the workers
+        """
+        if not worker_urls:
+            raise ValueError("At least one worker URL is required")
+
+        self.worker_urls = [url.rstrip('/') for url in worker_urls]
+        self.shard_size = shard_size
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.scoring_spec = scoring_spec or ScoringSpec()
+        self.time_budget = time_budget
+        # Merging and formatting need no embedding model
+        self.ranking_engine = RankingEngine(None, scoring_spec=self.scoring_spec)
+        self.json_formatter = JSONFormatter()
+
+    def process_documents(self, input_dir: str, output_dir: str) -> str:
+        """
+        Process documents across the workers and write analysis_result.json.
+
+        Shards are contiguous runs of the sorted document list and every
+        candidate carries its single-node analysis position, so the merged
+        ranking matches a single-node run.
+
+        Args:
+            input_dir: Directory or zip/tar archive containing PDFs and config.json, or '-' for stdin
+            output_dir: Directory to save results
+
+        Returns:
+            Path of the written result
+        """
+        start_time = time.time()
+        budget = TimeBudget(self.time_budget) if self.time_budget else None
+
+        ingestor = DocumentIngestor(input_dir)
+        config = ingestor.load_config()
+        persona = config.get('persona', '')
+        job_to_be_done = config.get('job_to_be_done', '')
+        if not persona or not job_to_be_done:
+            raise ValueError("Both 'persona' and 'job_to_be_done' must be specified in config.json")
+
+        pdf_files = ingestor.list_documents()
+        if not pdf_files:
+            raise FileNotFoundError("No PDF files found in input directory")
+
+        shard_size = self.shard_size or math.ceil(len(pdf_files) / len(self.worker_urls))
+        shards = [pdf_files[i:i + shard_size] for i in range(0, len(pdf_files), shard_size)]
+        logger.info(f"Dispatching {len(pdf_files)} documents as {len(shards)} shards to {len(self.worker_urls)} workers")
+
+        idle_workers = _WorkerPool(self.worker_urls)
+
+        with ThreadPoolExecutor(max_workers=len(self.worker_urls)) as pool:
+            results = list(pool.map(
+                lambda item: self._run_shard(item[0], item[1], config, idle_workers, budget),
+                enumerate(shards)
+            ))
+
+        # Merge in shard order so documents keep their single-node order
+        documents = [doc for result in results for doc in result['documents']]
+        ranked_sections = self.ranking_engine.merge_ranked_sections(
+            [s for result in results for s in result['sections']]
+        )
+        ranked_subsections = self.ranking_engine.merge_ranked_subsections(
+            [s for result in results for s in result['subsections']]
+        )
+
+        if budget is not None:
+            for result in results:
+                budget.degradations.extend(
+                    dict(entry, shard=result['shard_index']) for entry in result.get('degradations', [])
+                )
+
+        processing_time = time.time() - start_time
+        output_data = self.json_formatter.format_output(
+            documents=documents,
+            persona=persona,
+            job_to_be_done=job_to_be_done,
+            sections=ranked_sections,
+            subsections=ranked_subsections,
+            processing_time=processing_time,
+            time_budget=budget.summary() if budget is not None else None
+        )
+
+        output_path = os.path.join(output_dir, 'analysis_result.json')
+        self.json_formatter.write_output(output_data, output_path)
+
+        totals = {}
+        for result in results:
+            for key, value in result['stats'].items():
+                totals[key] = round(totals.get(key, 0) + value, 3)
+        logger.info(f"Merged {len(results)} shards {totals} in {processing_time:.2f}s; results saved to {output_path}")
+
+        return output_path
+
+    def _run_shard(self, shard_index: int, entries: List, config: Dict[str, Any],
+                   idle_workers: _WorkerPool, budget: Optional[TimeBudget] = None) -> Dict[str, Any]:
+        """
+        Send one shard to an idle worker, retrying on other workers on failure.
+
+        The documents are streamed one at a time as raw bytes, so the
+        coordinator never holds a whole shard in memory. A worker that
+        cannot be reached is removed from the pool; one that answers with
+        an error stays in it.
+
+        Args:
+            shard_index: Position of the shard in document order
+            entries: Entries from DocumentIngestor.list_documents()
+            config: Run configuration
+            idle_workers: Pool of worker URLs not currently busy
+            budget: Run time budget; workers get its size and the elapsed time at each attempt
+
+        Returns:
+            Worker response
+        """
+        header = {
+            'shard_index': shard_index,
+            'config': config,
+            'top_k_subsections': JSONFormatter.MAX_SUBSECTIONS,
+            'scoring_spec': self.scoring_spec.as_dict(),
+            'time_budget': None,
+            'documents': [{'filename': filename, 'path': path} for filename, path, _ in entries]
+        }
+        readers = [read for _, _, read in entries]
+
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            url = idle_workers.acquire()
+            healthy = True
+            # Measured per attempt, so a retried shard gets only the time left
+            if budget is not None:
+                header['time_budget'] = {'seconds': budget.seconds, 'elapsed': budget.elapsed()}
+            try:
+                # A body without Content-Length is sent with chunked transfer encoding
+                request = urllib.request.Request(
+                    f"{url}/shard", data=_shard_frames(header, readers),
+                    headers={'Content-Type': SHARD_CONTENT_TYPE}
+                )
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    result = json.loads(response.read())
+                logger.info(f"Shard {shard_index} ({len(entries)} documents) done on {url}")
+                return result
+            except urllib.error.HTTPError as e:
+                last_error = f"HTTP {e.code}: {e.read().decode('utf-8', 'replace')}"
+                logger.warning(f"Shard {shard_index} failed on {url} (attempt {attempt}): {last_error}")
+            except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+                healthy = False
+                last_error = str(e)
+                logger.warning(f"Shard {shard_index} failed on {url} (attempt {attempt}): {last_error}; "
+                               f"removing the worker")
+            except ValueError as e:
+                last_error = str(e)
+                logger.warning(f"Shard {shard_index} failed on {url} (attempt {attempt}): {last_error}")
+            finally:
+                if healthy:
+                    idle_workers.release(url)
+                else:
+                    idle_workers.remove(url)
+
+        raise RuntimeError(f"Shard {shard_index} failed after {self.max_attempts} attempts: {last_error}")
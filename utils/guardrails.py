@@ -0,0 +1,299 @@
+"""
+Per-document resource limits for PDF extraction in supervised worker processes.
+
+Failure reasons recorded for a document:
+    too_many_pages: page count above the limit (not parsed)
+    page_timeout: a single page took longer than the page timeout (worker killed)
+    memory_limit: the worker exceeded the memory limit (killed, or allocation failed)
+    crashed: the worker process died (e.g. a segfault in the PDF library)
+    parse_error: the parser raised an exception
+"""
+
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the RSS watchdog still applies
+    resource = None
+
+from utils.pdf_processor import PDFProcessor
+
+logger = logging.getLogger(__name__)
+
+FAILURE_REASONS = ('too_many_pages', 'page_timeout', 'memory_limit', 'crashed', 'parse_error')
+
+
+def _proc_status_bytes(pid: int, field: str) -> Optional[int]:
+    """Read a kB field (e.g. VmRSS) from /proc/<pid>/status, or None if unavailable."""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class ExtractionLimits:
+    """Resource limits applied to each document's extraction."""
+
+    def __init__(self, max_pages: Optional[int] = None, max_rss_mb: Optional[float] = None,
+                 page_timeout: Optional[float] = None):
+        """
+        Initialize limits; None disables a limit.
+
+        Args:
+            max_pages: Documents with more pages fail without being parsed
+            max_rss_mb: Memory a document may use on top of the worker's idle footprint
+            page_timeout: Seconds a single page may take to parse
+        """
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.page_timeout = page_timeout
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is set (extraction then runs in supervised workers)."""
+        return any(v is not None for v in (self.max_pages, self.max_rss_mb, self.page_timeout))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the limits as a dictionary."""
+        return {'max_pages': self.max_pages, 'max_rss_mb': self.max_rss_mb, 'page_timeout': self.page_timeout}
+
+
+def _worker_main(conn, heartbeat, current_page, limits: Dict[str, Any], cache_dir: Optional[str]) -> None:
+    """
+    Extraction worker loop: receive (filename, data, deadline), send (sections, stats).
+
+    Args:
+        conn: Pipe end to the supervisor
+        heartbeat: Shared time.monotonic() of the current page start (0 when idle)
+        current_page: Shared index of the page being parsed
+        limits: ExtractionLimits.as_dict()
+        cache_dir: Page line cache directory
+    """
+    # Address-space backstop for allocations faster than the supervisor's RSS
+    # polling; workers with a memory limit handle a single document, so the
+    # limit is relative to the idle footprint like the RSS check
+    if limits['max_rss_mb'] and resource is not None:
+        current = _proc_status_bytes(os.getpid(), 'VmSize')
+        if current is not None:
+            soft = current + int(limits['max_rss_mb'] * 1024 * 1024)
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard == resource.RLIM_INFINITY or soft < hard:
+                resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+    processor = PDFProcessor(cache_dir=cache_dir, max_pages=limits['max_pages'])
+
+    def on_page(page_num: int) -> None:
+        current_page.value = page_num
+        heartbeat.value = time.monotonic()
+
+    conn.send(('ready', None))
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+
+        filename, data, deadline = job
+        heartbeat.value = time.monotonic()
+        stats = {}
+        sections = processor.extract_sections(filename, stream=data, deadline=deadline, stats=stats, on_page=on_page)
+        heartbeat.value = 0.0
+        conn.send(('done', (sections, stats)))
+
+
+class IsolatedExtractor:
+    """
+    Runs extraction in worker processes that are killed and replaced when a document breaks a limit.
+
+    With a memory limit, a worker is also replaced after every document: memory
+    the allocator keeps from earlier documents would otherwise count against
+    later ones, so identical documents could pass or fail depending on order.
+    """
+
+    def __init__(self, workers: int, limits: ExtractionLimits, cache_dir: Optional[str] = None,
+                 poll_interval: float = 0.05):
+        """
+        Initialize extractor (workers start on first use).
+
+        Args:
+            workers: Number of worker processes
+            limits: Per-document limits
+            cache_dir: Page line cache directory
+            poll_interval: Seconds between watchdog checks
+        """
+        self.workers = max(1, workers)
+        self.limits = limits
+        self.cache_dir = cache_dir
+        self.poll_interval = poll_interval
+        # Spawned workers avoid forking a process that already runs torch threads
+        self._context = multiprocessing.get_context('spawn')
+        self._slots: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> 'IsolatedExtractor':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _start_worker(self) -> Dict[str, Any]:
+        """Start a worker and wait until it is ready."""
+        parent_conn, child_conn = self._context.Pipe()
+        heartbeat = self._context.Value('d', 0.0, lock=False)
+        current_page = self._context.Value('i', 0, lock=False)
+
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, heartbeat, current_page, self.limits.as_dict(), self.cache_dir),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        try:
+            parent_conn.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(f"Extraction worker exited during startup (exit code {process.exitcode})")
+
+        return {
+            'process': process,
+            'conn': parent_conn,
+            'heartbeat': heartbeat,
+            'page': current_page,
+            'baseline_rss': _proc_status_bytes(process.pid, 'VmRSS') or 0,
+            'job': None
+        }
+
+    def _stop_worker(self, slot: Dict[str, Any]) -> None:
+        """Kill a worker and release its pipe."""
+        if slot['process'].is_alive():
+            slot['process'].kill()
+        slot['process'].join()
+        slot['conn'].close()
+
+    def _retire_worker(self, slot: Dict[str, Any]) -> None:
+        """Ask an idle worker to exit, killing it if it does not."""
+        if slot['process'].is_alive():
+            try:
+                slot['conn'].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            slot['process'].join(timeout=5)
+        self._stop_worker(slot)
+
+    def close(self) -> None:
+        """Stop all workers."""
+        for slot in self._slots:
+            self._retire_worker(slot)
+        self._slots = []
+
+    def map(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict], Dict[str, Any]]]:
+        """
+        Extract documents, yielding results as they finish.
+
+        Jobs are pulled from the iterable only when a worker is free, so values
+        computed per job (such as its deadline) are computed at dispatch time.
+
+        Args:
+            jobs: Dictionaries with 'filename', 'data' and 'deadline' (other keys are passed through)
+
+        Yields:
+            Tuples of (job, sections, stats); a failed document has no sections
+            and stats['error'] = {'reason', 'detail'}
+        """
+        jobs = iter(jobs)
+        while len(self._slots) < self.workers:
+            self._slots.append(self._start_worker())
+
+        exhausted = False
+        while True:
+            # Hand out work to idle workers
+            for slot in self._slots:
+                if slot['job'] is None and not exhausted:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    slot['job'] = job
+                    slot['started'] = time.monotonic()
+                    slot['conn'].send((job['filename'], job['data'], job.get('deadline')))
+
+            busy = [slot for slot in self._slots if slot['job'] is not None]
+            if not busy:
+                return
+
+            ready = wait([slot['conn'] for slot in busy], timeout=self.poll_interval)
+
+            for index, slot in enumerate(self._slots):
+                if slot['job'] is None:
+                    continue
+
+                job = slot['job']
+                if slot['conn'] in ready:
+                    try:
+                        _, (sections, stats) = slot['conn'].recv()
+                        slot['job'] = None
+                        if self.limits.max_rss_mb:
+                            self._retire_worker(slot)
+                            self._slots[index] = self._start_worker()
+                        yield job, sections, stats
+                        continue
+                    except (EOFError, OSError):
+                        failure = self._crash_reason(slot)
+                else:
+                    failure = self._check_limits(slot)
+                    if failure is None:
+                        continue
+
+                logger.warning(f"Extraction of {job['filename']} failed: {failure['reason']} ({failure['detail']})")
+                self._stop_worker(slot)
+                self._slots[index] = self._start_worker()
+                yield job, [], {'error': failure}
+
+    def _check_limits(self, slot: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        Check a busy worker against the page timeout and memory limit.
+
+        Returns:
+            Failure record if a limit is exceeded (or the worker died), else None
+        """
+        if not slot['process'].is_alive():
+            return self._crash_reason(slot)
+
+        started = slot['heartbeat'].value
+        if self.limits.page_timeout and started and time.monotonic() - started > self.limits.page_timeout:
+            return {'reason': 'page_timeout',
+                    'detail': f"page {slot['page'].value + 1} exceeded {self.limits.page_timeout}s"}
+
+        if self.limits.max_rss_mb:
+            rss = _proc_status_bytes(slot['process'].pid, 'VmRSS')
+            if rss is not None:
+                used_mb = (rss - slot['baseline_rss']) / 1024 / 1024
+                if used_mb > self.limits.max_rss_mb:
+                    return {'reason': 'memory_limit',
+                            'detail': f"{used_mb:.0f} MB above baseline (limit {self.limits.max_rss_mb} MB)"}
+
+        return None
+
+    def _crash_reason(self, slot: Dict[str, Any]) -> Dict[str, str]:
+        """Describe how a worker died."""
+        slot['process'].join(timeout=5)
+        code = slot['process'].exitcode
+        if code is not None and code < 0:
+            try:
+                detail = f"killed by {signal.Signals(-code).name}"
+            except ValueError:
+                detail = f"killed by signal {-code}"
+        else:
+            detail = f"exit code {code}"
+        return {'reason': 'crashed', 'detail': detail}
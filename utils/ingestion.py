@@ -0,0 +1,245 @@
+"""
+Document ingestion from directories, archives and stdin.
+"""
+
+import io
+import os
+import sys
+import json
+import queue
+import asyncio
+import logging
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterator, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILENAME = 'config.json'
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+_SENTINEL = object()
+
+
+class DocumentIngestor:
+    """Reads PDFs as in-memory bytes with asynchronous, bounded prefetch."""
+
+    def __init__(self, source: str, prefetch: int = 4):
+        """
+        Initialize the ingestor for a source.
+
+        Args:
+            source: Directory, zip/tar archive path, or '-' for stdin
+            prefetch: Maximum number of documents read ahead of the parser
+        """
+        self.source = source
+        self.prefetch = max(1, prefetch)
+        self._archive = None
+
+        if source == '-':
+            # Stdin is spooled to memory once so archives can be read randomly
+            self._archive = self._open_archive(sys.stdin.buffer.read(), '<stdin>')
+        elif os.path.isfile(source) and source.lower().endswith(ARCHIVE_SUFFIXES):
+            with open(source, 'rb') as f:
+                self._archive = self._open_archive(f.read(), source)
+        elif not os.path.isdir(source):
+            raise FileNotFoundError(f"Input source '{source}' not found")
+
+    @staticmethod
+    def is_supported_source(source: str) -> bool:
+        """Check whether a path can be ingested."""
+        if source == '-':
+            return True
+        if os.path.isdir(source):
+            return True
+        return os.path.isfile(source) and source.lower().endswith(ARCHIVE_SUFFIXES)
+
+    def _open_archive(self, data: bytes, name: str) -> Dict[str, Any]:
+        """
+        Index an in-memory zip/tar archive or a bare PDF.
+
+        Args:
+            data: Raw bytes
+            name: Source name for logging
+
+        Returns:
+            Archive descriptor with a member-name to reader mapping
+        """
+        if data[:4] == b'%PDF':
+            return {'members': {'stdin.pdf': lambda: data}, 'name': name}
+
+        buffer = io.BytesIO(data)
+        members = {}
+        # Prefetch reads members from executor threads, but an archive shares one
+        # file position (and decompressor state for .tar.gz), so reads take turns
+        lock = threading.Lock()
+
+        if zipfile.is_zipfile(buffer):
+            archive = zipfile.ZipFile(buffer)
+            for info in archive.infolist():
+                if not info.is_dir():
+                    members[info.filename] = (lambda n=info.filename: _read_locked(lock, lambda: archive.read(n)))
+        else:
+            buffer.seek(0)
+            try:
+                archive = tarfile.open(fileobj=buffer, mode='r:*')
+            except tarfile.TarError:
+                raise ValueError(f"Unsupported input stream in {name}: expected PDF, zip or tar")
+            for info in archive.getmembers():
+                if info.isfile():
+                    members[info.name] = (lambda i=info: _read_locked(lock, lambda: archive.extractfile(i).read()))
+
+        # Skip resource-fork noise from archives created on macOS
+        members = {k: v for k, v in members.items() if '__MACOSX/' not in k}
+        logger.info(f"Opened archive {name} with {len(members)} members")
+        return {'members': members, 'name': name}
+
+    def load_config(self) -> Dict[str, Any]:
+        """
+        Load config.json from the source.
+
+        Returns:
+            Parsed configuration dictionary
+        """
+        if self._archive is None:
+            config_path = os.path.join(self.source, CONFIG_FILENAME)
+            if not os.path.exists(config_path):
+                raise FileNotFoundError("config.json not found in input directory")
+            with open(config_path, 'r') as f:
+                return json.load(f)
+
+        for member, read in self._archive['members'].items():
+            if os.path.basename(member) == CONFIG_FILENAME:
+                return json.loads(read().decode('utf-8'))
+
+        raise FileNotFoundError(f"config.json not found in {self._archive['name']}")
+
+    def list_documents(self) -> List[Tuple[str, str, Callable[[], bytes]]]:
+        """
+        List PDF documents in the source.
+
+        Returns:
+            Sorted list of (filename, display path, reader) tuples
+        """
+        documents = []
+
+        if self._archive is None:
+            for filename in sorted(os.listdir(self.source)):
+                if filename.lower().endswith('.pdf'):
+                    path = os.path.join(self.source, filename)
+                    documents.append((filename, path, (lambda p=path: _read_file(p))))
+        else:
+            for member, read in sorted(self._archive['members'].items()):
+                if member.lower().endswith('.pdf'):
+                    documents.append((os.path.basename(member), f"{self._archive['name']}:{member}", read))
+
+        return documents
+
+    def iter_documents(self, documents: Optional[List[Tuple[str, str, Callable[[], bytes]]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield documents as in-memory bytes, reading ahead in the background.
+
+        Reads run on an asyncio loop in a helper thread. At most `prefetch`
+        documents are being read or waiting in the buffer at any time, in
+        addition to the one last yielded, so parsing overlaps I/O without
+        loading the whole batch into memory.
+
+        Args:
+            documents: Entries from list_documents (defaults to all documents)
+
+        Yields:
+            Dictionaries with 'filename', 'path' and 'data' keys
+        """
+        if documents is None:
+            documents = self.list_documents()
+
+        # Bounded by the slots instead: one per document read or buffered
+        ready = queue.Queue()
+        slots = threading.Semaphore(self.prefetch)
+        stop = threading.Event()
+
+        thread = threading.Thread(
+            target=lambda: asyncio.run(self._produce(documents, ready, slots, stop)),
+            name='pdf-prefetch',
+            daemon=True
+        )
+        thread.start()
+
+        try:
+            while True:
+                item = ready.get()
+                if item is _SENTINEL:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                slots.release()
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    async def _produce(self, documents: List[Tuple[str, str, Callable[[], bytes]]],
+                       ready: 'queue.Queue', slots: threading.Semaphore, stop: threading.Event) -> None:
+        """
+        Read documents concurrently and hand them over in order.
+
+        Args:
+            documents: Entries from list_documents
+            ready: Hand-over queue to the consumer
+            slots: Prefetch slots; one is taken per read started and given back
+                by the consumer when it takes the document
+            stop: Set when the consumer stops early
+        """
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        entries = iter(documents)
+        exhausted = False
+
+        try:
+            while not stop.is_set():
+                while not exhausted and slots.acquire(blocking=False):
+                    entry = next(entries, None)
+                    if entry is None:
+                        slots.release()
+                        exhausted = True
+                        break
+                    filename, path, read = entry
+                    pending.append((filename, path, loop.run_in_executor(None, read)))
+
+                if not pending:
+                    if exhausted:
+                        break
+                    # Every slot is buffered for the consumer: wait until it takes one
+                    await loop.run_in_executor(None, _wait_for_slot, slots, stop)
+                    continue
+
+                filename, path, future = pending.popleft()
+                data = await future
+                ready.put({'filename': filename, 'path': path, 'data': data})
+        except Exception as e:
+            ready.put(e)
+            return
+
+        ready.put(_SENTINEL)
+
+
+def _wait_for_slot(slots: threading.Semaphore, stop: threading.Event) -> None:
+    """Block until a prefetch slot is free (leaving it free) or the consumer stops."""
+    while not stop.is_set():
+        if slots.acquire(timeout=0.05):
+            slots.release()
+            return
+
+
+def _read_file(path: str) -> bytes:
+    """Read a whole file into memory."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _read_locked(lock: threading.Lock, read: Callable[[], bytes]) -> bytes:
+    """Run an archive member read while holding the archive's lock."""
+    with lock:
+        return read()
@@ -2,18 +2,196 @@
 JSON output formatting utilities.
 """
 
+import os
 import json
+import stat
 import logging
+import tempfile
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional fast serializer; fall back to json
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Process umask, read once at import: os.umask can only be queried by setting it,
+# which would briefly affect files other threads create
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def dumps(data: Any, indent: bool = True) -> bytes:
+    """
+    Serialize data to UTF-8 JSON, using orjson when available.
+    
+    Args:
+        data: JSON-serializable data
+        indent: Pretty-print with two-space indentation
+        
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def fsync_directory(directory: str) -> None:
+    """
+    Flush a directory entry change (file creation or rename) to disk.
+    
+    Args:
+        directory: Directory whose entries changed
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # Directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replacement_mode(path: str) -> int:
+    """
+    Permission bits for a file that replaces path.
+    
+    Temporary files are created 0600; a replacement should keep the target's
+    mode, or get the mode a plain open() would have given a new file.
+    
+    Args:
+        path: File about to be replaced
+        
+    Returns:
+        Mode of the existing target, or 0666 minus the umask if there is none
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_atomic(data: Any, path: str) -> None:
+    """
+    Write JSON to a temporary file and rename it over the target.
+    
+    Readers never observe a partially written file, and a crash leaves the
+    previous result in place. The directory is synced after the rename, so
+    the new result also survives a power loss once this returns. The file
+    keeps the target's permissions (see replacement_mode).
+    
+    Args:
+        data: JSON-serializable data
+        path: Destination path
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps(data))
+            f.flush()
+            os.fchmod(f.fileno(), replacement_mode(path))
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    fsync_directory(directory)
+
+
+class NDJSONEventWriter:
+    """Appends pipeline progress events to a newline-delimited JSON stream."""
+    
+    def __init__(self, path: str):
+        """
+        Open the event stream.
+        
+        A record left incomplete by a crashed writer is terminated first, so
+        it does not run into the next event.
+        
+        Args:
+            path: NDJSON file to append to
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        
+        created = not os.path.exists(path)
+        # Unbuffered O_APPEND: every event is one write() at the end of the file,
+        # never interleaved with or split by another writer's buffer flushes
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if created:
+            fsync_directory(directory)
+        elif self._ends_with_partial_line():
+            self._write(b'\n')
+    
+    def _ends_with_partial_line(self) -> bool:
+        """Check whether the existing stream ends without a newline."""
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+    
+    def _write(self, data: bytes) -> None:
+        """Write bytes with as few write() calls as the OS allows (one for regular files)."""
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+    
+    def emit(self, event: str, **payload: Any) -> None:
+        """
+        Append one complete event line in a single write, visible to consumers immediately.
+        
+        Args:
+            event: Event name
+            **payload: Event fields
+        """
+        record = {'event': event, 'timestamp': datetime.utcnow().isoformat() + "Z"}
+        record.update(payload)
+        self._write(dumps(record, indent=False) + b'\n')
+    
+    def close(self) -> None:
+        """Close the stream."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self) -> 'NDJSONEventWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
 class JSONFormatter:
     """Handles JSON output formatting according to challenge specifications."""
     
+    # Number of ranked items emitted in the output
+    MAX_SECTIONS = 15
+    MAX_SUBSECTIONS = 20
+    
+    # Length limit of refined_text
+    MAX_REFINED_CHARS = 500
+    
     def format_output(self, documents: List[Dict], persona: str, job_to_be_done: str, 
-                     sections: List[Dict], subsections: List[Dict], processing_time: float) -> Dict[str, Any]:
+                     sections: List[Dict], subsections: List[Dict], processing_time: float,
+                     time_budget: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Format analysis results into required JSON structure.
         
@@ -24,6 +202,7 @@ class JSONFormatter:
             sections: Ranked sections
             subsections: Ranked subsections
             processing_time: Processing time in seconds
+            time_budget: Time budget summary (budget, elapsed, degradations) if one was set
             
         Returns:
             Formatted output dictionary
@@ -32,6 +211,8 @@ class JSONFormatter:
         
         # Format metadata
         metadata = self._format_metadata(documents, persona, job_to_be_done, processing_time)
+        if time_budget is not None:
+            metadata["time_budget"] = time_budget
         
         # Format extracted sections
         extracted_sections = self._format_extracted_sections(sections)
@@ -52,6 +233,29 @@ class JSONFormatter:
         
         return output
     
+    def write_output(self, output: Dict[str, Any], output_path: str) -> None:
+        """
+        Atomically write the formatted output to disk.
+        
+        Args:
+            output: Formatted output dictionary
+            output_path: Destination path
+        """
+        write_atomic(output, output_path)
+    
+    def open_event_stream(self, path: str) -> NDJSONEventWriter:
+        """
+        Open an NDJSON event stream for progress events.
+        
+        Args:
+            path: NDJSON file to append to
+            
+        Returns:
+            NDJSONEventWriter instance
+        """
+        logger.info(f"Streaming events to {path}")
+        return NDJSONEventWriter(path)
+    
     def _format_metadata(self, documents: List[Dict], persona: str, job_to_be_done: str, processing_time: float) -> Dict[str, Any]:
         """Format metadata section."""
         input_documents = []
@@ -62,6 +266,12 @@ class JSONFormatter:
                 "pages": doc['total_pages']
             })
         
+        # Documents that could not be extracted, with the structured reason
+        failed_documents = [
+            {"filename": doc['filename'], "reason": doc['error']['reason'], "detail": doc['error']['detail']}
+            for doc in documents if doc.get('error')
+        ]
+        
         return {
             "input_documents": input_documents,
             "persona": persona,
@@ -69,6 +279,7 @@ class JSONFormatter:
             "processing_timestamp": datetime.utcnow().isoformat() + "Z",
             "processing_time_seconds": round(processing_time, 2),
             "total_sections_extracted": len(input_documents),
+            "failed_documents": failed_documents,
             "system_version": "1.0.0"
         }
     
@@ -76,7 +287,7 @@ class JSONFormatter:
         """Format extracted sections."""
         formatted_sections = []
         
-        for section in sections[:15]:  # Limit to top 15 sections
+        for section in sections[:self.MAX_SECTIONS]:  # Limit to top 15 sections
             formatted_section = {
                 "document": section.get('document', ''),
                 "page_number": section.get('page_number', 1),
@@ -93,11 +304,12 @@ class JSONFormatter:
         """Format subsection analysis."""
         formatted_subsections = []
         
-        for subsection in subsections[:20]:  # Limit to top 20 subsections
+        for subsection in subsections[:self.MAX_SUBSECTIONS]:  # Limit to top 20 subsections
             formatted_subsection = {
                 "document": subsection.get('document', ''),
                 "section_title": subsection.get('section_title', ''),
-                "refined_text": subsection.get('refined_text', '')[:500],  # Limit text length
+                # Sentence-level extract when refined, else the truncated paragraph
+                "refined_text": subsection.get('refined_extract') or subsection.get('refined_text', '')[:self.MAX_REFINED_CHARS],
                 "page_number": subsection.get('page_number', 1),
                 "relevance_score": round(subsection.get('final_score', 0.0), 3)
             }
@@ -0,0 +1,185 @@
+"""
+Multi-pattern keyword matching for persona and job boosts.
+"""
+
+import re
+import math
+import logging
+from bisect import bisect_right
+from collections import Counter
+from typing import List, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Default persona keyword lists; the first persona term found in the persona
+# description selects its list.
+DEFAULT_PERSONA_KEYWORDS = {
+    'researcher': ['research', 'study', 'analysis', 'methodology', 'findings', 'literature'],
+    'student': ['learn', 'understand', 'concept', 'example', 'definition', 'explanation'],
+    'analyst': ['data', 'trend', 'performance', 'metrics', 'analysis', 'insights']
+}
+
+JOB_STOPWORDS = {'that', 'with', 'from', 'this', 'they'}
+
+
+def select_persona_keywords(persona: str, persona_keywords: Dict[str, List[str]]) -> List[str]:
+    """
+    Pick the keyword list for a persona description.
+
+    Args:
+        persona: Persona description
+        persona_keywords: Mapping of persona term to keyword list
+
+    Returns:
+        Keyword list of the first matching persona term (empty if none)
+    """
+    persona_lower = persona.lower()
+    for term, keywords in persona_keywords.items():
+        if term.lower() in persona_lower:
+            return list(keywords)
+    return []
+
+
+def extract_job_keywords(job_to_be_done: str, limit: int = 10) -> List[str]:
+    """
+    Extract the important keywords of a job description.
+
+    Args:
+        job_to_be_done: Job description
+        limit: Maximum number of keywords
+
+    Returns:
+        Keywords longer than four characters, in order of appearance
+    """
+    words = re.findall(r'\b\w+\b', job_to_be_done.lower())
+    important = [w for w in words if len(w) > 4 and w not in JOB_STOPWORDS]
+    return important[:limit]
+
+
+class KeywordMatcher:
+    """Scores keyword groups over many texts with one compiled regex."""
+
+    def __init__(self, groups: Dict[str, Dict[str, float]], caps: Dict[str, float]):
+        """
+        Compile keyword groups into a single alternation pattern.
+
+        Args:
+            groups: Mapping of group name to {keyword: boost per match}
+            caps: Maximum boost per group
+        """
+        self.caps = caps
+        self.keyword_weights = {}
+
+        for group, weights in groups.items():
+            for keyword, weight in weights.items():
+                keyword = keyword.lower()
+                self.keyword_weights.setdefault(keyword, {})
+                self.keyword_weights[keyword][group] = self.keyword_weights[keyword].get(group, 0.0) + weight
+
+        self.groups = list(groups.keys())
+
+        if self.keyword_weights:
+            # Every keyword that starts a word is credited, so keywords sharing a
+            # word ("trend" and "trends", "data" in "database") all count, and
+            # trailing word characters allow inflections ("research" -> "researchers").
+            # One optional lookahead group per keyword: case-insensitive matches such
+            # as 'ſtudy' do not lowercase back to the keyword, so matches are mapped
+            # by group index.
+            self.keywords = sorted(self.keyword_weights, key=len, reverse=True)
+            escaped = [re.escape(k) for k in self.keywords]
+            lookaheads = ''.join(f'(?=({k}))?' for k in escaped)
+            self.pattern = re.compile(rf'\b(?=(?:{"|".join(escaped)})){lookaheads}\w+', re.IGNORECASE)
+        else:
+            self.keywords = []
+            self.pattern = None
+
+    @classmethod
+    def for_context(cls, persona: str, job_to_be_done: str,
+                    persona_keywords: Dict[str, List[str]] = None) -> 'KeywordMatcher':
+        """
+        Build the persona/job matcher for one run.
+
+        Args:
+            persona: Persona description
+            job_to_be_done: Job description
+            persona_keywords: Persona keyword lists (defaults to DEFAULT_PERSONA_KEYWORDS)
+
+        Returns:
+            KeywordMatcher with 'persona' and 'job' groups
+        """
+        if persona_keywords is None:
+            persona_keywords = DEFAULT_PERSONA_KEYWORDS
+
+        persona_weights = {k.lower(): 0.1 for k in select_persona_keywords(persona, persona_keywords)}
+
+        job_weights = {}
+        for keyword in extract_job_keywords(job_to_be_done):
+            job_weights[keyword] = job_weights.get(keyword, 0.0) + 0.05
+
+        return cls({'persona': persona_weights, 'job': job_weights}, {'persona': 0.5, 'job': 0.3})
+
+    def compute_boosts(self, texts: Iterable[str]) -> List[Dict[str, float]]:
+        """
+        Compute group boosts for all texts in one pass over a shared buffer.
+
+        Each keyword counts at most once per text.
+
+        Args:
+            texts: Texts to score
+
+        Returns:
+            List of {group: boost} dictionaries aligned with texts
+        """
+        texts = list(texts)
+        boosts = [{group: 0.0 for group in self.groups} for _ in texts]
+
+        if not texts or self.pattern is None:
+            return boosts
+
+        # Offsets of each text inside the joined buffer
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+        buffer = '\n'.join(texts)
+
+        seen = [set() for _ in texts]
+        for match in self.pattern.finditer(buffer):
+            index = bisect_right(starts, match.start()) - 1
+            for keyword, found in zip(self.keywords, match.groups()):
+                if found is None or keyword in seen[index]:
+                    continue
+                seen[index].add(keyword)
+                for group, weight in self.keyword_weights[keyword].items():
+                    boosts[index][group] += weight
+
+        for boost in boosts:
+            for group, cap in self.caps.items():
+                if group in boost:
+                    boost[group] = min(cap, boost[group])
+
+        return boosts
+
+
+def lexical_similarity(text: str, query: str) -> float:
+    """
+    Cosine similarity of word counts, a cheap stand-in for semantic similarity.
+
+    Args:
+        text: Text to compare
+        query: Query text
+
+    Returns:
+        Similarity score (0-1)
+    """
+    text_counts = Counter(w for w in re.findall(r'\w+', text.lower()) if len(w) > 2)
+    query_counts = Counter(w for w in re.findall(r'\w+', query.lower()) if len(w) > 2)
+
+    if not text_counts or not query_counts:
+        return 0.0
+
+    dot = sum(count * text_counts[w] for w, count in query_counts.items())
+    text_norm = math.sqrt(sum(c * c for c in text_counts.values()))
+    query_norm = math.sqrt(sum(c * c for c in query_counts.values()))
+    return dot / (text_norm * query_norm)
@@ -3,111 +3,364 @@ PDF processing utilities for document section extraction.
 """
 
 import fitz  # PyMuPDF
+import os
 import re
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any
+import tempfile
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 
+import numpy as np
+
+from utils.json_formatter import replacement_mode
+
 logger = logging.getLogger(__name__)
 
+# Span flag bit PyMuPDF sets for bold text
+BOLD_FLAG = 16
+
+
+class ExtractionError(Exception):
+    """Extraction refused or aborted for a documented reason."""
+    
+    def __init__(self, reason: str, detail: str):
+        super().__init__(f"{reason}: {detail}")
+        self.reason = reason
+        self.detail = detail
+
+
 class PDFProcessor:
     """Handles PDF text extraction and section identification."""
     
-    def __init__(self):
-        """Initialize PDF processor."""
+    # Bumped when the cached line format changes
+    CACHE_VERSION = 1
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_pages: Optional[int] = None):
+        """
+        Initialize PDF processor.
+        
+        Args:
+            cache_dir: Directory for page line caches keyed by file hash (disabled if omitted)
+            max_pages: Documents with more pages are refused (no limit if omitted)
+        """
         self.section_patterns = [
             r'^(Abstract|Introduction|Background|Literature Review|Methodology|Methods|Results|Discussion|Conclusion|References).*$',
             r'^(\d+\.?\s+[A-Z][^.]*?)$',
             r'^([A-Z][A-Z\s]+)$',
             r'^([A-Z][a-z\s]+:?\s*)$'
         ]
+        
+        self.cache_dir = cache_dir
+        self.max_pages = max_pages
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
     
-    def extract_sections(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def extract_sections(self, pdf_path: str, stream: Optional[bytes] = None, deadline: Optional[float] = None,
+                         min_pages: int = 1, stats: Optional[Dict[str, Any]] = None,
+                         on_page: Optional[Callable[[int], None]] = None) -> List[Dict[str, Any]]:
         """
         Extract sections from PDF with proper structure detection.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file (names the document when stream is given)
+            stream: In-memory PDF bytes to parse instead of reading pdf_path
+            deadline: time.monotonic() deadline after which remaining pages are skipped
+            min_pages: Leading pages always parsed, even past the deadline
+            stats: Optional dictionary filled with 'pages_total' and 'pages_parsed',
+                and with 'error' ({'reason', 'detail'}) if extraction fails
+            on_page: Called with the page index before each page is parsed
             
         Returns:
-            List of section dictionaries
+            List of section dictionaries (empty if extraction fails)
         """
         try:
-            doc = fitz.open(pdf_path)
-            sections = []
-            current_section = None
+            lines = self.extract_lines(pdf_path, stream=stream, deadline=deadline, min_pages=min_pages,
+                                       on_page=on_page)
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Extract text with formatting
-                blocks = page.get_text("dict")["blocks"]
-                
-                for block in blocks:
-                    if "lines" not in block:
-                        continue
-                    
-                    for line in block["lines"]:
-                        line_text = ""
-                        font_sizes = []
-                        
-                        for span in line["spans"]:
-                            text = span["text"].strip()
-                            if text:
-                                line_text += text + " "
-                                font_sizes.append(span["size"])
-                        
-                        line_text = line_text.strip()
-                        if not line_text:
-                            continue
-                        
-                        # Determine if this is a section header
-                        avg_font_size = sum(font_sizes) / len(font_sizes) if font_sizes else 12
-                        is_header = self._is_section_header(line_text, avg_font_size)
-                        
-                        if is_header:
-                            # Save previous section
-                            if current_section and current_section['content'].strip():
-                                sections.append(current_section)
-                            
-                            # Start new section
-                            current_section = {
-                                'document': Path(pdf_path).stem,
-                                'section_title': line_text,
-                                'page_number': page_num + 1,
-                                'content': '',
-                                'font_size': avg_font_size
-                            }
-                        else:
-                            # Add to current section
-                            if current_section:
-                                current_section['content'] += line_text + "\n"
-                            else:
-                                # Create default section if none exists
-                                current_section = {
-                                    'document': Path(pdf_path).stem,
-                                    'section_title': 'Content',
-                                    'page_number': page_num + 1,
-                                    'content': line_text + "\n",
-                                    'font_size': 12
-                                }
-            
-            # Add final section
-            if current_section and current_section['content'].strip():
-                sections.append(current_section)
+            if stats is not None:
+                stats['pages_total'] = lines['pages_total']
+                stats['pages_parsed'] = lines['pages_parsed']
             
-            doc.close()
-            
-            # Clean up sections
-            sections = self._cleanup_sections(sections)
+            sections = self.segment_lines(lines, Path(pdf_path).stem)
             
             logger.info(f"Extracted {len(sections)} sections from {pdf_path}")
             return sections
             
         except Exception as e:
             logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
+            if stats is not None:
+                if isinstance(e, ExtractionError):
+                    stats['error'] = {'reason': e.reason, 'detail': e.detail}
+                elif isinstance(e, MemoryError):
+                    stats['error'] = {'reason': 'memory_limit', 'detail': 'allocation failed'}
+                else:
+                    stats['error'] = {'reason': 'parse_error', 'detail': f"{type(e).__name__}: {str(e)}"}
             return []
     
+    def extract_lines(self, pdf_path: str, stream: Optional[bytes] = None, deadline: Optional[float] = None,
+                      min_pages: int = 1, on_page: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Extract the text lines of a PDF with their layout, using the page cache if enabled.
+        
+        Args:
+            pdf_path: Path to PDF file
+            stream: In-memory PDF bytes to parse instead of reading pdf_path
+            deadline: time.monotonic() deadline after which remaining pages are skipped
+            min_pages: Leading pages always parsed, even past the deadline
+            on_page: Called with the page index before each page is parsed
+            
+        Returns:
+            Line columns: 'text' (list), 'page' (0-based), 'font_size' (span
+            average), 'bold', 'bbox' (n x 4), plus 'pages_total' and 'pages_parsed'
+        """
+        if not self.cache_dir:
+            if stream is not None:
+                doc = fitz.open(stream=stream, filetype='pdf')
+            else:
+                doc = fitz.open(pdf_path)
+            return self._parse_lines(doc, deadline, min_pages, on_page)
+        
+        data = stream if stream is not None else Path(pdf_path).read_bytes()
+        cache_path = os.path.join(self.cache_dir, hashlib.sha256(data).hexdigest() + '.npz')
+        
+        lines = self.load_lines(cache_path)
+        if lines is not None:
+            self._check_page_count(lines['pages_total'])
+            return lines
+        
+        lines = self._parse_lines(fitz.open(stream=data, filetype='pdf'), deadline, min_pages, on_page)
+        
+        # Only complete parses are cached
+        if lines['pages_parsed'] == lines['pages_total']:
+            self.save_lines(lines, cache_path, Path(pdf_path).name)
+        return lines
+    
+    def _check_page_count(self, pages: int) -> None:
+        """Refuse documents above the page limit."""
+        if self.max_pages is not None and pages > self.max_pages:
+            raise ExtractionError('too_many_pages', f"{pages} pages (limit {self.max_pages})")
+    
+    def _parse_lines(self, doc, deadline: Optional[float], min_pages: int,
+                     on_page: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Parse the text lines of an open PyMuPDF document.
+        
+        Args:
+            doc: fitz document (closed afterwards)
+            deadline: time.monotonic() deadline after which remaining pages are skipped
+            min_pages: Leading pages always parsed, even past the deadline
+            on_page: Called with the page index before each page is parsed
+            
+        Returns:
+            Line columns (see extract_lines)
+        """
+        try:
+            self._check_page_count(len(doc))
+        except ExtractionError:
+            doc.close()
+            raise
+        
+        texts, pages, font_sizes, bold, bboxes = [], [], [], [], []
+        pages_parsed = 0
+        
+        for page_num in range(len(doc)):
+            # Leading pages carry the headers; later pages are dropped when out of time
+            if deadline is not None and page_num >= min_pages and time.monotonic() > deadline:
+                break
+            
+            if on_page is not None:
+                on_page(page_num)
+            
+            pages_parsed += 1
+            page = doc.load_page(page_num)
+            
+            # Extract text with formatting
+            blocks = page.get_text("dict")["blocks"]
+            
+            for block in blocks:
+                if "lines" not in block:
+                    continue
+                
+                for line in block["lines"]:
+                    line_text = ""
+                    sizes = []
+                    flags = []
+                    
+                    for span in line["spans"]:
+                        text = span["text"].strip()
+                        if text:
+                            line_text += text + " "
+                            sizes.append(span["size"])
+                            flags.append(span["flags"])
+                    
+                    line_text = line_text.strip()
+                    if not line_text:
+                        continue
+                    
+                    texts.append(line_text)
+                    pages.append(page_num)
+                    font_sizes.append(sum(sizes) / len(sizes))
+                    bold.append(all(f & BOLD_FLAG for f in flags))
+                    bboxes.append(line["bbox"])
+        
+        lines = {
+            'text': texts,
+            'page': np.array(pages, dtype=np.int32),
+            'font_size': np.array(font_sizes, dtype=np.float64),
+            'bold': np.array(bold, dtype=bool),
+            'bbox': np.array(bboxes, dtype=np.float32).reshape(-1, 4),
+            'pages_total': len(doc),
+            'pages_parsed': pages_parsed
+        }
+        
+        doc.close()
+        return lines
+    
+    def save_lines(self, lines: Dict[str, Any], path: str, source: str = '') -> None:
+        """
+        Write line columns to a compressed .npz file (atomically).
+        
+        Texts are stored as one UTF-8 buffer with offsets.
+        
+        Args:
+            lines: Line columns from extract_lines
+            path: Destination file
+            source: Filename the lines came from (informational)
+        """
+        encoded = [text.encode('utf-8') for text in lines['text']]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    version=self.CACHE_VERSION,
+                    source=source,
+                    pages_total=lines['pages_total'],
+                    text_bytes=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                    text_offsets=offsets,
+                    page=lines['page'],
+                    font_size=lines['font_size'],
+                    bold=lines['bold'],
+                    bbox=lines['bbox']
+                )
+                os.fchmod(f.fileno(), replacement_mode(path))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def load_lines(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Read line columns written by save_lines.
+        
+        Args:
+            path: Cache file
+            
+        Returns:
+            Line columns, or None if the file is missing, stale or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with np.load(path) as data:
+                if int(data['version']) != self.CACHE_VERSION:
+                    return None
+                
+                buffer = data['text_bytes'].tobytes()
+                offsets = data['text_offsets']
+                pages_total = int(data['pages_total'])
+                
+                return {
+                    'text': [buffer[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)],
+                    'page': data['page'],
+                    'font_size': data['font_size'],
+                    'bold': data['bold'],
+                    'bbox': data['bbox'],
+                    'pages_total': pages_total,
+                    'pages_parsed': pages_total,
+                    'source': str(data['source'])
+                }
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable page cache {path}: {str(e)}")
+            return None
+    
+    def segment_lines(self, lines: Dict[str, Any], document: str) -> List[Dict[str, Any]]:
+        """
+        Group extracted lines into sections using the header heuristics.
+        
+        Args:
+            lines: Line columns from extract_lines
+            document: Document name recorded on the sections
+            
+        Returns:
+            List of section dictionaries
+        """
+        sections = []
+        current_section = None
+        
+        for line_text, page_num, font_size in zip(lines['text'], lines['page'].tolist(), lines['font_size'].tolist()):
+            # Determine if this is a section header
+            is_header = self._is_section_header(line_text, font_size)
+            
+            if is_header:
+                # Save previous section
+                if current_section and current_section['content'].strip():
+                    sections.append(current_section)
+                
+                # Start new section
+                current_section = {
+                    'document': document,
+                    'section_title': line_text,
+                    'page_number': page_num + 1,
+                    'content': '',
+                    'font_size': font_size
+                }
+            else:
+                # Add to current section
+                if current_section:
+                    current_section['content'] += line_text + "\n"
+                else:
+                    # Create default section if none exists
+                    current_section = {
+                        'document': document,
+                        'section_title': 'Content',
+                        'page_number': page_num + 1,
+                        'content': line_text + "\n",
+                        'font_size': 12
+                    }
+        
+        # Add final section
+        if current_section and current_section['content'].strip():
+            sections.append(current_section)
+        
+        # Clean up sections
+        return self._cleanup_sections(sections)
+    
+    def resegment_cache(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Re-run segmentation over every cached document without parsing PDFs.
+        
+        Meant for tuning section_patterns and the header thresholds.
+        
+        Returns:
+            Mapping of cache file name to sections (documents named after their source file)
+        """
+        results = {}
+        for name in sorted(os.listdir(self.cache_dir)):
+            if not name.endswith('.npz'):
+                continue
+            lines = self.load_lines(os.path.join(self.cache_dir, name))
+            if lines is not None:
+                results[name] = self.segment_lines(lines, Path(lines['source'] or name).stem)
+        return results
+    
     def _is_section_header(self, text: str, font_size: float) -> bool:
         """
         Determine if text is likely a section header.
@@ -166,3 +419,29 @@ class PDFProcessor:
             cleaned_sections.append(section)
         
         return cleaned_sections
+
+
+_worker_processor = None
+
+
+def extract_sections_worker(filename: str, data: bytes, deadline: Optional[float] = None,
+                            cache_dir: Optional[str] = None):
+    """
+    Extract sections in a parse worker process.
+    
+    Args:
+        filename: Document filename
+        data: PDF bytes
+        deadline: time.monotonic() deadline for skipping later pages
+        cache_dir: Page line cache directory (disabled if omitted)
+        
+    Returns:
+        Tuple of (sections, stats)
+    """
+    global _worker_processor
+    if _worker_processor is None or _worker_processor.cache_dir != cache_dir:
+        _worker_processor = PDFProcessor(cache_dir=cache_dir)
+    
+    stats = {}
+    sections = _worker_processor.extract_sections(filename, stream=data, deadline=deadline, stats=stats)
+    return sections, stats
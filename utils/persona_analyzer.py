@@ -2,26 +2,42 @@
 Persona-aware document analysis utilities.
 """
 
+import time
 import logging
-from typing import List, Dict, Any
-import re
+from typing import List, Dict, Any, Optional, Tuple
 from models.embeddings import EmbeddingEngine
+from utils.keyword_matcher import KeywordMatcher, lexical_similarity
+from utils.query_context import QueryContext
+from utils.scoring_spec import ScoringSpec
+from utils.time_budget import TimeBudget
 
 logger = logging.getLogger(__name__)
 
+# Texts encoded per batch when scoring under a time budget
+SCORE_CHUNK_SIZE = 64
+
 class PersonaAnalyzer:
     """Analyzes documents with persona context."""
     
-    def __init__(self, embedding_engine: EmbeddingEngine):
+    def __init__(self, embedding_engine: EmbeddingEngine, persona_keywords: Optional[Dict[str, List[str]]] = None,
+                 scoring_spec: Optional[ScoringSpec] = None):
         """
         Initialize persona analyzer.
         
         Args:
             embedding_engine: Embedding engine instance
+            persona_keywords: Persona term to keyword list mapping (defaults built in)
+            scoring_spec: Section relevance weights (defaults to DEFAULT_SCORING_SPEC)
         """
         self.embedding_engine = embedding_engine
+        self.persona_keywords = persona_keywords
+        self.scoring_spec = scoring_spec or ScoringSpec()
+        self._seconds_per_text = None
     
-    def analyze_documents(self, documents: List[Dict], persona: str, job_to_be_done: str) -> Dict[str, Any]:
+    def analyze_documents(self, documents: List[Dict], persona: str, job_to_be_done: str,
+                          persona_keywords: Optional[Dict[str, List[str]]] = None,
+                          query_context: Optional[QueryContext] = None,
+                          budget: Optional[TimeBudget] = None) -> Dict[str, Any]:
         """
         Analyze documents with persona context.
         
@@ -29,25 +45,51 @@ class PersonaAnalyzer:
             documents: List of document dictionaries
             persona: Persona description
             job_to_be_done: Job to be done description
+            persona_keywords: Per-run override of the persona keyword lists
+            query_context: Precomputed query embeddings (encoded here if omitted)
+            budget: Optional time budget; when it runs out, remaining sections are
+                scored lexically and subsection analysis is reduced or skipped
             
         Returns:
             Analysis results with sections and subsections
         """
         logger.info("Starting persona-aware document analysis...")
         
+        if query_context is None:
+            query_context = QueryContext(self.embedding_engine, persona, job_to_be_done)
+        
         # Create context for analysis
-        context = f"{persona} needs to {job_to_be_done}"
+        context = query_context.texts['analysis']
+        
+        all_sections = [section for doc in documents for section in doc['sections']]
+        section_texts = [self._section_text(section) for section in all_sections]
+        
+        relevances = self._compute_section_relevances(
+            all_sections, section_texts, persona, job_to_be_done,
+            persona_keywords or self.persona_keywords, query_context, budget
+        )
+        
+        relevant = []
+        for section, section_relevance in zip(all_sections, relevances):
+            if section_relevance > 0.3:  # Threshold for relevance
+                relevant.append((section, section_relevance))
+        
+        persona_matches, job_relevances = self._score_persona_and_job(relevant, query_context, budget)
         
         sections = []
-        subsections = []
+        for (section, section_relevance), persona_match, job_relevance in zip(relevant, persona_matches, job_relevances):
+            sections.append({
+                'document': section['document'],
+                'section_title': section['section_title'],
+                'page_number': section['page_number'],
+                'content': section['content'],
+                'relevance_score': section_relevance,
+                'persona_match': persona_match,
+                'job_relevance': job_relevance
+            })
         
-        for doc in documents:
-            doc_sections = self._analyze_document_sections(
-                doc, context, persona, job_to_be_done
-            )
-            
-            sections.extend(doc_sections['sections'])
-            subsections.extend(doc_sections['subsections'])
+        # Subsection analysis runs last so it is the first thing cut under a budget
+        subsections = self._extract_subsections(relevant, query_context, budget)
         
         logger.info(f"Analysis complete: {len(sections)} sections, {len(subsections)} subsections")
         
@@ -57,103 +99,167 @@ class PersonaAnalyzer:
             'context': context
         }
     
-    def _analyze_document_sections(self, document: Dict, context: str, persona: str, job_to_be_done: str) -> Dict[str, List]:
+    def _score_sections(self, sections: List[Dict], texts: List[str], query_context: QueryContext,
+                        budget: Optional[TimeBudget]) -> List[float]:
         """
-        Analyze sections of a single document.
-
+        Compute context similarity of every section text.
+        
+        Without a budget all texts are encoded in one batch. With a budget,
+        texts are encoded in chunks, earliest pages first; once the analysis
+        deadline passes the remaining sections get a lexical score instead.
+        
         Args:
-            document: Document dictionary
-            context: Analysis context
-            persona: Persona description
-            job_to_be_done: Job description
-
+            sections: Section dictionaries
+            texts: Section texts aligned with sections
+            query_context: Precomputed query embeddings
+            budget: Optional time budget
+            
         Returns:
-            Dictionary with sections and subsections
+            Similarity scores aligned with texts
         """
-        sections = []
-        subsections = []
-
-        for section in document['sections']:
-            # Analyze section relevance
-            section_relevance = self._compute_section_relevance(
-                section, context, persona, job_to_be_done
-            )
-
-            if section_relevance > 0.3:  # Threshold for relevance
-                sections.append({
-                    'document': section['document'],
-                    'section_title': section['section_title'],
-                    'page_number': section['page_number'],
-                    'content': section['content'],
-                    'relevance_score': section_relevance,
-                    'persona_match': self._assess_persona_match(section['content'], persona),
-                    'job_relevance': self._assess_job_relevance(section['content'], job_to_be_done)
-                })
-
-                # Extract subsections
-                section_subsections = self._extract_subsections(section, context, persona, job_to_be_done)
-                subsections.extend(section_subsections)
-
-        # Return the full list of subsections, not the last section's subsections
-        return {'sections': sections, 'subsections': subsections}
-
+        query_vector = query_context.vector('analysis')
+        
+        if budget is None:
+            return self.embedding_engine.score_texts(query_vector, texts)
+        
+        similarities = [0.0] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: (sections[i]['page_number'], i))
+        
+        encoded = 0
+        chunk_start = time.monotonic()
+        for start in range(0, len(order), SCORE_CHUNK_SIZE):
+            chunk = order[start:start + SCORE_CHUNK_SIZE]
+            
+            if budget.stage_expired('analysis'):
+                rest = order[start:]
+                for i in rest:
+                    similarities[i] = lexical_similarity(texts[i], query_context.texts['analysis'])
+                budget.degrade('analysis', 'lexical_scoring', sections=len(rest))
+                break
+            
+            scores = self.embedding_engine.score_texts(query_vector, [texts[i] for i in chunk])
+            for i, score in zip(chunk, scores):
+                similarities[i] = score
+            encoded += len(chunk)
+        
+        if encoded:
+            self._seconds_per_text = (time.monotonic() - chunk_start) / encoded
+        
+        return similarities
     
-    def _compute_section_relevance(self, section: Dict, context: str, persona: str, job_to_be_done: str) -> float:
+    def _score_persona_and_job(self, relevant: List[Tuple[Dict, float]], query_context: QueryContext,
+                               budget: Optional[TimeBudget]) -> Tuple[List[float], List[float]]:
         """
-        Compute relevance score for a section.
+        Score relevant section contents against the persona and the job.
         
         Args:
-            section: Section dictionary
-            context: Analysis context
-            persona: Persona description
-            job_to_be_done: Job description
+            relevant: (section, relevance) pairs
+            query_context: Precomputed query embeddings
+            budget: Optional time budget
             
         Returns:
-            Relevance score (0-1)
+            Tuple of (persona matches, job relevances)
         """
-        # Combine section title and content for analysis
-        section_text = f"{section['section_title']} {section['content'][:500]}"
-        
-        # Compute semantic similarity with context
-        similarity = self.embedding_engine.compute_similarity(section_text, context)
-        
-        # Boost for persona-specific keywords
-        persona_boost = self._get_persona_boost(section_text, persona)
+        if not relevant:
+            return [], []
         
-        # Boost for job-specific keywords
-        job_boost = self._get_job_boost(section_text, job_to_be_done)
+        contents = [section['content'] for section, _ in relevant]
         
-        # Combined score
-        relevance = similarity + (persona_boost * 0.2) + (job_boost * 0.2)
+        if budget is not None and budget.stage_expired('analysis'):
+            budget.degrade('analysis', 'lexical_persona_job_match', sections=len(contents))
+            return (
+                [lexical_similarity(c, query_context.persona) for c in contents],
+                [lexical_similarity(c, query_context.job_to_be_done) for c in contents]
+            )
         
-        return min(1.0, relevance)
+        # Encode the relevant contents once for both persona and job matching
+        embeddings = self.embedding_engine.encode(contents)
+        return (
+            (embeddings @ query_context.vector('persona')).tolist(),
+            (embeddings @ query_context.vector('job')).tolist()
+        )
+    
+    def _section_text(self, section: Dict) -> str:
+        """Text used for section relevance: title plus the start of the content."""
+        return f"{section['section_title']} {section['content'][:500]}"
     
-    def _extract_subsections(self, section: Dict, context: str, persona: str, job_to_be_done: str) -> List[Dict]:
+    def _compute_section_relevances(self, sections: List[Dict], texts: List[str], persona: str,
+                                    job_to_be_done: str, persona_keywords: Optional[Dict[str, List[str]]],
+                                    query_context: QueryContext, budget: Optional[TimeBudget]) -> List[float]:
         """
-        Extract and analyze subsections from a section.
+        Compute relevance scores of all sections from the scoring spec.
+        
+        Features are similarity with the analysis context and the persona/job
+        keyword boosts; a feature with zero weight is not computed.
         
         Args:
-            section: Section dictionary
-            context: Analysis context
+            sections: Section dictionaries
+            texts: Section texts aligned with sections
             persona: Persona description
             job_to_be_done: Job description
+            persona_keywords: Persona keyword lists (defaults built in)
+            query_context: Precomputed query embeddings
+            budget: Optional time budget
             
         Returns:
-            List of subsection dictionaries
+            Relevance scores aligned with sections
         """
-        subsections = []
-        content = section['content']
+        boosts = []
+        
+        def boost(group: str) -> List[float]:
+            if not boosts:
+                # Compile persona/job keywords once and score every section in one pass
+                matcher = KeywordMatcher.for_context(persona, job_to_be_done, persona_keywords)
+                boosts.extend(matcher.compute_boosts(texts))
+            return [b.get(group, 0.0) for b in boosts]
+        
+        return self.scoring_spec.evaluate('relevance', {
+            # Encode every section once and score against the precomputed context vector
+            'similarity': lambda: self._score_sections(sections, texts, query_context, budget),
+            'persona_boost': lambda: boost('persona'),
+            'job_boost': lambda: boost('job')
+        }, len(sections)).tolist()
+    
+    def _extract_subsections(self, relevant: List[Tuple[Dict, float]], query_context: QueryContext,
+                             budget: Optional[TimeBudget] = None) -> List[Dict]:
+        """
+        Extract and analyze subsections from relevant sections.
         
-        # Split content into paragraphs
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip() and len(p.strip()) > 100]
+        Under a budget, paragraphs of the most relevant sections go first; the
+        paragraph count is capped to what the measured encode rate allows in
+        the time left, and analysis stops at the subsection deadline.
         
-        for i, paragraph in enumerate(paragraphs):
-            if len(paragraph) < 100:  # Skip very short paragraphs
-                continue
+        Args:
+            relevant: (section, relevance) pairs
+            query_context: Precomputed query embeddings
+            budget: Optional time budget
             
-            # Compute relevance
-            relevance = self.embedding_engine.compute_similarity(paragraph, context)
+        Returns:
+            List of subsection dictionaries
+        """
+        candidates = []
+        
+        for section, _ in relevant:
+            # Split content into paragraphs
+            paragraphs = [p.strip() for p in section['content'].split('\n') if p.strip() and len(p.strip()) > 100]
             
+            for i, paragraph in enumerate(paragraphs):
+                candidates.append((section, i, paragraph))
+        
+        query_vector = query_context.vector('analysis')
+        
+        if budget is None:
+            # Compute relevance for all paragraphs in one batch
+            relevances = self.embedding_engine.score_texts(
+                query_vector, [paragraph for _, _, paragraph in candidates]
+            )
+            scored = list(range(len(candidates)))
+        else:
+            scored, relevances = self._score_paragraphs_budgeted(candidates, relevant, query_vector, budget)
+        
+        subsections = []
+        for index, relevance in zip(scored, relevances):
+            section, i, paragraph = candidates[index]
             if relevance > 0.4:  # Higher threshold for subsections
                 subsections.append({
                     'document': section['document'],
@@ -166,50 +272,47 @@ class PersonaAnalyzer:
         
         return subsections
     
-    def _assess_persona_match(self, content: str, persona: str) -> float:
-        """Assess how well content matches the persona."""
-        return self.embedding_engine.compute_similarity(content, persona)
-    
-    def _assess_job_relevance(self, content: str, job_to_be_done: str) -> float:
-        """Assess how relevant content is to the job."""
-        return self.embedding_engine.compute_similarity(content, job_to_be_done)
-    
-    def _get_persona_boost(self, text: str, persona: str) -> float:
-        """Get boost score based on persona-specific keywords."""
-        persona_lower = persona.lower()
-        text_lower = text.lower()
-        
-        boost = 0.0
-        
-        # Extract key terms from persona
-        if 'researcher' in persona_lower:
-            keywords = ['research', 'study', 'analysis', 'methodology', 'findings', 'literature']
-        elif 'student' in persona_lower:
-            keywords = ['learn', 'understand', 'concept', 'example', 'definition', 'explanation']
-        elif 'analyst' in persona_lower:
-            keywords = ['data', 'trend', 'performance', 'metrics', 'analysis', 'insights']
-        else:
-            keywords = []
+    def _score_paragraphs_budgeted(self, candidates: List[Tuple[Dict, int, str]], relevant: List[Tuple[Dict, float]],
+                                   query_vector, budget: TimeBudget) -> Tuple[List[int], List[float]]:
+        """
+        Score paragraphs in priority order until the subsection deadline.
         
-        for keyword in keywords:
-            if keyword in text_lower:
-                boost += 0.1
+        Args:
+            candidates: (section, paragraph index, paragraph) tuples
+            relevant: (section, relevance) pairs
+            query_vector: Analysis query vector
+            budget: Time budget
+            
+        Returns:
+            Tuple of (scored candidate indices in original order, relevances)
+        """
+        if not candidates:
+            return [], []
         
-        return min(0.5, boost)
-    
-    def _get_job_boost(self, text: str, job_to_be_done: str) -> float:
-        """Get boost score based on job-specific keywords."""
-        job_lower = job_to_be_done.lower()
-        text_lower = text.lower()
+        if budget.stage_expired('subsections'):
+            budget.degrade('subsections', 'skipped', paragraphs=len(candidates))
+            return [], []
         
-        boost = 0.0
+        section_relevance = {id(section): relevance for section, relevance in relevant}
+        order = sorted(range(len(candidates)), key=lambda i: -section_relevance[id(candidates[i][0])])
         
-        # Extract key terms from job description
-        job_keywords = re.findall(r'\b\w+\b', job_lower)
-        important_keywords = [w for w in job_keywords if len(w) > 4 and w not in ['that', 'with', 'from', 'this', 'they']]
+        # Lower granularity: only as many paragraphs as the measured encode rate allows
+        seconds_per_text = self._seconds_per_text
+        if seconds_per_text:
+            affordable = max(1, int(budget.stage_remaining('subsections') / seconds_per_text))
+            if affordable < len(order):
+                budget.degrade('subsections', 'top_sections_only', paragraphs=len(order) - affordable)
+                order = order[:affordable]
         
-        for keyword in important_keywords[:10]:  # Limit to top 10 keywords
-            if keyword in text_lower:
-                boost += 0.05
+        scores = {}
+        for start in range(0, len(order), SCORE_CHUNK_SIZE):
+            if budget.stage_expired('subsections'):
+                budget.degrade('subsections', 'stopped_at_deadline', paragraphs=len(order) - start)
+                break
+            
+            chunk = order[start:start + SCORE_CHUNK_SIZE]
+            chunk_scores = self.embedding_engine.score_texts(query_vector, [candidates[i][2] for i in chunk])
+            scores.update(zip(chunk, chunk_scores))
         
-        return min(0.3, boost)
+        scored = sorted(scores)
+        return scored, [scores[i] for i in scored]
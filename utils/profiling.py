@@ -0,0 +1,185 @@
+"""
+On-demand CPU and memory profiling of a pipeline run.
+"""
+
+import os
+import sys
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample', 'memory')
+
+
+class RunProfiler:
+    """Context manager that profiles a run and writes the reports to a directory."""
+
+    def __init__(self, mode: str, output_dir: str, interval: float = 0.005, memory_interval: float = 0.1,
+                 memory_frames: int = 4, top_allocations: int = 25):
+        """
+        Initialize profiler.
+
+        Outputs (in output_dir):
+            cprofile mode: profile.pstats and profile.txt (top functions)
+            sample mode: profile.collapsed (collapsed stacks for flamegraph tools)
+            memory mode: memory_top.txt and memory.snapshot (tracemalloc at the peak)
+
+        Only memory mode traces allocations, so CPU timings are not skewed by
+        tracemalloc and memory reports do not include the CPU profilers' own data.
+
+        Args:
+            mode: 'cprofile' (deterministic), 'sample' (low-overhead stack sampling)
+                or 'memory' (allocation sites at peak traced memory)
+            output_dir: Directory for the profile files
+            interval: Seconds between stack samples in sample mode
+            memory_interval: Seconds between traced memory checks in memory mode
+            memory_frames: Frames stored per allocation in memory mode
+            top_allocations: Allocation sites listed in memory_top.txt
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self.memory_interval = memory_interval
+        self.memory_frames = memory_frames
+        self.top_allocations = top_allocations
+
+        self._profile = None
+        self._sampler = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self._start = None
+        self._peak_snapshot = None
+        self._peak_size = 0
+        self._peak_elapsed = 0.0
+
+    def __enter__(self) -> 'RunProfiler':
+        self._start = time.monotonic()
+
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.mode == 'sample':
+            target = threading.get_ident()
+            self._sampler = threading.Thread(target=self._sample, args=(target,), name='profile-sampler', daemon=True)
+            self._sampler.start()
+        else:
+            tracemalloc.start(self.memory_frames)
+            self._sampler = threading.Thread(target=self._watch_memory, name='profile-memory', daemon=True)
+            self._sampler.start()
+
+        logger.info(f"Profiling run ({self.mode})")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        if self.mode == 'cprofile':
+            self._write_cprofile()
+        elif self.mode == 'sample':
+            self._write_collapsed()
+        else:
+            try:
+                self._check_peak()
+                self._write_memory()
+            finally:
+                tracemalloc.stop()
+
+    def _sample(self, target: int) -> None:
+        """Sample the target thread's stack until stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+
+            self._stacks[';'.join(reversed(stack))] += 1
+
+    def _watch_memory(self) -> None:
+        """Snapshot allocations whenever traced memory reaches a new high, until stopped."""
+        while not self._stop.wait(self.memory_interval):
+            self._check_peak()
+
+    def _check_peak(self) -> None:
+        """Replace the kept snapshot if traced memory grew by more than 5% since it was taken."""
+        current, _ = tracemalloc.get_traced_memory()
+        if self._peak_snapshot is None or current > self._peak_size * 1.05:
+            self._peak_snapshot = tracemalloc.take_snapshot()
+            self._peak_size = current
+            self._peak_elapsed = time.monotonic() - self._start
+
+    def _write_cprofile(self) -> None:
+        """Write pstats data and a readable summary."""
+        stats_path = os.path.join(self.output_dir, 'profile.pstats')
+        self._profile.dump_stats(stats_path)
+
+        with open(os.path.join(self.output_dir, 'profile.txt'), 'w') as f:
+            stats = pstats.Stats(self._profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(40)
+
+        logger.info(f"CPU profile saved to {stats_path}")
+
+    def _write_collapsed(self) -> None:
+        """Write sampled stacks in collapsed format (one 'a;b;c count' per line)."""
+        collapsed_path = os.path.join(self.output_dir, 'profile.collapsed')
+
+        with open(collapsed_path, 'w') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        logger.info(f"Sampled {sum(self._stacks.values())} stacks to {collapsed_path}")
+
+    def _write_memory(self) -> None:
+        """Write the top allocation sites at the peak snapshot and the raw snapshot."""
+        snapshot = self._peak_snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot.dump(os.path.join(self.output_dir, 'memory.snapshot'))
+
+        top_path = os.path.join(self.output_dir, 'memory_top.txt')
+        with open(top_path, 'w') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB\n")
+            f.write(f"Snapshot at {self._peak_elapsed:.2f}s with {self._peak_size / 1024 / 1024:.1f} MiB traced\n\n")
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                f.write(f"{stat}\n")
+
+        logger.info(f"Memory profile saved to {top_path} (peak {peak / 1024 / 1024:.1f} MiB)")
+
+
+def maybe_profile(mode: Optional[str], output_dir: str):
+    """
+    Return a profiler for the mode, or a no-op context manager if mode is empty.
+
+    Args:
+        mode: Profile mode or None
+        output_dir: Directory for the profile files
+
+    Returns:
+        Context manager
+    """
+    if not mode:
+        return nullcontext()
+    return RunProfiler(mode, output_dir)
@@ -0,0 +1,117 @@
+"""
+Precomputed query embeddings for a persona/job request.
+"""
+
+import logging
+from typing import Dict, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from utils.keyword_matcher import extract_job_keywords
+
+if TYPE_CHECKING:
+    from models.embeddings import EmbeddingEngine
+
+logger = logging.getLogger(__name__)
+
+# Default fusion per scoring role: which query variants make up each query vector
+DEFAULT_FUSION = {
+    'analysis': {'analysis': 1.0},
+    'ranking': {'ranking': 1.0}
+}
+
+
+class QueryContext:
+    """Encodes every query variant of a request once and fuses them per scoring role."""
+
+    def __init__(self, embedding_engine: 'EmbeddingEngine', persona: str, job_to_be_done: str,
+                 fusion: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Encode the query variants of a request in one batch.
+
+        Variants:
+            persona: persona description
+            job: job description
+            analysis: "<persona> needs to <job>" (section/paragraph relevance)
+            ranking: "<persona> <job>" (hybrid ranking, also the TF-IDF query)
+            context: "Persona: <persona>. Task: <job>"
+            keywords: expanded job keywords
+
+        Args:
+            embedding_engine: Embedding engine instance
+            persona: Persona description
+            job_to_be_done: Job description
+            fusion: Per-role {variant: weight} overrides of DEFAULT_FUSION (an unknown
+                role or variant raises ValueError)
+        """
+        self.persona = persona
+        self.job_to_be_done = job_to_be_done
+
+        self.texts = {
+            'persona': persona,
+            'job': job_to_be_done,
+            'analysis': f"{persona} needs to {job_to_be_done}",
+            'ranking': f"{persona} {job_to_be_done}",
+            'context': f"Persona: {persona}. Task: {job_to_be_done}",
+            'keywords': ' '.join(extract_job_keywords(job_to_be_done)) or job_to_be_done
+        }
+
+        self.fusion = {role: dict(weights) for role, weights in DEFAULT_FUSION.items()}
+        if fusion:
+            # Variant names are roles too (vector('persona') looks them up here)
+            unknown = set(fusion) - set(DEFAULT_FUSION) - set(self.texts)
+            if unknown:
+                raise ValueError(f"Unknown scoring roles in query fusion: {sorted(unknown)}")
+            for role, weights in fusion.items():
+                self._check_variants(weights)
+                self.fusion[role] = dict(weights)
+
+        names = list(self.texts)
+        embeddings = embedding_engine.encode([self.texts[name] for name in names])
+        self.vectors = {name: embeddings[i] for i, name in enumerate(names)}
+
+        self._fused = {}
+
+        logger.info(f"Encoded {len(names)} query variants")
+
+    def vector(self, role: str) -> np.ndarray:
+        """
+        Get the (fused) query vector for a scoring role or a single variant.
+
+        Args:
+            role: Scoring role from the fusion table, or a variant name
+
+        Returns:
+            Normalized float32 query vector
+        """
+        if role not in self._fused:
+            weights = self.fusion.get(role, {role: 1.0})
+            self._fused[role] = self.fuse(weights)
+        return self._fused[role]
+
+    def fuse(self, weights: Dict[str, float]) -> np.ndarray:
+        """
+        Combine query variants into one normalized vector.
+
+        Args:
+            weights: Mapping of variant name to weight
+
+        Returns:
+            Normalized float32 vector
+        """
+        self._check_variants(weights)
+
+        fused = np.zeros_like(self.vectors['analysis'])
+        for name, weight in weights.items():
+            fused += weight * self.vectors[name]
+
+        norm = np.linalg.norm(fused)
+        if norm > 0:
+            fused = fused / norm
+        return fused.astype(np.float32)
+
+    def _check_variants(self, weights: Dict[str, float]) -> None:
+        """Raise ValueError if fusion weights name a variant that does not exist."""
+        unknown = set(weights) - set(self.texts)
+        if unknown:
+            raise ValueError(f"Unknown query variants in fusion weights: {sorted(unknown)}")
@@ -3,32 +3,44 @@ Ranking engine for section and subsection prioritization.
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from models.embeddings import EmbeddingEngine
+from utils.query_context import QueryContext
+from utils.scoring_spec import ScoringSpec
+from utils.time_budget import TimeBudget
+
+if TYPE_CHECKING:
+    from models.embeddings import EmbeddingEngine
 
 logger = logging.getLogger(__name__)
 
+# Texts encoded per batch when scoring under a time budget
+SCORE_CHUNK_SIZE = 64
+
 class RankingEngine:
     """Handles ranking of sections and subsections."""
     
-    def __init__(self, embedding_engine: EmbeddingEngine):
+    def __init__(self, embedding_engine: 'EmbeddingEngine', scoring_spec: Optional[ScoringSpec] = None):
         """
         Initialize ranking engine.
         
         Args:
             embedding_engine: Embedding engine instance
+            scoring_spec: Hybrid score weights (defaults to DEFAULT_SCORING_SPEC)
         """
         self.embedding_engine = embedding_engine
+        self.scoring_spec = scoring_spec or ScoringSpec()
         self.tfidf_vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2)
         )
     
-    def rank_sections(self, sections: List[Dict], persona: str, job_to_be_done: str) -> List[Dict]:
+    def rank_sections(self, sections: List[Dict], persona: str, job_to_be_done: str,
+                      reuse_scores: bool = False, query_context: Optional[QueryContext] = None,
+                      budget: Optional[TimeBudget] = None) -> List[Dict]:
         """
         Rank sections based on relevance to persona and job.
         
@@ -36,6 +48,10 @@ class RankingEngine:
             sections: List of section dictionaries
             persona: Persona description
             job_to_be_done: Job description
+            reuse_scores: Keep 'final_score' of sections scored by an earlier call
+            query_context: Precomputed query embeddings (encoded here if omitted)
+            budget: Optional time budget; past the ranking deadline the remaining
+                sections are scored lexically (TF-IDF in place of semantic similarity)
             
         Returns:
             Ranked list of sections
@@ -45,15 +61,10 @@ class RankingEngine:
         
         logger.info(f"Ranking {len(sections)} sections...")
         
-        # Create query context
-        query = f"{persona} {job_to_be_done}"
-        
         # Compute hybrid scores
+        self._score_items(sections, persona, job_to_be_done, reuse_scores, query_context, budget)
+        
         for i, section in enumerate(sections):
-            hybrid_score = self._compute_hybrid_score(
-                section, query, persona, job_to_be_done
-            )
-            section['final_score'] = hybrid_score
             section['importance_rank'] = i  # Will be updated after sorting
         
         # Sort by final score
@@ -70,7 +81,9 @@ class RankingEngine:
         
         return ranked_sections
     
-    def rank_subsections(self, subsections: List[Dict], persona: str, job_to_be_done: str) -> List[Dict]:
+    def rank_subsections(self, subsections: List[Dict], persona: str, job_to_be_done: str,
+                         reuse_scores: bool = False, query_context: Optional[QueryContext] = None,
+                         budget: Optional[TimeBudget] = None) -> List[Dict]:
         """
         Rank subsections based on relevance.
         
@@ -78,6 +91,10 @@ class RankingEngine:
             subsections: List of subsection dictionaries
             persona: Persona description
             job_to_be_done: Job description
+            reuse_scores: Keep 'final_score' of subsections scored by an earlier call
+            query_context: Precomputed query embeddings (encoded here if omitted)
+            budget: Optional time budget; past the ranking deadline the remaining
+                subsections are scored lexically (TF-IDF in place of semantic similarity)
             
         Returns:
             Ranked list of subsections
@@ -87,14 +104,9 @@ class RankingEngine:
         
         logger.info(f"Ranking {len(subsections)} subsections...")
         
-        query = f"{persona} {job_to_be_done}"
-        
         # Compute scores for subsections
-        for subsection in subsections:
-            hybrid_score = self._compute_hybrid_score(
-                subsection, query, persona, job_to_be_done, is_subsection=True
-            )
-            subsection['final_score'] = hybrid_score
+        self._score_items(subsections, persona, job_to_be_done, reuse_scores, query_context, budget,
+                          is_subsection=True)
         
         # Sort by score
         subsections.sort(key=lambda x: x['final_score'], reverse=True)
@@ -103,50 +115,133 @@ class RankingEngine:
         
         return subsections
     
-    def _compute_hybrid_score(self, item: Dict, query: str, persona: str, job_to_be_done: str, is_subsection: bool = False) -> float:
+    def merge_ranked_sections(self, candidates: List[Dict]) -> List[Dict]:
         """
-        Compute hybrid ranking score combining multiple factors.
+        Merge per-shard section candidates into one global ranking.
+        
+        Candidates carry their 'final_score' and an '_order' key giving their
+        position in single-node analysis order, so ties break exactly as a
+        single-node stable sort would before the diversity filter runs.
         
         Args:
-            item: Section or subsection dictionary
-            query: Query context
-            persona: Persona description
-            job_to_be_done: Job description
-            is_subsection: Whether item is a subsection
+            candidates: Section candidates from all shards
             
         Returns:
-            Hybrid score
+            Ranked and diversity-filtered sections
         """
-        # Get text content
-        if is_subsection:
-            text = item.get('refined_text', '')
-        else:
-            text = f"{item.get('section_title', '')} {item.get('content', '')}"
+        sections = sorted(candidates, key=lambda x: (-x['final_score'], x['_order']))
         
-        if not text:
-            return 0.0
+        for i, section in enumerate(sections):
+            section['importance_rank'] = i
         
-        # 1. Semantic similarity (70% weight)
-        semantic_score = self.embedding_engine.compute_similarity(text, query)
+        return self._apply_diversity_filter(sections)
+    
+    def merge_ranked_subsections(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        Merge per-shard subsection candidates into one global ranking.
         
-        # 2. TF-IDF similarity (20% weight)
-        tfidf_score = self._compute_tfidf_similarity(text, query)
+        Args:
+            candidates: Subsection candidates from all shards (with '_order')
+            
+        Returns:
+            Ranked subsections
+        """
+        return sorted(candidates, key=lambda x: (-x['final_score'], x['_order']))
+    
+    def _score_items(self, items: List[Dict], persona: str, job_to_be_done: str, reuse_scores: bool,
+                     query_context: Optional[QueryContext], budget: Optional[TimeBudget] = None,
+                     is_subsection: bool = False) -> None:
+        """
+        Set 'final_score' on items from the scoring spec's weighted features.
         
-        # 3. Position boost (10% weight) - earlier sections get slight boost
-        position_boost = self._get_position_boost(item)
+        Features are computed for all pending items at once and only if their
+        weight is non-zero; item texts are encoded in one batch.
         
-        # 4. Existing relevance score bonus
-        existing_relevance = item.get('relevance_score', 0.0)
+        Args:
+            items: Section or subsection dictionaries
+            persona: Persona description
+            job_to_be_done: Job description
+            reuse_scores: Skip items that already have a 'final_score'
+            query_context: Precomputed query embeddings (encoded here if omitted)
+            budget: Optional time budget
+            is_subsection: Whether items are subsections
+        """
+        pending = [item for item in items if not (reuse_scores and 'final_score' in item)]
+        if not pending:
+            return
+        
+        if query_context is None:
+            query_context = QueryContext(self.embedding_engine, persona, job_to_be_done)
+        
+        query = query_context.texts['ranking']
+        texts = [self._item_text(item, is_subsection) for item in pending]
+        
+        tfidf_scores = {}
+        
+        def tfidf(i: int) -> float:
+            if i not in tfidf_scores:
+                tfidf_scores[i] = self._compute_tfidf_similarity(texts[i], query) if texts[i] else 0.0
+            return tfidf_scores[i]
+        
+        def semantic() -> List[float]:
+            # Semantic similarity of every non-empty text against the ranking query vector
+            scored = [i for i, text in enumerate(texts) if text]
+            if budget is not None:
+                # Most relevant items first, so they keep semantic scores if time runs out
+                scored.sort(key=lambda i: -pending[i].get('relevance_score', 0.0))
+            semantic_scores = self._semantic_scores(scored, texts, query_context, budget, is_subsection)
+            # Lexically scored items use the TF-IDF score in its place
+            return [semantic_scores[i] if i in semantic_scores else tfidf(i) for i in range(len(pending))]
+        
+        scores = self.scoring_spec.evaluate('subsections' if is_subsection else 'sections', {
+            'semantic': semantic,
+            'tfidf': lambda: [tfidf(i) for i in range(len(pending))],
+            'position': lambda: [self._get_position_boost(item) for item in pending],
+            'relevance': lambda: [item.get('relevance_score', 0.0) for item in pending]
+        }, len(pending))
+        
+        for item, text, score in zip(pending, texts, scores):
+            item['final_score'] = float(score) if text else 0.0
+    
+    def _semantic_scores(self, indices: List[int], texts: List[str], query_context: QueryContext,
+                         budget: Optional[TimeBudget], is_subsection: bool) -> Dict[int, float]:
+        """
+        Compute semantic scores, in priority chunks when under a time budget.
         
-        # Combine scores
-        hybrid_score = (
-            semantic_score * 0.7 +
-            tfidf_score * 0.2 +
-            position_boost * 0.1 +
-            existing_relevance * 0.1
-        )
+        Args:
+            indices: Indices of texts to score
+            texts: Item texts
+            query_context: Precomputed query embeddings
+            budget: Optional time budget
+            is_subsection: Whether items are subsections
+            
+        Returns:
+            Mapping of index to semantic score; indices left out fall back to lexical scoring
+        """
+        query_vector = query_context.vector('ranking')
+        
+        if budget is None:
+            similarities = self.embedding_engine.score_texts(query_vector, [texts[i] for i in indices])
+            return dict(zip(indices, similarities))
+        
+        scores = {}
+        for start in range(0, len(indices), SCORE_CHUNK_SIZE):
+            if budget.stage_expired('ranking'):
+                budget.degrade('ranking', 'lexical_scoring',
+                               items='subsections' if is_subsection else 'sections',
+                               count=len(indices) - start)
+                break
+            
+            chunk = indices[start:start + SCORE_CHUNK_SIZE]
+            scores.update(zip(chunk, self.embedding_engine.score_texts(query_vector, [texts[i] for i in chunk])))
         
-        return min(1.0, hybrid_score)
+        return scores
+    
+    def _item_text(self, item: Dict, is_subsection: bool) -> str:
+        """Text of a section (title and content) or subsection (refined text)."""
+        if is_subsection:
+            return item.get('refined_text', '')
+        return f"{item.get('section_title', '')} {item.get('content', '')}"
     
     def _compute_tfidf_similarity(self, text: str, query: str) -> float:
         """
@@ -0,0 +1,200 @@
+"""
+CPU resource detection and thread allocation between parsing and inference.
+"""
+
+import os
+import json
+import math
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+CGROUP_V2_MEMORY_MAX = '/sys/fs/cgroup/memory.max'
+CGROUP_V1_MEMORY_LIMIT = '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+
+# Memory kept for the main process (model and ranking state) and needed by
+# each parse worker process when sizing the worker count to a memory quota
+MAIN_PROCESS_MEMORY = 1024 * 1024 * 1024
+PARSE_WORKER_MEMORY = 256 * 1024 * 1024
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_CGROUP_V1_UNLIMITED = 1 << 60
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    """Read the first line of a file, or None if it cannot be read."""
+    try:
+        with open(path, 'r') as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    Read the container CPU quota from cgroup v2 or v1.
+
+    Returns:
+        Number of CPUs the quota allows, or None if unlimited/unknown
+    """
+    cpu_max = _read_first_line(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+
+    quota = _read_first_line(CGROUP_V1_QUOTA)
+    period = _read_first_line(CGROUP_V1_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+
+    return None
+
+
+def cgroup_memory_limit() -> Optional[int]:
+    """
+    Read the container memory limit from cgroup v2 or v1.
+
+    Returns:
+        Limit in bytes, or None if unlimited/unknown
+    """
+    memory_max = _read_first_line(CGROUP_V2_MEMORY_MAX)
+    if memory_max:
+        return None if memory_max == 'max' else int(memory_max)
+
+    limit = _read_first_line(CGROUP_V1_MEMORY_LIMIT)
+    if limit and int(limit) < _CGROUP_V1_UNLIMITED:
+        return int(limit)
+
+    return None
+
+
+def _positive_int(value: Any, name: str) -> int:
+    """Parse a worker or thread count, naming the setting if it is not a positive integer."""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return value
+
+
+def available_cpus() -> int:
+    """
+    Count CPUs this process may use: affinity mask capped by the cgroup quota.
+
+    Returns:
+        Number of usable CPUs (at least 1)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+
+    return max(1, cpus)
+
+
+class ResourceManager:
+    """Splits the available cores between PDF parse workers and encoder threads."""
+
+    def __init__(self, cpus: Optional[int] = None, parse_workers: Optional[int] = None,
+                 intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                 memory_limit: Optional[int] = None):
+        """
+        Initialize the core split; unset values are derived from the CPU count.
+
+        Args:
+            cpus: Usable CPUs (detected if omitted)
+            parse_workers: PDF extraction worker processes (1 = in-process)
+            intra_op_threads: Torch intra-op threads for the encoder
+            inter_op_threads: Torch inter-op threads for the encoder
+            memory_limit: Container memory limit in bytes (detected if omitted); caps
+                the default number of parse workers
+        """
+        self.cpus = cpus or available_cpus()
+        self.memory_limit = memory_limit or cgroup_memory_limit()
+
+        if parse_workers is None:
+            # Extraction and encoding mostly run one after the other, but prefetch
+            # and worker processes overlap them, so parsing gets about a third
+            parse_workers = max(1, self.cpus // 3)
+            if self.memory_limit is not None:
+                fits = (self.memory_limit - MAIN_PROCESS_MEMORY) // PARSE_WORKER_MEMORY
+                parse_workers = max(1, min(parse_workers, fits))
+        self.parse_workers = _positive_int(parse_workers, 'parse_workers')
+
+        if intra_op_threads is None:
+            intra_op_threads = max(1, self.cpus - self.parse_workers)
+        self.intra_op_threads = _positive_int(intra_op_threads, 'intra_op_threads')
+        self.inter_op_threads = _positive_int(1 if inter_op_threads is None else inter_op_threads,
+                                              'inter_op_threads')
+
+    @classmethod
+    def from_environment(cls, profile_path: Optional[str] = None) -> 'ResourceManager':
+        """
+        Build the split from a calibration profile and environment overrides.
+
+        Precedence: PARSE_WORKERS / TORCH_INTRA_OP_THREADS / TORCH_INTER_OP_THREADS,
+        then the calibration profile, then the defaults. Each must be a positive
+        integer (PARSE_WORKERS=1 parses in-process); anything else raises ValueError.
+
+        Args:
+            profile_path: Calibration profile written by --calibrate
+
+        Returns:
+            ResourceManager instance
+        """
+        settings = {}
+        if profile_path and os.path.exists(profile_path):
+            with open(profile_path, 'r') as f:
+                settings = json.load(f).get('best', {})
+            logger.info(f"Loaded resource profile from {profile_path}")
+
+        for key, env in (('parse_workers', 'PARSE_WORKERS'),
+                         ('intra_op_threads', 'TORCH_INTRA_OP_THREADS'),
+                         ('inter_op_threads', 'TORCH_INTER_OP_THREADS')):
+            if os.getenv(env):
+                settings[key] = _positive_int(os.environ[env], env)
+
+        manager = cls(
+            parse_workers=settings.get('parse_workers'),
+            intra_op_threads=settings.get('intra_op_threads'),
+            inter_op_threads=settings.get('inter_op_threads')
+        )
+        logger.info(f"Resource split: {manager.as_dict()}")
+        return manager
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the split as a dictionary."""
+        return {
+            'cpus': self.cpus,
+            'memory_limit': self.memory_limit,
+            'parse_workers': self.parse_workers,
+            'intra_op_threads': self.intra_op_threads,
+            'inter_op_threads': self.inter_op_threads
+        }
+
+    def candidate_splits(self) -> List[Tuple[int, int]]:
+        """
+        List (parse_workers, intra_op_threads) splits worth benchmarking.
+
+        Returns:
+            Unique candidate splits
+        """
+        worker_options = sorted({1, max(1, self.cpus // 4), max(1, self.cpus // 3),
+                                 max(1, self.cpus // 2), max(1, self.cpus - 1)})
+
+        candidates = []
+        for workers in worker_options:
+            for threads in sorted({max(1, self.cpus - workers), self.cpus}):
+                if (workers, threads) not in candidates:
+                    candidates.append((workers, threads))
+        return candidates
@@ -0,0 +1,150 @@
+"""
+Declarative scoring spec: features and weights of each score.
+"""
+
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # Optional; JSON specs work without it
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+# Features each score can use, in evaluation order
+FEATURES = {
+    # Section relevance in PersonaAnalyzer (filtered at 0.3)
+    'relevance': ('similarity', 'persona_boost', 'job_boost'),
+    # Hybrid ranking scores in RankingEngine
+    'sections': ('semantic', 'tfidf', 'position', 'relevance'),
+    'subsections': ('semantic', 'tfidf', 'position', 'relevance')
+}
+
+DEFAULT_SCORING_SPEC = {
+    'relevance': {
+        'weights': {'similarity': 1.0, 'persona_boost': 0.2, 'job_boost': 0.2},
+        'max_score': 1.0
+    },
+    'sections': {
+        'weights': {'semantic': 0.7, 'tfidf': 0.2, 'position': 0.1, 'relevance': 0.1},
+        'max_score': 1.0
+    },
+    'subsections': {
+        'weights': {'semantic': 0.7, 'tfidf': 0.2, 'position': 0.1, 'relevance': 0.1},
+        'max_score': 1.0
+    }
+}
+
+
+def _number(value: Any, key: str) -> float:
+    """Convert a spec value to a finite float, naming the key if it is not one."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+        raise ValueError(f"Scoring spec value {key} must be a finite number, got {value!r}")
+    return float(value)
+
+
+class ScoringSpec:
+    """Weights per score, evaluated as a feature matrix times a weight vector."""
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None):
+        """
+        Build a spec from overrides of DEFAULT_SCORING_SPEC.
+
+        Each score may set 'weights' ({feature: weight}; unlisted features keep
+        their default weight) and 'max_score' (upper clip, null for none).
+
+        Args:
+            spec: Mapping of score name to overrides
+        """
+        self.scores = {}
+        for name, default in DEFAULT_SCORING_SPEC.items():
+            self.scores[name] = {'weights': dict(default['weights']), 'max_score': default['max_score']}
+
+        for name, overrides in (spec or {}).items():
+            if name not in FEATURES:
+                raise ValueError(f"Unknown score '{name}', expected one of {list(FEATURES)}")
+            if not isinstance(overrides, dict) or not isinstance(overrides.get('weights', {}), dict):
+                raise ValueError(f"Score '{name}' must be a mapping with a 'weights' mapping")
+
+            for feature, weight in overrides.get('weights', {}).items():
+                if feature not in FEATURES[name]:
+                    raise ValueError(f"Unknown feature '{feature}' for score '{name}', expected one of {FEATURES[name]}")
+                self.scores[name]['weights'][feature] = _number(weight, f"{name}.weights.{feature}")
+
+            if 'max_score' in overrides:
+                max_score = overrides['max_score']
+                self.scores[name]['max_score'] = None if max_score is None else _number(max_score, f"{name}.max_score")
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ScoringSpec':
+        """
+        Load a spec from a JSON or YAML file.
+
+        Args:
+            path: Spec file (.json, .yaml or .yml)
+
+        Returns:
+            ScoringSpec instance
+        """
+        with open(path, 'r') as f:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                if yaml is None:
+                    raise ImportError(f"PyYAML is required to read {path}; use a JSON spec instead")
+                spec = yaml.safe_load(f)
+            else:
+                spec = json.load(f)
+
+        logger.info(f"Loaded scoring spec from {path}")
+        return cls(spec)
+
+    def weight(self, name: str, feature: str) -> float:
+        """Weight of a feature in a score."""
+        return self.scores[name]['weights'].get(feature, 0.0)
+
+    def active_features(self, name: str) -> List[str]:
+        """Features of a score with a non-zero weight, in evaluation order."""
+        return [feature for feature in FEATURES[name] if self.weight(name, feature) != 0.0]
+
+    def evaluate(self, name: str, providers: Dict[str, Callable[[], Any]], count: int) -> np.ndarray:
+        """
+        Compute a score for a batch of items.
+
+        Only features with a non-zero weight are computed, so turning a feature
+        off also skips its cost.
+
+        Args:
+            name: Score name from FEATURES
+            providers: Mapping of feature to a callable returning its values for all items
+            count: Number of items
+
+        Returns:
+            Float array of scores
+        """
+        features = self.active_features(name)
+        if not features or count == 0:
+            return np.zeros(count)
+
+        missing = [feature for feature in features if feature not in providers]
+        if missing:
+            raise ValueError(f"No values provided for features {missing} of score '{name}'")
+
+        matrix = np.empty((count, len(features)))
+        for column, feature in enumerate(features):
+            matrix[:, column] = providers[feature]()
+
+        scores = matrix @ np.array([self.weight(name, feature) for feature in features])
+
+        max_score = self.scores[name]['max_score']
+        if max_score is not None:
+            scores = np.minimum(scores, max_score)
+        return scores
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the full spec (defaults included) as a dictionary."""
+        return {name: {'weights': dict(score['weights']), 'max_score': score['max_score']}
+                for name, score in self.scores.items()}
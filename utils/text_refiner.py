@@ -0,0 +1,111 @@
+"""
+Sentence-level extractive refinement of subsection text.
+"""
+
+import re
+import logging
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+from utils.time_budget import TimeBudget
+
+if TYPE_CHECKING:
+    from models.embeddings import EmbeddingEngine
+    from utils.query_context import QueryContext
+
+logger = logging.getLogger(__name__)
+
+# Sentence boundary: end punctuation followed by whitespace and an uppercase
+# letter, digit, quote or bracket
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])')
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences.
+
+    Args:
+        text: Paragraph text
+
+    Returns:
+        Non-empty sentences in order
+    """
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+class SentenceRefiner:
+    """Picks the most query-relevant sentences of long subsections."""
+
+    def __init__(self, embedding_engine: 'EmbeddingEngine', max_chars: int = 500):
+        """
+        Initialize refiner.
+
+        Args:
+            embedding_engine: Embedding engine instance (its cache is reused)
+            max_chars: Length budget of the refined text
+        """
+        self.embedding_engine = embedding_engine
+        self.max_chars = max_chars
+
+    def refine(self, subsections: List[Dict], query_context: 'QueryContext',
+               budget: Optional[TimeBudget] = None) -> None:
+        """
+        Set 'refined_extract' on subsections longer than the length budget.
+
+        Call this with the subsections that will be emitted only. Their
+        sentences are encoded in one batch and scored against the analysis
+        query; the best ones that fit the budget are kept in document order.
+
+        Args:
+            subsections: Ranked subsections to be emitted
+            query_context: Precomputed query embeddings
+            budget: Optional time budget; refinement is skipped once it runs out
+        """
+        long_items = [s for s in subsections if len(s.get('refined_text', '')) > self.max_chars]
+        if not long_items:
+            return
+
+        if budget is not None and budget.remaining() <= 0:
+            budget.degrade('refinement', 'truncated', subsections=len(long_items))
+            return
+
+        sentences = [split_sentences(s['refined_text']) for s in long_items]
+        flat = [sentence for item_sentences in sentences for sentence in item_sentences]
+        scores = self.embedding_engine.score_texts(query_context.vector('analysis'), flat, cached=True)
+
+        position = 0
+        for subsection, item_sentences in zip(long_items, sentences):
+            item_scores = scores[position:position + len(item_sentences)]
+            position += len(item_sentences)
+            subsection['refined_extract'] = self._select(item_sentences, item_scores)
+
+        logger.info(f"Refined {len(long_items)} subsections from {len(flat)} sentences")
+
+    def _select(self, sentences: List[str], scores: List[float]) -> str:
+        """
+        Select sentences by score within the length budget.
+
+        The best sentence is always kept, cut to the budget if it alone is
+        too long; lower-scored sentences are added while they fit.
+
+        Args:
+            sentences: Sentences in document order
+            scores: Relevance of each sentence
+
+        Returns:
+            Selected sentences joined in document order
+        """
+        order = sorted(range(len(sentences)), key=lambda i: -scores[i])
+
+        best = sentences[order[0]]
+        if len(best) > self.max_chars:
+            return best[:self.max_chars]
+
+        chosen = [order[0]]
+        length = len(best)
+        for i in order[1:]:
+            needed = len(sentences[i]) + 1
+            if length + needed <= self.max_chars:
+                chosen.append(i)
+                length += needed
+
+        return ' '.join(sentences[i] for i in sorted(chosen))
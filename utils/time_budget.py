@@ -0,0 +1,102 @@
+"""
+Wall-clock budget tracking for deadline-aware processing.
+"""
+
+import time
+import logging
+from typing import List, Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the budget by which each stage should be finished; the rest is
+# reserved for formatting and writing the output.
+STAGE_SHARES = {
+    'extraction': 0.45,
+    'analysis': 0.70,
+    'subsections': 0.80,
+    'ranking': 0.90
+}
+
+
+class TimeBudget:
+    """Tracks a wall-clock budget, per-stage deadlines and applied degradations."""
+
+    def __init__(self, seconds: float, start: Optional[float] = None,
+                 stage_shares: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize time budget.
+
+        Args:
+            seconds: Total budget in seconds
+            start: Start time on the clock (defaults to now)
+            stage_shares: Overrides of STAGE_SHARES
+            clock: Time source; deadlines are times on it (time.monotonic by default,
+                which extraction deadlines in worker processes rely on)
+        """
+        if seconds <= 0:
+            raise ValueError("Time budget must be positive")
+
+        self.seconds = seconds
+        self.clock = clock
+        self.start = clock() if start is None else start
+        self.stage_shares = dict(STAGE_SHARES)
+        if stage_shares:
+            self.stage_shares.update(stage_shares)
+        self.degradations: List[Dict[str, Any]] = []
+
+    def elapsed(self) -> float:
+        """Seconds since the start of the budget."""
+        return self.clock() - self.start
+
+    def remaining(self) -> float:
+        """Seconds left in the total budget (may be negative)."""
+        return self.seconds - self.elapsed()
+
+    def stage_deadline(self, stage: str) -> float:
+        """
+        Get the clock deadline of a stage.
+
+        Args:
+            stage: Stage name from STAGE_SHARES
+
+        Returns:
+            Absolute deadline
+        """
+        return self.start + self.seconds * self.stage_shares[stage]
+
+    def stage_remaining(self, stage: str) -> float:
+        """Seconds left until a stage's deadline (may be negative)."""
+        return self.stage_deadline(stage) - self.clock()
+
+    def stage_expired(self, stage: str) -> bool:
+        """Check whether a stage's deadline has passed."""
+        return self.stage_remaining(stage) <= 0
+
+    def degrade(self, stage: str, action: str, **details: Any) -> None:
+        """
+        Record a degradation applied to stay within the budget.
+
+        Args:
+            stage: Stage that was degraded
+            action: Short description of what was reduced
+            **details: Counts or other specifics
+        """
+        entry = {'stage': stage, 'action': action, 'elapsed_seconds': round(self.elapsed(), 2)}
+        entry.update(details)
+        self.degradations.append(entry)
+        logger.warning(f"Time budget: {stage} degraded ({action}) {details}")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the budget for the output metadata.
+
+        Returns:
+            Dictionary with budget, elapsed time and degradations
+        """
+        return {
+            'time_budget_seconds': self.seconds,
+            'elapsed_seconds': round(self.elapsed(), 2),
+            'degraded': bool(self.degradations),
+            'degradations': list(self.degradations)
+        }
@@ -0,0 +1,151 @@
+"""
+Directory watching with inotify wake-ups and a polling fallback.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Iterator, Tuple
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Optional dependency; fall back to polling
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryWatcher:
+    """Reports debounced batches of added, modified and removed files."""
+
+    def __init__(self, directory: str, suffixes: Tuple[str, ...] = ('.pdf', 'config.json'),
+                 poll_interval: float = 1.0, debounce: float = 2.0):
+        """
+        Initialize directory watcher.
+
+        Args:
+            directory: Directory to watch (non-recursive)
+            suffixes: Lower-case filename suffixes to track
+            poll_interval: Seconds between polls (also the inotify wait timeout)
+            debounce: Quiet period in seconds before a batch of changes is reported
+        """
+        self.directory = directory
+        self.suffixes = suffixes
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._inotify = None
+        self._reported = {}
+        # Consecutive failed batches; retries back off exponentially
+        self._failures = 0
+        self._retried = False
+        self._retry_at = 0.0
+
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                watch_flags = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO |
+                               inotify_flags.MOVED_FROM | inotify_flags.DELETE | inotify_flags.CREATE)
+                self._inotify.add_watch(directory, watch_flags)
+                logger.info(f"Watching {directory} with inotify")
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+                self._inotify = None
+        if self._inotify is None:
+            logger.info(f"Watching {directory} by polling every {poll_interval}s")
+
+    def stop(self) -> None:
+        """Stop watching; the changes() iterator ends after its current wait."""
+        self._stop.set()
+
+    def retry(self, batch: Dict[str, List[str]]) -> None:
+        """
+        Roll a batch back so its files are reported again.
+
+        Call this when processing a batch fails; its files are reported again
+        even if they do not change, after a delay that doubles with each
+        consecutive failure (up to 64 debounce periods). New changes are
+        reported without waiting for the delay.
+
+        Args:
+            batch: Batch yielded by changes()
+        """
+        for name in batch['changed']:
+            self._reported.pop(name, None)
+        for name in batch['removed']:
+            # Placeholder state that no file on disk has, so it counts as removed again
+            self._reported[name] = (-1.0, -1)
+
+        self._retried = True
+        self._failures += 1
+        self._retry_at = time.monotonic() + self.debounce * 2 ** min(self._failures - 1, 6)
+
+    def snapshot(self) -> Dict[str, Tuple[float, int]]:
+        """
+        Capture modification time and size of tracked files.
+
+        Returns:
+            Mapping of filename to (mtime, size)
+        """
+        state = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return state
+
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(self.suffixes):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                state[entry.name] = (stat.st_mtime, stat.st_size)
+
+        return state
+
+    def _wait(self) -> None:
+        """Block until a filesystem event arrives or the poll interval elapses."""
+        if self._inotify is not None:
+            self._inotify.read(timeout=int(self.poll_interval * 1000))
+        else:
+            self._stop.wait(self.poll_interval)
+
+    def changes(self, initial: Dict[str, Tuple[float, int]] = None) -> Iterator[Dict[str, List[str]]]:
+        """
+        Yield batches of changes once the directory has been quiet for the debounce period.
+
+        Args:
+            initial: Snapshot treated as already processed (defaults to empty,
+                so existing files are reported in the first batch)
+
+        Yields:
+            Dictionaries with sorted 'changed' and 'removed' filename lists
+        """
+        self._reported = dict(initial or {})
+        last_seen = dict(self._reported)
+        last_change = None
+
+        while not self._stop.is_set():
+            current = self.snapshot()
+
+            if current != last_seen:
+                # Files still being written keep changing size/mtime; restart the quiet period
+                last_seen = current
+                last_change = time.monotonic()
+            elif last_change is not None and time.monotonic() - last_change >= self.debounce:
+                changed = sorted(name for name, state in current.items() if self._reported.get(name) != state)
+                removed = sorted(name for name in self._reported if name not in current)
+                self._reported = dict(current)
+                last_change = None
+
+                if changed or removed:
+                    self._retried = False
+                    yield {'changed': changed, 'removed': removed}
+                    if not self._retried:
+                        self._failures = 0
+                continue
+            elif last_change is None and current != self._reported and time.monotonic() >= self._retry_at:
+                last_change = time.monotonic()
+
+            self._wait()